@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+📏 Benchmark do Constructor
+Executa o corpus de teste-query-prompts.md contra o engine (provider replay)
+e emite JSON com percentis de latência por fase, taxa de chamadas IA e tokens.
+
+Uso:
+    python benchmark.py --output benchmark-results.json
+    python benchmark.py --replay-mode record --limit 20     # grava cassete (exige SDK + chave)
+    python benchmark.py --compare baseline.json             # compara com execução anterior
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+sys.path.append(SCRIPT_DIR)
+
+from constructor import EvolutionAPIConstructor
+
+DEFAULT_CONFIG = os.path.join(REPO_ROOT, "endpoints-and-hooks", "config", "ai_config.json")
+DEFAULT_PROMPTS = os.path.join(SCRIPT_DIR, "teste-query-prompts.md")
+
+# Fases medidas pelo engine (enrichment inclui observations)
+PHASES = ["textual_ranking", "learned_ranking", "ai_ranking", "materialization", "enrichment", "observations"]
+TOKEN_FIELDS = ["calls", "input_tokens", "cached_input_tokens", "cache_creation_input_tokens",
+                "uncached_input_tokens", "output_tokens", "cost_usd"]
+
+
+def load_prompts(prompts_file: str) -> List[str]:
+    """Extrai os prompts numerados (com ou sem aspas) do markdown de testes"""
+    with open(prompts_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    prompts = []
+    for match in re.finditer(r'^\d+\.\s*(.+?)\s*$', content, re.MULTILINE):
+        prompt = match.group(1).strip()
+        if len(prompt) >= 2 and prompt.startswith('"') and prompt.endswith('"'):
+            prompt = prompt[1:-1]
+        prompts.append(prompt)
+    return prompts
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentil por nearest-rank; None se não há amostras"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(values: List[float]) -> Dict:
+    """Resumo de latência em milissegundos"""
+    to_ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "count": len(values),
+        "mean_ms": to_ms(sum(values) / len(values)) if values else None,
+        "p50_ms": to_ms(percentile(values, 50)),
+        "p95_ms": to_ms(percentile(values, 95)),
+        "p99_ms": to_ms(percentile(values, 99)),
+        "max_ms": to_ms(max(values)) if values else None
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def build_config(config_path: str, args: argparse.Namespace) -> Dict:
+    """Config do benchmark: provider replay e cache de respostas desligado"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    config['current_provider'] = 'replay'
+    config['cache_enabled'] = False
+    # Logs do engine fora do stdout (JSON do relatório); --verbose mantém INFO
+    config['logging'] = dict(config.get('logging', {}), stream='stderr',
+                             level='INFO' if args.verbose else 'WARNING')
+
+    replay = config.setdefault('replay', {})
+    if args.replay_mode:
+        replay['mode'] = args.replay_mode
+    if args.cassette:
+        replay['cassette_path'] = os.path.abspath(args.cassette)
+    if args.latency_mode:
+        replay.setdefault('latency', {})['mode'] = args.latency_mode
+
+    return config
+
+
+def token_delta(before: Dict, after: Dict) -> Dict:
+    return {field: after.get(field, 0) - before.get(field, 0) for field in TOKEN_FIELDS}
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict:
+    prompts = load_prompts(os.path.abspath(args.prompts))
+    if args.limit:
+        prompts = prompts[:args.limit]
+
+    config = build_config(os.path.abspath(args.config), args)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as tmp:
+        json.dump(config, tmp, ensure_ascii=False)
+        tmp_config_path = tmp.name
+
+    try:
+        # Config temporário fora do repositório: recursos resolvidos a partir de REPO_ROOT
+        engine = EvolutionAPIConstructor(tmp_config_path, resource_root=REPO_ROOT)
+    finally:
+        os.unlink(tmp_config_path)
+
+    print(f"📏 Benchmark: {len(prompts)} prompts (replay: {config['replay'].get('mode', 'replay')})",
+          file=sys.stderr)
+
+    total_latencies: List[float] = []
+    phase_latencies: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+    ai_call_queries: Dict[str, int] = {}
+    per_query = []
+    errors = 0
+    degraded = 0
+
+    tokens_before = engine.get_token_usage()
+
+    for i, prompt in enumerate(prompts, 1):
+        start = time.perf_counter()
+        try:
+            result = engine.search_api(prompt)
+        except Exception as e:
+            result = {"error": str(e)}
+        elapsed = time.perf_counter() - start
+
+        metrics = engine.get_query_metrics()
+        total_latencies.append(elapsed)
+        for phase, seconds in metrics["phase_timings"].items():
+            phase_latencies.setdefault(phase, []).append(seconds)
+        for stage, count in metrics["ai_calls"].items():
+            if count:
+                ai_call_queries[stage] = ai_call_queries.get(stage, 0) + 1
+
+        if "error" in result:
+            errors += 1
+        if result.get("degraded"):
+            degraded += 1
+
+        per_query.append({
+            "prompt": prompt,
+            "latency_ms": round(elapsed * 1000, 3),
+            "endpoint": (result.get("endpoint") or {}).get("name"),
+            "error": result.get("error"),
+            "phase_timings_ms": {phase: round(seconds * 1000, 3)
+                                 for phase, seconds in metrics["phase_timings"].items()},
+            "ai_calls": metrics["ai_calls"],
+            "tokens": metrics["usage"]
+        })
+
+        status = "❌" if "error" in result else "✅"
+        print(f"  {status} [{i}/{len(prompts)}] {elapsed * 1000:.1f}ms - {prompt}", file=sys.stderr)
+
+    tokens = token_delta(tokens_before, engine.get_token_usage())
+    total_queries = len(prompts)
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "provider": engine.provider,
+        "replay": engine.get_replay_stats(),
+        "queries": total_queries,
+        "errors": errors,
+        "degraded": degraded,
+        "latency": summarize(total_latencies),
+        "phases": {phase: summarize(values) for phase, values in phase_latencies.items()},
+        "ai_call_rate": {stage: count / total_queries if total_queries else 0.0
+                         for stage, count in ai_call_queries.items()},
+        "tokens": tokens,
+        "tokens_per_query": {field: tokens[field] / total_queries if total_queries else 0.0
+                             for field in TOKEN_FIELDS},
+        "cache_hit_ratio": (tokens["cached_input_tokens"] / tokens["input_tokens"]
+                            if tokens["input_tokens"] else 0.0),
+        "hedging": engine.get_hedging_stats(),
+        "circuit_breakers": engine.get_circuit_breaker_stats(),
+        "per_query": per_query if args.per_query else None
+    }
+
+
+def compare(current: Dict, baseline: Dict):
+    """Imprime em stderr a variação de p50/p95/p99 por fase em relação a um JSON anterior (stdout é do relatório)"""
+    print(f"\n📊 Comparação com {baseline.get('git_commit') or 'baseline'}:", file=sys.stderr)
+
+    rows = [("total", current["latency"], baseline.get("latency", {}))]
+    rows += [(phase, stats, baseline.get("phases", {}).get(phase, {}))
+             for phase, stats in current["phases"].items()]
+
+    for name, stats, base in rows:
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            now, before = stats.get(key), base.get(key)
+            if now is None or not before:
+                deltas.append(f"{key[:-3]}: n/a")
+            else:
+                deltas.append(f"{key[:-3]}: {now:.1f}ms ({(now - before) / before * 100:+.1f}%)")
+        print(f"  {name:<16} " + " | ".join(deltas), file=sys.stderr)
+
+    for stage, rate in current["ai_call_rate"].items():
+        before = baseline.get("ai_call_rate", {}).get(stage, 0.0)
+        print(f"  ai_call_rate[{stage}]: {rate:.1%} (antes {before:.1%})", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do Evolution API Constructor")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="ai_config.json base")
+    parser.add_argument("--prompts", default=DEFAULT_PROMPTS, help="markdown com prompts numerados")
+    parser.add_argument("--output", default=None, help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--limit", type=int, default=None, help="executa apenas os N primeiros prompts")
+    parser.add_argument("--replay-mode", choices=["replay", "record", "auto"], default=None)
+    parser.add_argument("--cassette", default=None, help="sobrescreve replay.cassette_path")
+    parser.add_argument("--latency-mode", choices=["recorded", "fixed", "none"], default=None)
+    parser.add_argument("--compare", default=None, help="JSON de execução anterior para comparação")
+    parser.add_argument("--per-query", action="store_true", help="inclui detalhes por prompt no JSON")
+    parser.add_argument("--verbose", action="store_true", help="mostra logs do engine")
+    args = parser.parse_args()
+
+    output = args.output
+    baseline_path = args.compare
+
+    report = run_benchmark(args)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultado salvo em: {output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
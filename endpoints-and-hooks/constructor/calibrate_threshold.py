@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+📏 Calibração do textual_confidence_threshold
+Reexecuta o ranking textual das consultas registradas no log de decisões da IA
+(learned_ranker.log_path) e escolhe o menor threshold — menos chamadas IA —
+cuja concordância com a IA atinja hybrid_strategy.target_agreement.
+
+Concordância simulada para um threshold t (mesma regra do engine):
+- score textual >= t: resposta textual, concorda se TOP 1 textual == vencedor da IA
+- score textual <  t: escalonada; a IA só substitui o textual se score IA >
+  score textual × hybrid_strategy.ai_margin, então concorda se a IA vence a
+  margem ou se o TOP 1 textual já é o vencedor da IA
+
+Decisões de produção só existem para consultas abaixo do threshold vigente:
+amostra enviesada para escolher um threshold menor. --write exige --collect
+sem --limit (corpus inteiro de prompts) e usa só essas decisões.
+
+Uso:
+    python calibrate_threshold.py                      # relatório (sinaliza amostra enviesada)
+    python calibrate_threshold.py --collect --write    # rotula o corpus com a IA e grava o threshold
+    python calibrate_threshold.py --collect --limit 50 # rotula só parte dos prompts (relatório)
+"""
+
+import argparse
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+
+from benchmark import DEFAULT_PROMPTS, load_prompts
+from constructor import EvolutionAPIConstructor
+from learned_ranker import DecisionLog
+
+
+# (score textual atual, TOP 1 textual == vencedor da IA, score da IA ou None se não registrado)
+Sample = Tuple[float, bool, Optional[float]]
+
+
+def collect_labels(engine: EvolutionAPIConstructor, prompts: List[str]) -> List[str]:
+    """Obtém o ranking da IA para cada prompt e grava no log de decisões; retorna os prompts rotulados"""
+    all_endpoints = engine.consolidated_index.get('endpoints', []) + engine.consolidated_index.get('webhooks', [])
+    collected = []
+    for prompt in prompts:
+        if not prompt.strip():
+            continue
+        engine._new_query_context(prompt)
+        textual = engine._enhanced_textual_ranking(prompt, all_endpoints)
+        ai_candidates = engine._phase1_ai_probabilistic_ranking(prompt, all_endpoints)
+        if textual and ai_candidates and not engine._query_context().get("ai_ranking_failed"):
+            engine._log_ai_decision(prompt, ai_candidates, textual, origin="collect")
+            collected.append(prompt)
+            print(f"  🏷️ {prompt} → {ai_candidates[0].endpoint_id}")
+    return collected
+
+
+def score_decisions(engine: EvolutionAPIConstructor, decisions: List[Dict],
+                    queries: Optional[List[str]] = None) -> Tuple[List[Sample], int]:
+    """
+    Uma amostra por consulta (última decisão); queries limita às consultas dadas.
+    Retorna também quantas amostras vieram de produção (enviesadas)
+    """
+    all_endpoints = engine.consolidated_index.get('endpoints', []) + engine.consolidated_index.get('webhooks', [])
+    latest = {decision["query"]: decision for decision in decisions}
+    if queries is not None:
+        latest = {query: latest[query] for query in queries if query in latest}
+
+    samples = []
+    for query, decision in latest.items():
+        textual = engine._enhanced_textual_ranking(query, all_endpoints)
+        if textual:
+            samples.append((textual[0].relevance_score, textual[0].endpoint_id == decision["winner"],
+                            decision.get("ai_score")))
+        else:
+            samples.append((0.0, False, decision.get("ai_score")))
+    production = sum(1 for decision in latest.values() if decision.get("origin", "production") != "collect")
+    return samples, production
+
+
+def simulate(samples: List[Sample], threshold: float, ai_margin: float = 1.1) -> Dict:
+    total = len(samples)
+    accepted = [agreed for score, agreed, _ in samples if score >= threshold]
+    # Escalada: a IA só vence com margem; sem score da IA registrado, assume o textual mantido
+    escalated = [agreed or (ai_score is not None and ai_score > score * ai_margin)
+                 for score, agreed, ai_score in samples if score < threshold]
+    return {
+        "threshold": threshold,
+        "ai_call_rate": len(escalated) / total,
+        "agreement": (sum(accepted) + sum(escalated)) / total,
+        "textual_precision": sum(accepted) / len(accepted) if accepted else None
+    }
+
+
+def calibrate(samples: List[Sample], target: float, ai_margin: float = 1.1) -> Optional[Dict]:
+    """Menor threshold (dentre os scores observados) com concordância >= target"""
+    candidates = sorted({round(score, 4) for score, _, _ in samples} | {1.0001})
+    for threshold in candidates:
+        result = simulate(samples, threshold, ai_margin)
+        if result["agreement"] >= target:
+            return result
+    return None
+
+
+def write_threshold(config_path: str, threshold: float):
+    """Atualiza apenas o valor no arquivo (preserva formatação e comentários do JSON)"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    updated, count = re.subn(r'("textual_confidence_threshold"\s*:\s*)[0-9.]+',
+                             lambda match: f"{match.group(1)}{threshold}", content, count=1)
+    if not count:
+        raise ValueError(f"❌ textual_confidence_threshold não encontrado em {config_path}")
+
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write(updated)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibra hybrid_strategy.textual_confidence_threshold")
+    parser.add_argument("--config", default=None, help="ai_config.json (padrão: endpoints-and-hooks/config)")
+    parser.add_argument("--log", default=None, help="sobrescreve learned_ranker.log_path")
+    parser.add_argument("--target", type=float, default=None,
+                        help="concordância mínima (padrão: hybrid_strategy.target_agreement)")
+    parser.add_argument("--min-samples", type=int, default=20)
+    parser.add_argument("--collect", action="store_true", help="rotula os prompts de teste com a IA antes")
+    parser.add_argument("--prompts", default=DEFAULT_PROMPTS)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--write", action="store_true", help="grava o threshold calibrado no config")
+    args = parser.parse_args()
+
+    engine = EvolutionAPIConstructor(os.path.abspath(args.config) if args.config else None)
+    hybrid_config = engine.config.get('hybrid_strategy', {})
+    target = args.target if args.target is not None else hybrid_config.get('target_agreement', 0.95)
+    current = hybrid_config.get('textual_confidence_threshold', 0.75)
+    ai_margin = hybrid_config.get('ai_margin', 1.1)
+
+    if args.write and (not args.collect or args.limit is not None):
+        print("❌ --write exige --collect sem --limit: decisões de produção só cobrem consultas abaixo do "
+              "threshold atual (amostra enviesada)")
+        sys.exit(1)
+
+    log_path = os.path.abspath(args.log) if args.log else engine.decision_log_path
+    collected = None
+    if args.collect:
+        engine.decision_log = DecisionLog(log_path)
+        prompts = load_prompts(os.path.abspath(args.prompts))[:args.limit]
+        print(f"🏷️ Rotulando {len(prompts)} prompts com a IA ({engine.provider})...")
+        collected = collect_labels(engine, prompts)
+        print(f"✅ {len(collected)} decisões gravadas em {log_path}")
+
+    # Com --collect só o corpus rotulado agora entra na amostra
+    samples, production = score_decisions(engine, DecisionLog(log_path).read(), collected)
+    print(f"\n📏 {len(samples)} consultas rotuladas pela IA em {log_path}")
+    if production:
+        print(f"⚠️ Amostra enviesada: {production} decisões de produção (só consultas abaixo do threshold "
+              f"vigente escalam). Use --collect para calibrar sobre o corpus inteiro")
+    if len(samples) < args.min_samples:
+        print(f"❌ Amostras insuficientes (< {args.min_samples}); colete mais decisões com --collect")
+        return
+
+    print(f"\n{'threshold':>10} {'chamadas IA':>12} {'concordância':>13} {'precisão textual':>17}")
+    for threshold in sorted({round(step / 20, 2) for step in range(4, 20)} | {current}):
+        row = simulate(samples, threshold, ai_margin)
+        precision = f"{row['textual_precision']:.1%}" if row['textual_precision'] is not None else "-"
+        marker = "  ← atual" if threshold == current else ""
+        print(f"{threshold:>10.2f} {row['ai_call_rate']:>12.1%} {row['agreement']:>13.1%} {precision:>17}{marker}")
+
+    best = calibrate(samples, target, ai_margin)
+    if best is None:
+        print(f"\n❌ Nenhum threshold atinge concordância {target:.1%}")
+        return
+
+    before = simulate(samples, current, ai_margin)
+    print(f"\n🎯 Threshold calibrado: {best['threshold']} (concordância alvo {target:.1%})")
+    print(f"   chamadas IA: {before['ai_call_rate']:.1%} → {best['ai_call_rate']:.1%} | "
+          f"concordância: {before['agreement']:.1%} → {best['agreement']:.1%}")
+
+    if args.write:
+        write_threshold(engine.config_path, best['threshold'])
+        print(f"💾 textual_confidence_threshold = {best['threshold']} gravado em {engine.config_path}")
+
+
+if __name__ == "__main__":
+    main()
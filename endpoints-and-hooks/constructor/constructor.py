@@ -4,16 +4,59 @@
 Agente especializado em construção e consulta de APIs Evolution com busca híbrida IA + textual
 """
 
+import hashlib
 import json
+import logging
 import os
 import re
+import threading
+import time
 import unicodedata
-from typing import Dict, List, Optional, Tuple, Any
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple, Any, Iterator
+from types import SimpleNamespace
 from dataclasses import dataclass
-import anthropic
-import openai
 from datetime import datetime, timedelta
 
+# SDKs opcionais: o provider "replay" roda sem eles (CI offline)
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+# Opcional: contagem exata de tokens quando o stream OpenAI fecha antes do usage
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from logger import get_logger, setup_logging
+from error_handler import CircuitBreaker, HedgedExecutor, UsageBudget
+from intent_classifier import IntentClassifier
+from learned_ranker import DecisionLog, LearnedRanker
+from location_catalog import LocationCatalog
+from observations import ObservationStore, docs_version
+from passage_index import PassageIndex
+from spell_index import SpellIndex
+from text_index import TextIndex
+from performance_monitor import AgreementTracker, MetricsRegistry, RequestProfiler, Tracer, SPAN_KIND_CLIENT
+from replay_provider import CassetteMissError, ReplayProvider
+
+logger = get_logger(__name__)
+
+# 📂 Raiz dos recursos: argumento → variável de ambiente → config "resource_root" → local do pacote
+RESOURCE_ROOT_ENV = "EVOLUTION_CONSTRUCTOR_ROOT"
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+DEFAULT_CONFIG_PATH = os.path.join("endpoints-and-hooks", "config", "ai_config.json")
+
 @dataclass
 class SearchResult:
     """Resultado de busca estruturado"""
@@ -25,6 +68,93 @@ class SearchResult:
     summary: str
     keywords: List[str]
     confidence: float
+    reasoning: Optional[str] = None
+
+class IncrementalRankingParser:
+    """
+    🌊 Parser incremental do JSON de ranking da IA
+
+    Recebe fragmentos de texto (streaming) e emite cada objeto do array
+    "rankings" assim que ele é fechado, sem esperar o JSON completo.
+    """
+
+    RANKINGS_ARRAY_PATTERN = re.compile(r'"rankings"\s*:\s*\[')
+
+    def __init__(self):
+        self.buffer = ""
+        self.rankings: List[Dict] = []
+        self.array_closed = False
+        self._pos = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = None
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Adiciona fragmento e retorna os rankings completados por ele"""
+        self.buffer += chunk
+        completed = []
+
+        if self._pos is None:
+            match = self.RANKINGS_ARRAY_PATTERN.search(self.buffer)
+            if not match:
+                return completed
+            self._pos = match.end()
+
+        buffer = self.buffer
+        i = self._pos
+
+        while i < len(buffer) and not self.array_closed:
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    try:
+                        entry = json.loads(buffer[self._object_start:i + 1])
+                    except ValueError:
+                        entry = None
+                    if isinstance(entry, dict):
+                        self.rankings.append(entry)
+                        completed.append(entry)
+                    self._object_start = None
+            elif char == ']' and self._depth == 0:
+                self.array_closed = True
+
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def result(self) -> Dict:
+        """Resultado final: JSON completo se válido, senão os rankings já parseados"""
+        text = self.buffer.strip()
+        if text.startswith('```'):
+            text = text.strip('`')
+            text = text[4:] if text.startswith('json') else text
+
+        try:
+            parsed = json.loads(text)
+            if isinstance(parsed, dict) and 'rankings' in parsed:
+                return parsed
+        except ValueError:
+            pass
+
+        return {"rankings": list(self.rankings)}
+
 
 class EvolutionAPIConstructor:
     """
@@ -43,17 +173,148 @@ class EvolutionAPIConstructor:
     - OpenAI (o1-mini, o1-preview, gpt-4o, gpt-4o-mini, gpt-4-turbo, gpt-3.5-turbo)
     """
 
-    def __init__(self, config_path: str = "endpoints-and-hooks/config/ai_config.json"):
-        self.config = self._load_config(config_path)
-        self.ai_client = self._init_ai_client()
+    # 🧊 Instruções estáticas do ranking IA (prefixo cacheável pelo provider)
+    RANKING_SYSTEM_PROMPT = """
+        Você é um especialista em APIs REST e especificamente na Evolution API para WhatsApp.
+
+        TAREFA: Analisar uma consulta do usuário e calcular a probabilidade de cada endpoint da tabela corresponder à intenção da consulta.
+        """
+
+    # Contrato de saída completo: todos os endpoints com reasoning individual
+    RANKING_OUTPUT_FULL = """
+        RETORNE um JSON com esta estrutura EXATA:
+        {
+            "rankings": [
+                {
+                    "id": "endpoint_id",
+                    "index": 0,
+                    "probability": 0.95,
+                    "reasoning": "Breve explicação do match"
+                }
+            ]
+        }
+        """
+
+    # Contrato de saída compacto: apenas TOP-K (índice + probabilidade)
+    RANKING_OUTPUT_COMPACT = """
+        RETORNE um JSON com esta estrutura EXATA, contendo APENAS os {top_k} endpoints mais prováveis
+        em ordem decrescente de probabilidade:
+        {
+            "rankings": [
+                {"index": 0, "probability": 0.95}
+            ]{reasoning_field}
+        }
+        """
+
+    RANKING_CRITERIA_PROMPT = """
+        CRITÉRIOS DE PROBABILIDADE:
+        - 0.90-1.00: Match perfeito - endpoint faz exatamente o que o usuário quer
+        - 0.70-0.89: Match muito bom - endpoint resolve o problema com algumas adaptações
+        - 0.40-0.69: Match moderado - endpoint está relacionado mas não é ideal
+        - 0.20-0.39: Match fraco - endpoint tem alguma relação distante
+        - 0.00-0.19: Sem match - endpoint não tem relação com a consulta
+
+        IMPORTANTE:
+        - Seja rigoroso: a maioria dos endpoints devem ter probabilidades baixas (< 0.3)
+        - Apenas endpoints realmente relevantes devem ter probabilidades altas
+        - Use seu conhecimento da Evolution API para validar se faz sentido
+        - Considere sinônimos e variações linguísticas (criar/adicionar, buscar/listar, etc.)
+        - Analise a intenção do usuário (configurar vs consultar vs deletar)
+        """
+
+    RANKING_TASK_PROMPT = """
+        Analise cada endpoint da tabela e calcule a probabilidade dele corresponder à consulta.
+        Retorne o JSON com probabilidades para TODOS os endpoints listados.
+        Use o índice da linha (começando em 0) como "index".
+        """
+
+    RANKING_TASK_PROMPT_COMPACT = """
+        Analise cada endpoint da tabela e calcule a probabilidade dele corresponder à consulta.
+        Retorne SOMENTE os {top_k} endpoints mais prováveis, do mais provável para o menos provável.
+        Use o índice da linha (começando em 0) como "index".
+        """
+
+    # Nome da ferramenta usada como saída estruturada na Anthropic (modo compacto)
+    RANKING_TOOL_NAME = "rank_endpoints"
+
+    def __init__(self, config_path: Optional[str] = None, resource_root: Optional[str] = None,
+                 offline: bool = False):
+        # offline=True: sem cliente de IA (ferramentas offline como location_catalog.py, sem SDK/chave)
+        # 📂 Caminhos relativos resolvidos contra a raiz dos recursos (nunca contra o CWD),
+        # então vários engines/threads podem rodar no mesmo processo sem os.chdir
+        bootstrap_root = os.path.abspath(resource_root or os.environ.get(RESOURCE_ROOT_ENV) or PACKAGE_ROOT)
+        self.config_path = os.path.join(bootstrap_root, config_path or DEFAULT_CONFIG_PATH)
+        self.config = self._load_config(self.config_path)
+        self.resource_root = self._resolve_resource_root(resource_root, bootstrap_root)
+        self._setup_logging()
+        self.provider = self._resolve_provider_api()
+        self.ai_clients = {}
+        self.ai_client = None if offline else self._init_ai_client()
+
+        # ⏱️ Deadlines e hedging das chamadas IA
+        self.ai_executor = HedgedExecutor(self.config.get('ai_resilience', {}))
+
+        # 🔌 Circuit breakers por provider (criados sob demanda)
+        self.circuit_breakers = {}
+        self._cassette_miss_warned = False
+
+        # 🔭 Tracing por fase (spans OTLP, opt-in)
+        self.tracer = Tracer(self.config.get('tracing', {}), base_dir=self.resource_root)
+
+        # 🔬 Profiling por consulta (flag ou amostragem)
+        self.profiler = RequestProfiler(self.config.setdefault('profiling', {}), base_dir=self.resource_root)
+
+        # 📈 Métricas (formato Prometheus): get_metrics() / render_metrics() / endpoint HTTP
+        self.metrics = MetricsRegistry()
+        self.metric = self._init_metrics()
+
+        # 🧵 Estado por consulta (thread-local): estágios degradados etc.
+        self._query_local = threading.local()
         self.consolidated_index = self._load_consolidated_index()
+        self.index_version = self._compute_index_version(self.consolidated_index)
+
+        # 🔤 Expansão textual (stemmer + sinônimos) compilada 1x por endpoint
+        self.text_index, self._endpoint_terms = self._compile_text_index()
+
+        # 🧭 Intenção (create/read/update/delete/stats/test) pré-computada por endpoint
+        self.intent_classifier, self._endpoint_intents = self._compile_intents()
+
+        # 🔡 Índice de deleções (SymSpell) para corrigir erros de digitação da consulta
+        self.spell_index = self._compile_spell_index()
+
+        # 🎓 Ranker local destilado das decisões da IA (estágio antes da IA)
+        ranker_config = self.config.get('learned_ranker', {})
+        self.decision_log_path = self._resource_path(
+            ranker_config.get('log_path', 'endpoints-and-hooks/constructor/distillation/ai-decisions.jsonl'))
+        self.learned_ranker_model_path = self._resource_path(
+            ranker_config.get('model_path', 'endpoints-and-hooks/constructor/distillation/ranker-model.json'))
+        self.decision_log = DecisionLog(self.decision_log_path) if ranker_config.get('log_decisions', False) else None
+        self.learned_ranker = self._load_learned_ranker()
+
+        # 🤝 Concordância textual × IA nas consultas escalonadas (drift do threshold)
+        self.ranking_agreement = AgreementTracker(
+            window=self.config.get('hybrid_strategy', {}).get('agreement_window', 200))
         self.cache = {}
         self.cache_timestamps = {}
 
+        # 🧊 Prefixo estático do ranking IA (construído 1x por versão do índice)
+        self._ranking_prompt_cache = {}
+
+        # 🧾 Contabilidade de tokens (cached vs uncached) e custo das chamadas IA
+        self.token_usage = self._empty_usage()
+        self.usage_by_model = {}
+        self._usage_lock = threading.Lock()
+
+        # 💸 Orçamento por minuto/dia: esgotado = apenas resultado textual
+        self.usage_budget = UsageBudget(self.config.get('cost_control', {}).get('budgets', {}))
+
+        # 🌊 Estatísticas do ranking em streaming (early exit)
+        self.stream_stats = {"streams": 0, "early_exits": 0}
+
         # 🌶️ PHASE 2: Contextual Enhancement - Configurações
         self.context_files = {
-            "filters": "endpoints-and-hooks/custom/filters.md",
-            "webhooks": "endpoints-and-hooks/custom/dual-webhook-system.md"
+            "filters": self._resource_path("endpoints-and-hooks", "custom", "filters.md"),
+            "webhooks": self._resource_path("endpoints-and-hooks", "custom", "dual-webhook-system.md")
         }
 
         # 🎯 NOVO: Mapeamento Endpoint Nome → Tag nos arquivos complementares
@@ -98,6 +359,34 @@ class EvolutionAPIConstructor:
             "Limpar Todas as Falhas", "Testar Webhook", "Limpar Logs"
         }
 
+        # 📚 Passagens dos complementos: só as seções relevantes vão para os prompts
+        self.passage_index = self._build_passage_index()
+
+        # 🔎 Passagens dos description.md (respostas pontuais com linhas de origem), em memória
+        self.description_passages = self._build_description_passages()
+
+        # 📝 Observações pré-geradas por endpoint (observations.py) e refinamentos assíncronos opt-in
+        observations_config = self.config.get('observations', {})
+        self.observations_path = self._resource_path(
+            observations_config.get('path', 'endpoints-and-hooks/compiled/observations.json'))
+        self.observation_store = ObservationStore.load(self.observations_path)
+        self._refinements = OrderedDict()
+        self._refinements_lock = threading.Lock()
+        self._refine_pool = None
+
+        # 🗺️ Localizações compiladas (location_catalog.py): documentação por offsets, sem reler o map.json
+        catalog_config = self.config.get('catalog', {})
+        self.catalog_path = self._resource_path(
+            catalog_config.get('path', 'endpoints-and-hooks/compiled/catalog.json'))
+        self.catalog = None
+        if catalog_config.get('enabled', True):
+            self.catalog = LocationCatalog.load(self.catalog_path, {
+                source: self._resource_path("endpoints-and-hooks", source, "description.md")
+                for source in self.catalog_sources()}, {
+                source: self._resource_path("endpoints-and-hooks", source, "map.json")
+                for source in self.catalog_sources()})
+            logger.info("🗺️ Catálogo de localizações: %s", self.catalog.stats())
+
     def _load_config(self, config_path: str) -> Dict:
         """Carrega configurações de AI e API keys"""
         try:
@@ -106,32 +395,553 @@ class EvolutionAPIConstructor:
         except FileNotFoundError:
             raise FileNotFoundError(f"❌ Arquivo de configuração não encontrado: {config_path}")
 
+    def _resolve_resource_root(self, resource_root: Optional[str], bootstrap_root: str) -> str:
+        """
+        📂 Resolve a raiz dos recursos uma única vez
+
+        Prioridade: argumento → $EVOLUTION_CONSTRUCTOR_ROOT → "resource_root" do config
+        (relativo ao diretório do config) → diretório do pacote.
+        """
+        if resource_root or os.environ.get(RESOURCE_ROOT_ENV):
+            return bootstrap_root
+
+        configured = self.config.get('resource_root')
+        if configured:
+            return os.path.abspath(os.path.join(os.path.dirname(self.config_path), configured))
+
+        return PACKAGE_ROOT
+
+    def _resource_path(self, *parts: str) -> str:
+        """Caminho absoluto dentro da raiz dos recursos (caminhos absolutos passam intactos)"""
+        return os.path.join(self.resource_root, *parts)
+
+    def _setup_logging(self):
+        """📝 Logging assíncrono (fila + listener); debug_mode força nível DEBUG"""
+        logging_config = dict(self.config.get('logging', {}))
+        if logging_config.get('file_path'):
+            logging_config['file_path'] = self._resource_path(logging_config['file_path'])
+        if self.config.get('debug_mode', False):
+            logging_config['level'] = 'DEBUG'
+        setup_logging(logging_config)
+
+    def _resolve_provider_api(self) -> str:
+        """
+        Resolve o formato de API usado nas chamadas (anthropic ou openai)
+
+        Com current_provider = "replay" o formato vem de replay.api e as
+        chamadas são atendidas pelo cassete (ver replay_provider.py).
+        """
+        provider = self.config['current_provider']
+
+        if provider == 'replay':
+            provider = self.config.get('replay', {}).get('api', 'openai')
+
+        if provider not in ('anthropic', 'openai'):
+            raise ValueError(f"❌ Provider não suportado: {self.config['current_provider']}")
+
+        return provider
+
     def _init_ai_client(self):
         """Inicializa cliente de IA baseado no provider configurado"""
-        provider = self.config['current_provider']
+        return self._get_ai_client(self.provider)
+
+    def _get_ai_client(self, provider: str):
+        """Retorna cliente do provider (criado sob demanda, um por provider)"""
+        if provider in self.ai_clients:
+            return self.ai_clients[provider]
+
+        replay_config = dict(self.config.get('replay', {}))
+        if replay_config.get('cassette_path'):
+            replay_config['cassette_path'] = self._resource_path(replay_config['cassette_path'])
+        use_replay = self.config['current_provider'] == 'replay' and provider == self.provider
+
+        if use_replay and replay_config.get('mode', 'replay') == 'replay':
+            # Replay puro: nenhum SDK/credencial necessário
+            client = ReplayProvider(provider, replay_config)
+        else:
+            client = self._create_sdk_client(provider)
+            if use_replay:
+                client = ReplayProvider(provider, replay_config, upstream_client=client)
+
+        self.ai_clients[provider] = client
+        return client
 
+    def _create_sdk_client(self, provider: str):
+        """Cria cliente do SDK oficial do provider"""
         if provider == 'anthropic':
+            if anthropic is None:
+                raise ImportError("❌ SDK 'anthropic' não instalado")
             return anthropic.Anthropic(
                 api_key=self.config['anthropic']['api_key']
             )
         elif provider == 'openai':
+            if openai is None:
+                raise ImportError("❌ SDK 'openai' não instalado")
             return openai.OpenAI(
                 api_key=self.config['openai']['api_key']
             )
         else:
             raise ValueError(f"❌ Provider não suportado: {provider}")
 
+    def get_replay_stats(self) -> Optional[Dict]:
+        """Hits/misses/gravações do cassete quando current_provider = replay"""
+        client = self.ai_clients.get(self.provider)
+        return client.get_stats() if isinstance(client, ReplayProvider) else None
+
+    def _warn_cassette_miss(self, error: CassetteMissError):
+        """📼 Falta no cassete em modo replay: configuração, avisada uma vez por engine"""
+        if self._cassette_miss_warned:
+            logger.debug("📼 %s", error)
+            return
+        self._cassette_miss_warned = True
+        logger.error("📼 %s — cassete incompleto para esta configuração; grave com replay.mode "
+                     "record/auto (a falta não conta para o circuit breaker)", error)
+
+    def _get_circuit_breaker(self, provider: str) -> CircuitBreaker:
+        """Retorna circuit breaker do provider"""
+        if provider not in self.circuit_breakers:
+            breaker_config = self.config.get('ai_resilience', {}).get('circuit_breaker', {})
+            self.circuit_breakers[provider] = CircuitBreaker(provider, breaker_config)
+        return self.circuit_breakers[provider]
+
+    def get_circuit_breaker_stats(self) -> Dict:
+        """Estado e contadores dos circuit breakers por provider"""
+        return {provider: breaker.get_stats() for provider, breaker in self.circuit_breakers.items()}
+
+    def _new_query_context(self, user_query: str, query_id: Optional[str] = None) -> Dict:
+        """Inicia o estado da consulta corrente (thread-local)"""
+        context = {"query": user_query, "query_id": query_id or uuid.uuid4().hex[:16],
+                   "degraded_stages": [], "degraded_reasons": {},
+                   "phase_timings": {}, "ai_calls": {}, "usage": self._empty_usage(),
+                   "ranking": [], "selected_endpoint": None, "intent": None, "corrections": {},
+                   "sub_queries": []}
+        self._query_local.context = context
+        return context
+
+    def _query_context(self) -> Dict:
+        """Estado da consulta corrente (cria vazio se chamado fora de search_api)"""
+        context = getattr(self._query_local, 'context', None)
+        if context is None:
+            context = self._new_query_context("")
+        return context
+
+    @contextmanager
+    def _timed_phase(self, phase: str):
+        """⏱️ Acumula o tempo (segundos) de uma fase na consulta corrente"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            timings = self._query_context()["phase_timings"]
+            timings[phase] = timings.get(phase, 0.0) + elapsed
+            self.metric.phase_duration.observe(elapsed, phase=phase)
+
+    def _count_ai_call(self, stage: str):
+        """Contabiliza uma chamada IA (ranking/observations) na consulta corrente"""
+        ai_calls = self._query_context()["ai_calls"]
+        ai_calls[stage] = ai_calls.get(stage, 0) + 1
+        self.metric.ai_calls.inc(stage=stage)
+
+    def get_query_metrics(self) -> Dict:
+        """Tempos por fase, chamadas IA e ranking (ids) da última consulta desta thread"""
+        context = self._query_context()
+        return {
+            "query_id": context.get("query_id"),
+            "cache_hit": context.get("cache_hit", False),
+            "ranking": list(context.get("ranking", [])),
+            "selected_endpoint": context.get("selected_endpoint"),
+            "intent": context.get("intent"),
+            "corrections": dict(context.get("corrections", {})),
+            "sub_queries": list(context.get("sub_queries", [])),
+            "phase_timings": dict(context["phase_timings"]),
+            "ai_calls": dict(context["ai_calls"]),
+            "usage": dict(context["usage"]),
+            "degraded_stages": list(context["degraded_stages"])
+        }
+
+    def _init_metrics(self) -> SimpleNamespace:
+        """Cria as métricas do pipeline e inicia o endpoint de scrape se configurado"""
+        registry = self.metrics
+        metric = SimpleNamespace(
+            queries=registry.counter(
+                "queries_total", "Consultas processadas por resultado", ("outcome",)),
+            query_duration=registry.histogram(
+                "query_duration_seconds", "Latência total de search_api"),
+            phase_duration=registry.histogram(
+                "phase_duration_seconds", "Latência por fase do pipeline", ("phase",)),
+            cache_requests=registry.counter(
+                "cache_requests_total", "Consultas aos caches internos", ("cache", "result")),
+            ai_calls=registry.counter(
+                "ai_calls_total", "Estágios que escalaram para IA (ranking/observations)", ("stage",)),
+            ai_call_duration=registry.histogram(
+                "ai_call_duration_seconds", "Latência das chamadas ao provider de IA",
+                ("provider", "model", "stage", "outcome")),
+            ai_tokens=registry.counter(
+                "ai_tokens_total", "Tokens reportados pelo provider", ("provider", "type")),
+            errors=registry.counter(
+                "errors_total", "Erros por estágio do pipeline", ("stage",)),
+            degraded=registry.counter(
+                "degraded_stages_total", "Estágios IA pulados (circuit breaker aberto ou orçamento esgotado)",
+                ("stage", "reason")),
+            ai_cost=registry.counter(
+                "ai_cost_usd_total", "Custo estimado das chamadas IA (USD)", ("provider", "model")),
+            breaker_state=registry.gauge(
+                "circuit_breaker_state", "Estado do circuit breaker (0=closed, 1=half_open, 2=open)",
+                ("provider",)),
+            hedging=registry.counter(
+                "ai_hedging_events_total", "Eventos do executor de chamadas IA", ("event",)),
+            stream_events=registry.counter(
+                "ai_stream_events_total", "Rankings em streaming e early exits", ("event",)),
+            ranking_decisions=registry.counter(
+                "ranking_decisions_total", "Estágio que definiu o ranking (textual/learned/ai)", ("stage",)),
+            ranking_agreement=registry.counter(
+                "ranking_agreement_total", "TOP 1 textual vs IA nas consultas escalonadas", ("result",)),
+            observations=registry.counter(
+                "observations_total", "Origem das observações da Fase 3 (precomputed/live/missing)", ("source",))
+        )
+        registry.register_collector(self._collect_state_metrics)
+
+        server_config = self.config.get('metrics', {}).get('http_server', {})
+        if server_config.get('enabled', False):
+            try:
+                registry.start_http_server(server_config.get('host', '127.0.0.1'),
+                                           server_config.get('port', 9464))
+            except OSError as e:
+                logger.warning("⚠️ Endpoint de métricas não iniciado: %s", e)
+
+        return metric
+
+    def _collect_state_metrics(self):
+        """Espelha no scrape o estado de breakers, hedging e streaming"""
+        states = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+        for provider, breaker in self.circuit_breakers.items():
+            self.metric.breaker_state.set(states[breaker.state], provider=provider)
+
+        hedging = self.ai_executor.get_stats()
+        for event in ("calls", "hedged", "hedge_wins", "timeouts", "errors"):
+            self.metric.hedging.set(hedging[event], event=event)
+
+        for event, count in self.stream_stats.items():
+            self.metric.stream_events.set(count, event=event)
+
+    def get_metrics(self) -> Dict:
+        """📈 Snapshot das métricas (counters, gauges e histogramas com percentis aproximados)"""
+        return self.metrics.snapshot()
+
+    def render_metrics(self) -> str:
+        """📈 Métricas no formato texto do Prometheus"""
+        return self.metrics.render()
+
+    def _ai_stage_allowed(self, stage: str) -> bool:
+        """
+        🔌 Verifica orçamento e circuit breaker do provider antes de um estágio IA
+
+        Com o orçamento esgotado ou o circuito aberto o estágio é pulado
+        imediatamente e a consulta é marcada como degradada (apenas resultado
+        textual/literal).
+        """
+        exhausted = self.usage_budget.check()
+        if exhausted:
+            logger.warning("💸 Orçamento IA esgotado (%s): estágio '%s' pulado (modo degradado)", exhausted, stage)
+            self._mark_degraded(stage, f"budget:{exhausted}")
+            return False
+
+        provider = self.provider
+        if self._get_circuit_breaker(provider).allow_request():
+            return True
+
+        logger.warning("🔌 Circuit breaker aberto para %s: estágio '%s' pulado (modo degradado)", provider, stage)
+        self._mark_degraded(stage, "circuit_breaker")
+        return False
+
+    def _mark_degraded(self, stage: str, reason: str):
+        context = self._query_context()
+        # Consulta composta pode pular o mesmo estágio uma vez por intenção
+        if stage not in context["degraded_stages"]:
+            context["degraded_stages"].append(stage)
+        context["degraded_reasons"][stage] = reason
+        self.metric.degraded.inc(stage=stage, reason=reason.split(':')[0])
+
+    def _get_call_timeout(self, call_type: str) -> float:
+        """Deadline (segundos) por tipo de chamada IA: ranking ou observations"""
+        resilience = self.config.get('ai_resilience', {})
+        return resilience.get(f'{call_type}_timeout_seconds', resilience.get('timeout_seconds', 30))
+
     def _load_consolidated_index(self) -> Dict:
         """Carrega índice consolidado (única vez)"""
-        index_path = "endpoints-and-hooks/consolidated-map.json"
+        index_path = self._resource_path("endpoints-and-hooks", "consolidated-map.json")
         try:
             with open(index_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                print(f"📚 Índice carregado: {data['metadata']['total_entries']} endpoints/webhooks")
+                logger.info("📚 Índice carregado: %s endpoints/webhooks", data['metadata']['total_entries'])
                 return data
         except FileNotFoundError:
             raise FileNotFoundError(f"❌ Índice consolidado não encontrado: {index_path}")
 
+    def _compile_text_index(self) -> Tuple[Optional[TextIndex], Dict[int, Dict]]:
+        """Termos canônicos por campo de cada endpoint (id(endpoint) → termos), calculados na carga"""
+        expansion_config = self.config.get('text_expansion', {})
+        if not expansion_config.get('enabled', True):
+            return None, {}
+
+        text_index = TextIndex.from_file(self._resource_path(
+            expansion_config.get('synonyms_path', 'endpoints-and-hooks/config/synonyms.json')))
+        endpoints = self.consolidated_index.get('endpoints', []) + self.consolidated_index.get('webhooks', [])
+        compiled = {id(endpoint): text_index.compile_endpoint(endpoint) for endpoint in endpoints}
+        logger.info("🔤 Expansão textual compilada: %s endpoints, %s sinônimos",
+                    len(compiled), len(text_index.synonyms))
+        return text_index, compiled
+
+    def _compile_intents(self) -> Tuple[Optional[IntentClassifier], Dict[int, frozenset]]:
+        """Intenções de cada endpoint (id(endpoint) → intenções), calculadas na carga"""
+        if self.text_index is None or not self.config.get('intent_classifier', {}).get('enabled', True):
+            return None, {}
+
+        classifier = IntentClassifier(self.text_index)
+        compiled = classifier.compile(self.consolidated_index.get('endpoints', []) +
+                                      self.consolidated_index.get('webhooks', []))
+        return classifier, compiled
+
+    def catalog_sources(self) -> List[str]:
+        """Origens (native/custom) com map.json + description.md"""
+        all_endpoints = self.consolidated_index.get('endpoints', []) + self.consolidated_index.get('webhooks', [])
+        return sorted({endpoint['source'] for endpoint in all_endpoints})
+
+    def _build_passage_index(self) -> Optional[PassageIndex]:
+        """Passagens (seções/cenários/títulos) dos arquivos complementares, indexadas na carga"""
+        retrieval_config = self.config.get('passage_retrieval', {})
+        if not retrieval_config.get('enabled', True):
+            return None
+
+        passage_index = PassageIndex(self.text_index)
+        for file_type, file_path in self.context_files.items():
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    passage_index.add_markdown(file_type, f.read(),
+                                               max_chars=retrieval_config.get('passage_max_chars', 1200))
+            except OSError as e:
+                logger.warning("⚠️ Complemento não indexado (%s): %s", file_path, e)
+        logger.info("📚 Índice de passagens: %s", passage_index.stats())
+        return passage_index
+
+    def _build_description_passages(self) -> Optional[PassageIndex]:
+        """Passagens dos description.md de cada origem (native/custom), com vetores n-grama, na carga"""
+        passages_config = self.config.get('description_passages', {})
+        if not passages_config.get('enabled', True):
+            return None
+
+        passage_index = PassageIndex(self.text_index, vector_weight=passages_config.get('vector_weight', 0.5))
+        for source in self.catalog_sources():
+            description_path = self._resource_path("endpoints-and-hooks", source, "description.md")
+            try:
+                with open(description_path, 'r', encoding='utf-8') as f:
+                    passage_index.add_markdown(source, f.read(), skip_sections=(),
+                                               max_chars=passages_config.get('passage_max_chars', 800))
+            except OSError as e:
+                logger.warning("⚠️ Descrição não indexada (%s): %s", description_path, e)
+        passage_index.build_vectors()
+        logger.info("🔎 Passagens das descrições: %s", passage_index.stats())
+        return passage_index
+
+    def search_passages(self, query: str, top_k: Optional[int] = None, source: Optional[str] = None) -> List[Dict]:
+        """
+        🔎 Trechos dos description.md mais relevantes à pergunta, servidos da memória (sem IA)
+
+        Score híbrido (BM25 + vetores n-grama); cada trecho traz arquivo e
+        linhas de origem (1-based, inclusivas). source restringe a native/custom.
+        """
+        if self.description_passages is None:
+            return []
+
+        passages_config = self.config.get('description_passages', {})
+        if self.spell_index is not None:
+            query = self.spell_index.correct(query)[0]
+        results = self.description_passages.search(query, top_k=top_k or passages_config.get('top_k', 3),
+                                                   sources=[source] if source else None)
+        return [{
+            "source": passage.source,
+            "file": f"endpoints-and-hooks/{passage.source}/description.md",
+            "start_line": passage.start_line,
+            "end_line": passage.end_line,
+            "title": passage.title,
+            "score": round(score, 4),
+            "text": passage.text
+        } for score, passage in results]
+
+    def _endpoint_context_query(self, endpoint_name: str, user_query: Optional[str] = None) -> str:
+        """Texto de busca das passagens: nome, resumo e keywords do endpoint (+ consulta, se houver)"""
+        parts = [endpoint_name]
+        for endpoint in self.consolidated_index.get('endpoints', []) + self.consolidated_index.get('webhooks', []):
+            if endpoint.get('name') == endpoint_name:
+                parts.extend([endpoint.get('summary', ''), ' '.join(endpoint.get('keywords', []))])
+                break
+        if user_query:
+            parts.append(user_query)
+        return ' '.join(parts)
+
+    def _retrieve_passages(self, file_type: str, query_text: str) -> str:
+        """TOP K passagens do complemento (orçamento passage_retrieval.max_chars)"""
+        retrieval_config = self.config.get('passage_retrieval', {})
+        results = self.passage_index.search(query_text,
+                                            top_k=retrieval_config.get('top_k', 4),
+                                            sources=[file_type],
+                                            max_chars=retrieval_config.get('max_chars', 3000))
+        return PassageIndex.format(results)
+
+    def _compile_spell_index(self) -> Optional[SpellIndex]:
+        """Vocabulário (nome, resumo, keywords e sinônimos) indexado por deleções na carga"""
+        spell_config = self.config.get('spell_correction', {})
+        if not spell_config.get('enabled', True):
+            return None
+
+        texts = []
+        for endpoint in self.consolidated_index.get('endpoints', []) + self.consolidated_index.get('webhooks', []):
+            texts.extend([endpoint.get('name', ''), endpoint.get('summary', ''), ' '.join(endpoint.get('keywords', []))])
+        if self.text_index is not None:
+            texts.extend(self.text_index.vocabulary)
+
+        spell_index = SpellIndex(texts,
+                                 max_distance=spell_config.get('max_distance', 2),
+                                 prefix_length=spell_config.get('prefix_length', 7),
+                                 min_length=spell_config.get('min_length', 4),
+                                 canonical=self.text_index.canonical if self.text_index else None,
+                                 valid_words=self._load_valid_words(spell_config))
+        logger.info("🔡 Índice ortográfico compilado: %s palavras, %s deleções, %s palavras válidas",
+                    len(spell_index.frequency), len(spell_index.deletes), len(spell_index.valid_words))
+        return spell_index
+
+    def _load_valid_words(self, spell_config: Dict) -> List[str]:
+        """
+        Palavras que não são erros mesmo fora do catálogo: as que aparecem ao menos
+        min_word_frequency vezes na documentação das origens + lista de palavras
+        opcional (uma por linha; formato .dic do hunspell aceito)
+        """
+        frequency = Counter()
+        if spell_config.get('documentation_lexicon', True):
+            for source in self.catalog_sources():
+                source_dir = self._resource_path("endpoints-and-hooks", source)
+                for file_name in sorted(os.listdir(source_dir)) if os.path.isdir(source_dir) else []:
+                    if not file_name.endswith('.md'):
+                        continue
+                    try:
+                        with open(os.path.join(source_dir, file_name), 'r', encoding='utf-8') as f:
+                            frequency.update(re.findall(r'[^\W\d_]+', f.read().lower()))
+                    except OSError as e:
+                        logger.warning("⚠️ Documentação fora do léxico ortográfico (%s): %s", file_name, e)
+        min_frequency = spell_config.get('min_word_frequency', 1)
+        words = [word for word, count in frequency.items() if count >= min_frequency]
+
+        wordlist_path = spell_config.get('wordlist_path')
+        if wordlist_path:
+            try:
+                with open(self._resource_path(wordlist_path), 'r', encoding='utf-8') as f:
+                    words.extend(line.split('/', 1)[0].strip() for line in f if line.strip())
+            except OSError as e:
+                logger.warning("⚠️ Lista de palavras não carregada (%s): %s", wordlist_path, e)
+        return words
+
+    def _correct_query(self, user_query: str) -> str:
+        """Corrige erros de digitação ("intancia" → "instância"); correções ficam no contexto da consulta"""
+        if self.spell_index is None:
+            return user_query
+
+        corrected, corrections = self.spell_index.correct(user_query)
+        if corrections:
+            self._query_context()["corrections"] = corrections
+            logger.info("🔡 Consulta corrigida: '%s' → '%s'", user_query, corrected)
+        return corrected
+
+    def _load_learned_ranker(self) -> Optional[LearnedRanker]:
+        """Carrega o modelo treinado (learned_ranker.py) se habilitado e com exemplos suficientes"""
+        ranker_config = self.config.get('learned_ranker', {})
+        if not ranker_config.get('enabled', True):
+            return None
+
+        ranker = LearnedRanker.load(self.learned_ranker_model_path, self.index_version)
+        if ranker is None:
+            return None
+
+        min_examples = ranker_config.get('min_examples', 30)
+        if ranker.examples < min_examples:
+            logger.info("🎓 Ranker aprendido ignorado: %s exemplos < %s", ranker.examples, min_examples)
+            return None
+
+        ranker.prepare(self.consolidated_index.get('endpoints', []) + self.consolidated_index.get('webhooks', []))
+        logger.info("🎓 Ranker aprendido carregado: %s exemplos, %s features",
+                    ranker.examples, ranker.metadata.get('features'))
+        return ranker
+
+    def _learned_ranking(self, user_query: str) -> List[SearchResult]:
+        """
+        🎓 Estágio do ranker aprendido
+
+        Retorna o TOP 3 do modelo se a probabilidade do primeiro atingir
+        learned_ranker.confidence_threshold; senão [] (segue para a IA).
+        """
+        if self.learned_ranker is None:
+            return []
+
+        threshold = self.config.get('learned_ranker', {}).get('confidence_threshold', 0.6)
+        with self._timed_phase('learned_ranking'):
+            ranked = self.learned_ranker.rank(user_query, top_k=3)
+
+        if not ranked or ranked[0][1] < threshold:
+            if ranked:
+                logger.info("🎓 Ranker aprendido inseguro: %.3f < %s", ranked[0][1], threshold)
+            return []
+
+        logger.info("🎓 Ranker aprendido confiante: %s (%.3f) - SEM chamada IA", ranked[0][0]['name'], ranked[0][1])
+        return [SearchResult(
+            endpoint_id=endpoint.get('id', endpoint['name']),
+            source=endpoint['source'],
+            relevance_score=probability,
+            category=endpoint['category'],
+            name=endpoint['name'],
+            summary=endpoint['summary'],
+            keywords=endpoint['keywords'],
+            confidence=probability,
+            reasoning="ranker aprendido"
+        ) for endpoint, probability in ranked]
+
+    def _log_ai_decision(self, user_query: str, ai_candidates: List[SearchResult],
+                         textual_candidates: List[SearchResult], origin: str = "production"):
+        """
+        📝 Registra o vencedor da IA (rótulo do ranker aprendido e da calibração)
+        e a concordância com o TOP 1 textual
+
+        origin: production (só consultas abaixo do threshold escalam) ou collect
+        (calibrate_threshold.py --collect rotula o corpus inteiro)
+        """
+        if self._query_context().get("ai_ranking_failed"):
+            # Fallback textual não é decisão da IA: não rotula nem conta concordância
+            return
+
+        textual_score = textual_candidates[0].relevance_score
+        agreed = ai_candidates[0].endpoint_id == textual_candidates[0].endpoint_id
+        self.ranking_agreement.record(textual_score, agreed)
+        self.metric.ranking_agreement.inc(result='agree' if agreed else 'disagree')
+
+        if self.decision_log is None:
+            return
+        self.decision_log.append(
+            user_query, ai_candidates[0].endpoint_id,
+            [candidate.endpoint_id for candidate in ai_candidates],
+            textual=[candidate.endpoint_id for candidate in textual_candidates],
+            textual_score=round(textual_score, 4), ai_score=round(ai_candidates[0].relevance_score, 4),
+            origin=origin, provider=self.provider, index_version=self.index_version)
+
+    def get_ranking_agreement(self) -> Dict:
+        """🤝 Concordância textual × IA (total, janela recente e por faixa de score textual)"""
+        stats = self.ranking_agreement.get_stats()
+        stats["threshold"] = self.config.get('hybrid_strategy', {}).get('textual_confidence_threshold', 0.75)
+        return stats
+
+    def _compute_index_version(self, index: Dict) -> str:
+        """Calcula versão do índice (hash do conteúdo) para invalidar artefatos derivados"""
+        payload = json.dumps(index, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()[:16]
+
     def _phase1_ai_probabilistic_ranking(self, user_query: str, all_endpoints: List[Dict]) -> List[SearchResult]:
         """
         🤖 FASE 1: Ranking Probabilístico via IA (Uma única chamada)
@@ -145,24 +955,25 @@ class EvolutionAPIConstructor:
         Reduz de ~4-5 chamadas para 1 única chamada
         """
 
-        print(f"🤖 Fase 1: Enviando {len(all_endpoints)} endpoints para ranking via IA (chamada única)...")
+        logger.info("🤖 Fase 1: Enviando %s endpoints para ranking via IA (chamada única)...", len(all_endpoints))
 
-        # Preparar tabela para IA
-        endpoints_table = self._prepare_endpoints_table(all_endpoints)
+        # Prefixo estático (instruções + tabela) reaproveitado entre consultas
+        prompt_prefix = self._get_ranking_prompt_prefix(all_endpoints)
 
         # Faz uma única chamada para IA
-        ai_probabilities = self._ai_single_call_ranking(user_query, endpoints_table)
+        ai_probabilities = self._ai_single_call_ranking(user_query, prompt_prefix)
 
         if not ai_probabilities:
             # Fallback para estratégia textual se IA falhar
-            print("⚠️ IA falhou, usando fallback textual...")
+            logger.warning("⚠️ IA falhou, usando fallback textual...")
+            self._query_context()["ai_ranking_failed"] = True
             return self._fallback_textual_ranking(user_query, all_endpoints)
 
         # Converte probabilidades IA em SearchResults
         scored_endpoints = []
         min_threshold = self.config.get('scoring', {}).get('minimum_threshold', 0.2)
 
-        for prob_data in ai_probabilities:
+        for prob_data in self._normalize_ai_rankings(ai_probabilities, len(all_endpoints)):
             if prob_data['probability'] >= min_threshold:
                 original_endpoint = all_endpoints[prob_data['index']]
 
@@ -174,16 +985,17 @@ class EvolutionAPIConstructor:
                     name=original_endpoint['name'],
                     summary=original_endpoint['summary'],
                     keywords=original_endpoint['keywords'],
-                    confidence=prob_data.get('confidence', prob_data['probability'])
+                    confidence=prob_data.get('confidence', prob_data['probability']),
+                    reasoning=prob_data.get('reasoning')
                 ))
 
         # Ordena por probabilidade e retorna TOP 3
         sorted_results = sorted(scored_endpoints, key=lambda x: x.relevance_score, reverse=True)
 
-        if self.config.get('debug_mode', False):
-            print(f"🔍 Fase 1: {len(sorted_results)} candidatos encontrados via IA")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 Fase 1: %s candidatos encontrados via IA", len(sorted_results))
             for i, result in enumerate(sorted_results[:5]):
-                print(f"  {i+1}. {result.name} (Prob: {result.relevance_score:.3f})")
+                logger.debug("  %s. %s (Prob: %.3f)", i+1, result.name, result.relevance_score)
 
         return sorted_results[:3]  # TOP 3 para Fase 2
 
@@ -193,54 +1005,77 @@ class EvolutionAPIConstructor:
 
         Fluxo inteligente:
         1. SEMPRE executa busca textual otimizada (rápida, sem custo)
-        2. Se score >= threshold (75%): aceita resultado textual
-        3. Se score < threshold: chama IA para resolver dúvida
+        2. Se score >= hybrid_strategy.textual_confidence_threshold: aceita resultado textual
+        3. Se score < threshold: ranker aprendido (destilado da IA), se confiante
+        4. Senão: chama IA para resolver dúvida (vencedor registrado para treino)
+        5. IA só substitui o textual se score IA > score textual × ai_margin
+
+        threshold e ai_margin vêm do config (calibrate_threshold.py recalibra)
 
         Resultado: 80-90% consultas resolvidas sem IA, mantendo alta qualidade
         """
 
-        print(f"🧠 Estratégia Híbrida: Textual primeiro, IA seletiva...")
+        logger.info("🧠 Estratégia Híbrida: Textual primeiro, IA seletiva...")
 
         # FASE 1: Busca Textual Otimizada (sempre executada)
-        print(f"📊 Fase 1: Executando busca textual...")
-        textual_candidates = self._enhanced_textual_ranking(user_query, all_endpoints)
+        logger.info("📊 Fase 1: Executando busca textual...")
+        with self._timed_phase('textual_ranking'):
+            textual_candidates = self._enhanced_textual_ranking(user_query, all_endpoints)
 
         if not textual_candidates:
-            print("❌ Nenhum candidato textual encontrado")
+            logger.error("❌ Nenhum candidato textual encontrado")
             return []
 
         best_textual_score = textual_candidates[0].relevance_score
-        confidence_threshold = self.config.get('hybrid_strategy', {}).get('textual_confidence_threshold', 0.75)
+        hybrid_config = self.config.get('hybrid_strategy', {})
+        confidence_threshold = hybrid_config.get('textual_confidence_threshold', 0.75)
+        ai_margin = hybrid_config.get('ai_margin', 1.1)
 
-        print(f"🎯 Melhor score textual: {best_textual_score:.3f}")
-        print(f"📏 Threshold de confiança: {confidence_threshold}")
+        logger.info("🎯 Melhor score textual: %.3f", best_textual_score)
+        logger.info("📏 Threshold de confiança: %s", confidence_threshold)
 
         # DECISÃO INTELIGENTE: Aceita textual ou chama IA?
         if best_textual_score >= confidence_threshold:
-            print(f"✅ ALTA CONFIANÇA: Score {best_textual_score:.3f} >= {confidence_threshold}")
-            print(f"🚀 Resultado textual aceito - SEM chamada IA")
+            logger.info("✅ ALTA CONFIANÇA: Score %.3f >= %s", best_textual_score, confidence_threshold)
+            logger.info("🚀 Resultado textual aceito - SEM chamada IA")
+            self.metric.ranking_decisions.inc(stage='textual')
             return textual_candidates
 
         else:
-            print(f"⚠️ BAIXA CONFIANÇA: Score {best_textual_score:.3f} < {confidence_threshold}")
-            print(f"🤖 Chamando IA para resolver dúvida...")
+            logger.info("⚠️ BAIXA CONFIANÇA: Score %.3f < %s", best_textual_score, confidence_threshold)
+
+            learned_candidates = self._learned_ranking(user_query)
+            if learned_candidates:
+                self.metric.ranking_decisions.inc(stage='learned')
+                return learned_candidates
+
+            if not self._ai_stage_allowed('ranking'):
+                self.metric.ranking_decisions.inc(stage='textual')
+                return textual_candidates
+
+            logger.info("🤖 Chamando IA para resolver dúvida...")
 
             # FASE 2: IA apenas para casos duvidosos
-            ai_candidates = self._phase1_ai_probabilistic_ranking(user_query, all_endpoints)
+            with self._timed_phase('ai_ranking'):
+                ai_candidates = self._phase1_ai_probabilistic_ranking(user_query, all_endpoints)
 
             if ai_candidates and len(ai_candidates) > 0:
                 best_ai_score = ai_candidates[0].relevance_score
-                print(f"🤖 IA retornou score: {best_ai_score:.3f}")
+                logger.info("🤖 IA retornou score: %.3f", best_ai_score)
+                self._log_ai_decision(user_query, ai_candidates, textual_candidates)
 
                 # Compara IA vs Textual e escolhe o melhor
-                if best_ai_score > best_textual_score * 1.1:  # IA deve ser 10% melhor
-                    print(f"✅ IA é melhor: {best_ai_score:.3f} > {best_textual_score:.3f}")
+                if best_ai_score > best_textual_score * ai_margin:  # padrão: IA deve ser 10% melhor
+                    logger.info("✅ IA é melhor: %.3f > %.3f", best_ai_score, best_textual_score)
+                    self.metric.ranking_decisions.inc(stage='ai')
                     return ai_candidates
                 else:
-                    print(f"✅ Textual mantido: IA não foi significativamente melhor")
+                    logger.info("✅ Textual mantido: IA não foi significativamente melhor")
+                    self.metric.ranking_decisions.inc(stage='textual')
                     return textual_candidates
             else:
-                print(f"⚠️ IA falhou, mantendo resultado textual")
+                logger.warning("⚠️ IA falhou, mantendo resultado textual")
+                self.metric.ranking_decisions.inc(stage='textual')
                 return textual_candidates
 
     def _enhanced_textual_ranking(self, user_query: str, all_endpoints: List[Dict]) -> List[SearchResult]:
@@ -249,8 +1084,16 @@ class EvolutionAPIConstructor:
 
         Usa os keywords otimizados que já provaram funcionar perfeitamente
         """
-        query_lower = user_query.lower()
-        scored_endpoints = []
+        return self._batched_textual_ranking([user_query], all_endpoints)[0]
+
+    def _batched_textual_ranking(self, queries: List[str], all_endpoints: List[Dict]) -> List[List[SearchResult]]:
+        """
+        📊 Busca textual de várias consultas em uma única passada pelo índice
+
+        Textos, termos compilados e intenção de cada endpoint são lidos uma vez e
+        pontuados para todas as consultas (sub-intenções de uma consulta composta).
+        Retorna o TOP 3 de cada consulta, na ordem recebida.
+        """
         min_threshold = self.config.get('scoring', {}).get('minimum_threshold', 0.2)
 
         # Pesos configuráveis
@@ -259,45 +1102,92 @@ class EvolutionAPIConstructor:
         summary_weight = weights.get('summary_weight', 0.35)
         keywords_weight = weights.get('keywords_weight', 0.25)
 
+        expanded_factor = self.config.get('text_expansion', {}).get('match_factor', 0.9)
+
+        # 🧭 Intenção: filtra (mode=filter) ou pontua endpoints pelo verbo
+        intent_config = self.config.get('intent_classifier', {})
+        match_boost = intent_config.get('match_boost', 0.1)
+        mismatch_penalty = intent_config.get('mismatch_penalty', 0.3)
+
+        # 🔤 Termos canônicos e intenção de cada consulta (os dos endpoints já estão compilados)
+        prepared = []
+        for user_query in queries:
+            query_intent = self.intent_classifier.classify(user_query) if self.intent_classifier else None
+            prepared.append({
+                "query_lower": user_query.lower(),
+                "terms": self.text_index.terms(user_query) if self.text_index else frozenset(),
+                "intent": query_intent,
+                "filter": query_intent is not None and intent_config.get('mode', 'boost') == 'filter'
+            })
+        intents = [query["intent"] for query in prepared]
+        self._query_context()["intent"] = intents[0] if len(intents) == 1 else intents
+
+        scored_endpoints: List[List[SearchResult]] = [[] for _ in queries]
         for i, endpoint in enumerate(all_endpoints):
             # Textos para análise
             name_text = endpoint.get('name', '').lower()
             summary_text = endpoint.get('summary', '').lower()
             keywords_text = ' '.join(endpoint.get('keywords', [])).lower()
+            endpoint_terms = self._endpoint_terms.get(id(endpoint))
+            endpoint_intents = self._endpoint_intents.get(id(endpoint), frozenset())
+
+            for query, results in zip(prepared, scored_endpoints):
+                intent_relation = IntentClassifier.relation(query["intent"], endpoint_intents)
+                if query["filter"] and intent_relation == 'mismatch':
+                    continue
+
+                # Score por componente (como a versão original, mas otimizada)
+                name_score = self._calculate_text_similarity(query["query_lower"], name_text)
+                summary_score = self._calculate_text_similarity(query["query_lower"], summary_text)
+                keywords_score = self._calculate_text_similarity(query["query_lower"], keywords_text)
+
+                # Match por stem/sinônimo (ex.: "mandar áudio" × "Enviar Áudio"), um pouco abaixo do literal
+                query_terms = query["terms"]
+                if endpoint_terms and query_terms:
+                    name_score = max(name_score,
+                                     TextIndex.coverage(query_terms, endpoint_terms['name']) * expanded_factor)
+                    summary_score = max(summary_score,
+                                        TextIndex.coverage(query_terms, endpoint_terms['summary']) * expanded_factor)
+                    keywords_score = max(keywords_score,
+                                         TextIndex.coverage(query_terms, endpoint_terms['keywords']) * expanded_factor)
+
+                # Score ponderado final
+                weighted_score = (
+                    name_score * name_weight +
+                    summary_score * summary_weight +
+                    keywords_score * keywords_weight
+                )
 
-            # Score por componente (como a versão original, mas otimizada)
-            name_score = self._calculate_text_similarity(query_lower, name_text)
-            summary_score = self._calculate_text_similarity(query_lower, summary_text)
-            keywords_score = self._calculate_text_similarity(query_lower, keywords_text)
-
-            # Score ponderado final
-            weighted_score = (
-                name_score * name_weight +
-                summary_score * summary_weight +
-                keywords_score * keywords_weight
-            )
-
-            if weighted_score >= min_threshold:
-                scored_endpoints.append(SearchResult(
-                    endpoint_id=endpoint.get('id', f"endpoint_{i}"),
-                    source=endpoint['source'],
-                    relevance_score=weighted_score,
-                    category=endpoint['category'],
-                    name=endpoint['name'],
-                    summary=endpoint['summary'],
-                    keywords=endpoint['keywords'],
-                    confidence=weighted_score
-                ))
-
-        # Ordena e retorna TOP 3
-        sorted_results = sorted(scored_endpoints, key=lambda x: x.relevance_score, reverse=True)
-
-        if self.config.get('debug_mode', False):
-            print(f"🔍 Busca textual: {len(sorted_results)} candidatos encontrados")
-            for i, result in enumerate(sorted_results[:3]):
-                print(f"  {i+1}. {result.name} (Score: {result.relevance_score:.3f})")
-
-        return sorted_results[:3]
+                # Mesmo verbo sobe, verbo conflitante desce ("Consultar" × "Atualizar Filtros")
+                if intent_relation == 'match':
+                    weighted_score = min(1.0, weighted_score * (1 + match_boost))
+                elif intent_relation == 'mismatch':
+                    weighted_score *= 1 - mismatch_penalty
+
+                if weighted_score >= min_threshold:
+                    results.append(SearchResult(
+                        endpoint_id=endpoint.get('id', f"endpoint_{i}"),
+                        source=endpoint['source'],
+                        relevance_score=weighted_score,
+                        category=endpoint['category'],
+                        name=endpoint['name'],
+                        summary=endpoint['summary'],
+                        keywords=endpoint['keywords'],
+                        confidence=weighted_score
+                    ))
+
+        # Ordena e retorna TOP 3 de cada consulta
+        rankings = []
+        for user_query, results in zip(queries, scored_endpoints):
+            sorted_results = sorted(results, key=lambda x: x.relevance_score, reverse=True)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔍 Busca textual '%s': %s candidatos encontrados", user_query, len(sorted_results))
+                for i, result in enumerate(sorted_results[:3]):
+                    logger.debug("  %s. %s (Score: %.3f)", i+1, result.name, result.relevance_score)
+
+            rankings.append(sorted_results[:3])
+        return rankings
 
     def _prepare_endpoints_table(self, all_endpoints: List[Dict]) -> str:
         """
@@ -321,89 +1211,550 @@ class EvolutionAPIConstructor:
 
         return '\n'.join(lines)
 
-    def _ai_single_call_ranking(self, user_query: str, endpoints_table: str) -> List[Dict]:
+    def _get_ranking_prompt_prefix(self, all_endpoints: List[Dict]) -> str:
         """
-        🤖 Faz uma única chamada para IA para rankear todos os endpoints
+        🧊 Prefixo estático do ranking IA: instruções + tabela de endpoints
 
-        Retorna lista com probabilidades para cada endpoint
+        Construído uma única vez por versão do índice e enviado sempre no início
+        do prompt, permitindo que o provider reaproveite o cache de prompt.
+        A consulta do usuário é anexada por último (_build_ranking_query_prompt).
         """
+        ranking_config = self._get_ranking_config()
+        cache_key = (self.index_version, len(all_endpoints), ranking_config['output_mode'],
+                     ranking_config['top_k'], ranking_config['include_reasoning'])
+        prefix = self._ranking_prompt_cache.get(cache_key)
+        self.metric.cache_requests.inc(cache="ranking_prompt", result="miss" if prefix is None else "hit")
+
+        if prefix is None:
+            endpoints_table = self._prepare_endpoints_table(all_endpoints)
+
+            if ranking_config['output_mode'] == 'compact':
+                top_k = str(ranking_config['top_k'])
+                reasoning_field = (',\n            "reasoning": "Breve explicação do match do 1º colocado"'
+                                   if ranking_config['include_reasoning'] else '')
+                output_prompt = (self.RANKING_OUTPUT_COMPACT
+                                 .replace('{top_k}', top_k)
+                                 .replace('{reasoning_field}', reasoning_field))
+                task_prompt = self.RANKING_TASK_PROMPT_COMPACT.replace('{top_k}', top_k)
+            else:
+                output_prompt = self.RANKING_OUTPUT_FULL
+                task_prompt = self.RANKING_TASK_PROMPT
+
+            prefix = (
+                f"{self.RANKING_SYSTEM_PROMPT}"
+                f"{output_prompt}"
+                f"{self.RANKING_CRITERIA_PROMPT}\n"
+                f"        TABELA DE ENDPOINTS:\n"
+                f"{endpoints_table}\n"
+                f"{task_prompt}"
+            )
+            # Mantém apenas a versão atual do índice
+            self._ranking_prompt_cache = {cache_key: prefix}
 
-        provider = self.config['current_provider']
+            logger.debug("🧊 Prefixo de ranking construído: %s chars (índice %s)", len(prefix), self.index_version)
 
-        if provider == 'anthropic':
-            return self._ai_single_call_anthropic(user_query, endpoints_table)
-        elif provider == 'openai':
-            return self._ai_single_call_openai(user_query, endpoints_table)
-        else:
-            print(f"❌ Provider não suportado: {provider}")
-            return []
+        return prefix
+
+    def _build_ranking_query_prompt(self, user_query: str) -> str:
+        """Parte variável do prompt de ranking (sempre após o prefixo estático)"""
+        return f'CONSULTA DO USUÁRIO: "{user_query}"'
 
-    def _ai_single_call_anthropic(self, user_query: str, endpoints_table: str) -> List[Dict]:
+    def _get_ranking_config(self) -> Dict:
         """
-        Chamada única para Anthropic Claude
+        ⚙️ Configuração do contrato de saída do ranking IA
+
+        - compact: apenas TOP-K (índice + probabilidade), reasoning opcional do 1º
+        - full: todos os endpoints com id/index/probability/reasoning (legado)
         """
+        ranking_config = {
+            "output_mode": "compact",
+            "top_k": 5,
+            "include_reasoning": True,
+            "max_tokens": None,
+            "structured_output": True,
+            "streaming": True,
+            "early_exit": {}
+        }
+        ranking_config.update(self.config.get('ai_ranking', {}))
+
+        if ranking_config['max_tokens'] is None:
+            ranking_config['max_tokens'] = 400 if ranking_config['output_mode'] == 'compact' else 8000
+
+        return ranking_config
+
+    def _ranking_output_schema(self) -> Dict:
+        """JSON Schema do contrato compacto (usado em structured outputs / tool use)"""
+        ranking_config = self._get_ranking_config()
+
+        schema = {
+            "type": "object",
+            "properties": {
+                "rankings": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "index": {"type": "integer"},
+                            "probability": {"type": "number"}
+                        },
+                        "required": ["index", "probability"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["rankings"],
+            "additionalProperties": False
+        }
 
-        system_prompt = """
-        Você é um especialista em APIs REST e especificamente na Evolution API para WhatsApp.
+        if ranking_config['include_reasoning']:
+            schema["properties"]["reasoning"] = {"type": "string"}
+            schema["required"].append("reasoning")
 
-        TAREFA: Analisar uma consulta do usuário e calcular a probabilidade de cada endpoint da tabela corresponder à intenção da consulta.
+        return schema
 
-        RETORNE um JSON com esta estrutura EXATA:
-        {
-            "rankings": [
-                {
-                    "id": "endpoint_id",
-                    "index": 0,
-                    "probability": 0.95,
-                    "reasoning": "Breve explicação do match"
+    def _openai_response_format(self, model: str) -> Optional[Dict]:
+        """
+        Seleciona modo de saída estruturada suportado pelo modelo OpenAI
+
+        - gpt-4o / gpt-4.1 e posteriores: json_schema estrito
+        - demais modelos de chat: json_object
+        - o1-*: sem suporte a response_format
+        """
+        ranking_config = self._get_ranking_config()
+        if ranking_config['output_mode'] != 'compact' or not ranking_config['structured_output']:
+            return None
+
+        if model.startswith('o1-'):
+            return None
+
+        if model.startswith(('gpt-4o', 'gpt-4.1', 'gpt-5', 'o3', 'o4')):
+            return {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "endpoint_ranking",
+                    "strict": True,
+                    "schema": self._ranking_output_schema()
                 }
-            ]
+            }
+
+        return {"type": "json_object"}
+
+    def _normalize_ai_rankings(self, rankings: List[Dict], total_endpoints: int) -> List[Dict]:
+        """
+        🧹 Normaliza rankings da IA (compacto ou completo)
+
+        Descarta índices inválidos/duplicados e limita probabilidades a [0, 1]
+        """
+        normalized = []
+        seen_indexes = set()
+
+        for entry in rankings or []:
+            try:
+                index = int(entry['index'])
+                probability = float(entry['probability'])
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            if index < 0 or index >= total_endpoints or index in seen_indexes:
+                continue
+
+            seen_indexes.add(index)
+            item = dict(entry)
+            item['index'] = index
+            item['probability'] = max(0.0, min(1.0, probability))
+            normalized.append(item)
+
+        normalized.sort(key=lambda x: x['probability'], reverse=True)
+        return normalized
+
+    def _extract_rankings(self, result: Dict) -> List[Dict]:
+        """Extrai lista de rankings, propagando o reasoning global (modo compacto) ao 1º colocado"""
+        rankings = result.get('rankings', []) if isinstance(result, dict) else []
+        reasoning = result.get('reasoning') if isinstance(result, dict) else None
+
+        if rankings and reasoning:
+            best = max(rankings, key=lambda x: x.get('probability', 0) if isinstance(x, dict) else 0)
+            if isinstance(best, dict) and not best.get('reasoning'):
+                best['reasoning'] = reasoning
+
+        return rankings
+
+    @staticmethod
+    def _empty_usage() -> Dict:
+        return {
+            "calls": 0,
+            "input_tokens": 0,
+            "cached_input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "uncached_input_tokens": 0,
+            "output_tokens": 0,
+            "cost_usd": 0.0,
+            "estimated_calls": 0
         }
 
-        CRITÉRIOS DE PROBABILIDADE:
-        - 0.90-1.00: Match perfeito - endpoint faz exatamente o que o usuário quer
-        - 0.70-0.89: Match muito bom - endpoint resolve o problema com algumas adaptações
-        - 0.40-0.69: Match moderado - endpoint está relacionado mas não é ideal
-        - 0.20-0.39: Match fraco - endpoint tem alguma relação distante
-        - 0.00-0.19: Sem match - endpoint não tem relação com a consulta
+    @staticmethod
+    def _estimate_tokens(text: str, model: Optional[str] = None) -> int:
+        """Tokens de um texto: tiktoken se instalado, senão ~4 caracteres por token"""
+        if tiktoken is not None:
+            try:
+                encoding = tiktoken.encoding_for_model(model or '')
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            return len(encoding.encode(text))
+        return (len(text) + 3) // 4
+
+    def _estimate_cost(self, model: str, total_input: int, cached: int, creation: int, output: int) -> float:
+        """
+        💲 Custo estimado (USD) pela tabela cost_control.pricing_per_million_tokens
 
-        IMPORTANTE:
-        - Seja rigoroso: a maioria dos endpoints devem ter probabilidades baixas (< 0.3)
-        - Apenas endpoints realmente relevantes devem ter probabilidades altas
-        - Use seu conhecimento da Evolution API para validar se faz sentido
-        - Considere sinônimos e variações linguísticas (criar/adicionar, buscar/listar, etc.)
-        - Analise a intenção do usuário (configurar vs consultar vs deletar)
+        Tokens de cache (leitura/escrita) usam preço próprio quando configurado,
+        senão o preço de input. Modelo sem preço configurado = custo 0.
         """
+        pricing = self.config.get('cost_control', {}).get('pricing_per_million_tokens', {}).get(model)
+        if not pricing:
+            return 0.0
 
-        user_prompt = f"""
-        CONSULTA DO USUÁRIO: "{user_query}"
+        input_price = pricing.get('input', 0.0)
+        regular_input = total_input - cached - creation
+        cost = (regular_input * input_price +
+                cached * pricing.get('cached_input', input_price) +
+                creation * pricing.get('cache_write', input_price) +
+                output * pricing.get('output', 0.0))
+        return cost / 1_000_000
 
-        TABELA DE ENDPOINTS:
-        {endpoints_table}
+    def _record_token_usage(self, provider: str, usage: Any, model: Optional[str] = None,
+                            estimated: bool = False):
+        """
+        🧾 Acumula uso de tokens reportado pelo provider (global, por modelo e por consulta)
 
-        Analise cada endpoint da tabela e calcule a probabilidade dele corresponder à consulta.
-        Retorne o JSON com probabilidades para TODOS os endpoints listados.
-        Use o índice da linha (começando em 0) como "index".
+        - Anthropic: input_tokens (não cacheado) + cache_read/cache_creation
+        - OpenAI: prompt_tokens (total) com prompt_tokens_details.cached_tokens
+        - estimated: usage estimado localmente (stream fechado antes do provider reportar)
+        """
+        if usage is None:
+            return
+
+        if provider == 'anthropic':
+            uncached = getattr(usage, 'input_tokens', 0) or 0
+            cached = getattr(usage, 'cache_read_input_tokens', 0) or 0
+            creation = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+            total_input = uncached + cached + creation
+            output = getattr(usage, 'output_tokens', 0) or 0
+        else:
+            total_input = getattr(usage, 'prompt_tokens', 0) or 0
+            details = getattr(usage, 'prompt_tokens_details', None)
+            cached = (getattr(details, 'cached_tokens', 0) or 0) if details else 0
+            creation = 0
+            output = getattr(usage, 'completion_tokens', 0) or 0
+
+        model = model or self.config.get(provider, {}).get('model', provider)
+        cost = self._estimate_cost(model, total_input, cached, creation, output)
+        delta = {
+            "calls": 1,
+            "input_tokens": total_input,
+            "cached_input_tokens": cached,
+            "cache_creation_input_tokens": creation,
+            "uncached_input_tokens": total_input - cached,
+            "output_tokens": output,
+            "cost_usd": cost,
+            "estimated_calls": int(estimated)
+        }
+
+        query_usage = self._query_context()["usage"]
+        with self._usage_lock:
+            model_usage = self.usage_by_model.setdefault(model, self._empty_usage())
+            for key, value in delta.items():
+                self.token_usage[key] += value
+                model_usage[key] += value
+                query_usage[key] += value
+
+        self.usage_budget.record(total_input + output, cost)
+        self.metric.ai_cost.inc(cost, provider=provider, model=model)
+
+        self.metric.ai_tokens.inc(total_input - cached, provider=provider, type="uncached_input")
+        self.metric.ai_tokens.inc(cached, provider=provider, type="cached_input")
+        self.metric.ai_tokens.inc(creation, provider=provider, type="cache_creation_input")
+        self.metric.ai_tokens.inc(output, provider=provider, type="output")
+
+        logger.debug("🧾 Tokens%s: entrada=%s (cache=%s), saída=%s, custo=$%.6f",
+                     " (estimado)" if estimated else "", total_input, cached, output, cost)
+
+    def get_token_usage(self) -> Dict:
+        """Retorna contabilidade agregada de tokens e custo, por modelo, com estado do orçamento"""
+        with self._usage_lock:
+            usage = dict(self.token_usage)
+            by_model = {model: dict(model_usage) for model, model_usage in self.usage_by_model.items()}
+
+        total_input = usage["input_tokens"]
+        usage["cache_hit_ratio"] = usage["cached_input_tokens"] / total_input if total_input else 0.0
+        usage["by_model"] = by_model
+        usage["budget"] = self.usage_budget.get_stats()
+        return usage
+
+    def _ai_single_call_ranking(self, user_query: str, prompt_prefix: str) -> List[Dict]:
         """
+        🤖 Faz uma única chamada para IA para rankear todos os endpoints
+
+        Retorna lista com probabilidades para cada endpoint
+        """
+
+        provider = self.provider
+        primary = {"provider": provider, "model": self.config[provider]['model']}
+        self._count_ai_call('ranking')
+        parent_span = self.tracer.current_span()
+        query_context = self._query_context()
+
+        def call(target: Dict) -> List[Dict]:
+            # Thread do pool adota o estado da consulta (tokens/custo por consulta)
+            self._query_local.context = query_context
+            breaker = self._get_circuit_breaker(target['provider'])
+            start = time.monotonic()
+            try:
+                # Executa no pool de chamadas IA: span com pai explícito
+                with self.tracer.span(f"_ai_single_call_{target['provider']}", parent=parent_span,
+                                      kind=SPAN_KIND_CLIENT, **{"ai.provider": target['provider'],
+                                                                "ai.model": target['model']}):
+                    if target['provider'] == 'anthropic':
+                        result = self._ai_single_call_anthropic(user_query, prompt_prefix, target['model'])
+                    else:
+                        result = self._ai_single_call_openai(user_query, prompt_prefix, target['model'])
+            except CassetteMissError:
+                # Cassete incompleto é erro de configuração: não abre o circuito
+                breaker.release()
+                self.metric.ai_call_duration.observe(time.monotonic() - start, provider=target['provider'],
+                                                     model=target['model'], stage="ranking", outcome="error")
+                raise
+            except Exception:
+                breaker.record_failure()
+                self.metric.ai_call_duration.observe(time.monotonic() - start, provider=target['provider'],
+                                                     model=target['model'], stage="ranking", outcome="error")
+                raise
+            breaker.record_success(time.monotonic() - start)
+            self.metric.ai_call_duration.observe(time.monotonic() - start, provider=target['provider'],
+                                                 model=target['model'], stage="ranking", outcome="ok")
+            return result
 
         try:
-            response = self.ai_client.messages.create(
-                model=self.config['anthropic']['model'],
-                max_tokens=8000,  # Aumenta para tabela grande
-                temperature=self.config['anthropic']['temperature_phase1'],
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_prompt}]
+            return self.ai_executor.run(
+                call, primary, self._get_hedge_target(primary),
+                deadline_seconds=self._get_call_timeout('ranking')
             )
+        except CassetteMissError as e:
+            self.metric.errors.inc(stage="ranking")
+            self._warn_cassette_miss(e)
+            return []
+        except Exception as e:
+            self.metric.errors.inc(stage="ranking")
+            logger.error("❌ Erro na análise %s: %s", provider, e)
+            return []
+
+    def _get_hedge_target(self, primary: Dict) -> Optional[Dict]:
+        """
+        🎯 Alvo da requisição hedged
+
+        - same: repete no mesmo provider/modelo
+        - alternate: provider/modelo alternativo configurado (precisa de api_key)
+        """
+        hedging = self.config.get('ai_resilience', {}).get('hedging', {})
+        if not hedging.get('enabled', False):
+            return None
+
+        if hedging.get('target', 'same') != 'alternate':
+            return dict(primary)
+
+        alternate = hedging.get('alternate', {})
+        provider = alternate.get('provider')
+        if provider not in ('anthropic', 'openai') or not self.config.get(provider, {}).get('api_key'):
+            return None
+
+        # Não faz hedge contra provider com circuito aberto/em sondagem
+        if not self._get_circuit_breaker(provider).is_closed():
+            return None
+
+        return {"provider": provider, "model": alternate.get('model') or self.config[provider]['model']}
+
+    def get_hedging_stats(self) -> Dict:
+        """Métricas de hedging (taxa de hedge, vitórias e p95 por provider:modelo)"""
+        return self.ai_executor.get_stats()
+
+    def _is_decisive_ranking(self, rankings: List[Dict]) -> bool:
+        """
+        🏁 Verifica se o ranking parcial já tem um vencedor decisivo
+
+        Vencedor decisivo: probabilidade >= decisive_probability e margem sobre o
+        2º colocado >= decisive_margin (o contrato compacto vem em ordem decrescente).
+        """
+        early_exit = self._get_ranking_config().get('early_exit', {})
+        if not early_exit.get('enabled', True):
+            return False
+
+        probabilities = []
+        for entry in rankings:
+            try:
+                probabilities.append(float(entry.get('probability', 0)))
+            except (TypeError, ValueError):
+                continue
+
+        if len(probabilities) < 2:
+            return False
+
+        probabilities.sort(reverse=True)
+        return (probabilities[0] >= early_exit.get('decisive_probability', 0.85) and
+                probabilities[0] - probabilities[1] >= early_exit.get('decisive_margin', 0.3))
+
+    def _consume_ranking_stream(self, text_chunks: Iterator[str]) -> Dict:
+        """
+        🌊 Consome fragmentos do stream, parseando rankings incrementalmente
+
+        Interrompe o stream (fechando o gerador) assim que surge um vencedor
+        decisivo; caso contrário lê até o fim e usa o JSON completo.
+        """
+        parser = IncrementalRankingParser()
+        allow_early_exit = self._get_ranking_config()['output_mode'] == 'compact'
+        self.stream_stats["streams"] += 1
+
+        try:
+            for chunk in text_chunks:
+                if not parser.feed(chunk):
+                    continue
+
+                if allow_early_exit and self._is_decisive_ranking(parser.rankings):
+                    self.stream_stats["early_exits"] += 1
+                    logger.debug("🏁 Early exit: vencedor decisivo após %s rankings", len(parser.rankings))
+                    return {"rankings": list(parser.rankings), "early_exit": True}
+        finally:
+            # Fecha o stream HTTP (no-op se já consumido por completo)
+            close = getattr(text_chunks, 'close', None)
+            if close:
+                close()
+
+        result = parser.result()
+        result["early_exit"] = False
+        return result
+
+    def _stream_anthropic_chunks(self, client: Any, request: Dict) -> Iterator[str]:
+        """Gera fragmentos de texto/JSON do stream Anthropic (texto ou input de tool use)"""
+        usage = {"input_tokens": 0, "output_tokens": 0,
+                 "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+        received = []
+        completed = False
+
+        try:
+            with client.messages.stream(**request) as stream:
+                for event in stream:
+                    event_type = getattr(event, 'type', None)
+
+                    if event_type == 'message_start':
+                        start_usage = getattr(event.message, 'usage', None)
+                        for key in usage:
+                            usage[key] = getattr(start_usage, key, 0) or 0
+
+                    elif event_type == 'message_delta':
+                        delta_usage = getattr(event, 'usage', None)
+                        usage["output_tokens"] = getattr(delta_usage, 'output_tokens', 0) or usage["output_tokens"]
+                        completed = True
+
+                    elif event_type == 'content_block_delta':
+                        delta = event.delta
+                        if getattr(delta, 'type', None) == 'input_json_delta':
+                            received.append(delta.partial_json)
+                            yield delta.partial_json
+                        elif getattr(delta, 'type', None) == 'text_delta':
+                            received.append(delta.text)
+                            yield delta.text
+        finally:
+            # Early exit fecha antes do message_delta final: saída estimada pelo texto recebido
+            if not completed:
+                usage["output_tokens"] = max(usage["output_tokens"],
+                                             self._estimate_tokens("".join(received), request.get('model')))
+            self._record_token_usage('anthropic', SimpleNamespace(**usage), request.get('model'),
+                                     estimated=not completed)
+
+    def _stream_openai_chunks(self, client: Any, request: Dict) -> Iterator[str]:
+        """
+        Gera fragmentos de texto do stream OpenAI (usage chega no último chunk)
+
+        Fechado antes do fim (early exit), o usage nunca chega: entrada (prompt)
+        e saída (texto recebido) são estimadas para custo e orçamento não zerarem.
+        """
+        stream = client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
+        )
+        reported = False
+        received = []
+
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    self._record_token_usage('openai', chunk.usage, request.get('model'))
+                    reported = True
+                if chunk.choices and chunk.choices[0].delta.content:
+                    received.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        finally:
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+            if not reported:
+                model = request.get('model')
+                prompt = "\n".join(str(message.get('content', '')) for message in request.get('messages', []))
+                self._record_token_usage('openai', SimpleNamespace(
+                    prompt_tokens=self._estimate_tokens(prompt, model),
+                    completion_tokens=self._estimate_tokens("".join(received), model)
+                ), model, estimated=True)
+
+    def _ai_single_call_anthropic(self, user_query: str, prompt_prefix: str,
+                                  model: Optional[str] = None) -> List[Dict]:
+        """
+        Chamada única para Anthropic Claude
+
+        Prefixo estático no system (com cache_control), consulta na mensagem do usuário.
+        Erros são propagados para o executor (deadline/hedging).
+        """
+
+        ranking_config = self._get_ranking_config()
+        client = self._get_ai_client('anthropic')
 
+        system_block = {"type": "text", "text": prompt_prefix}
+        if self.config.get('prompt_caching', {}).get('enabled', True):
+            system_block["cache_control"] = {"type": "ephemeral"}
+
+        request = {
+            "model": model or self.config['anthropic']['model'],
+            "max_tokens": ranking_config['max_tokens'],
+            "temperature": self.config['anthropic']['temperature_phase1'],
+            "system": [system_block],
+            "messages": [{"role": "user", "content": self._build_ranking_query_prompt(user_query)}],
+            "timeout": self._get_call_timeout('ranking')
+        }
+
+        # Modo compacto: saída estruturada via tool use forçado (input validado pelo schema)
+        use_tool = ranking_config['output_mode'] == 'compact' and ranking_config['structured_output']
+        if use_tool:
+            request["tools"] = [{
+                "name": self.RANKING_TOOL_NAME,
+                "description": "Registra os endpoints mais prováveis para a consulta do usuário",
+                "input_schema": self._ranking_output_schema()
+            }]
+            request["tool_choice"] = {"type": "tool", "name": self.RANKING_TOOL_NAME}
+
+        if ranking_config['streaming']:
+            result = self._consume_ranking_stream(self._stream_anthropic_chunks(client, request))
+            return self._extract_rankings(result)
+
+        response = client.messages.create(**request)
+        self._record_token_usage('anthropic', getattr(response, 'usage', None), request['model'])
+
+        tool_inputs = [block.input for block in response.content
+                       if getattr(block, 'type', None) == 'tool_use']
+        if use_tool and tool_inputs:
+            result = tool_inputs[0]
+        else:
             ai_response = response.content[0].text
             cleaned_response = self._clean_ai_response(ai_response)
             result = json.loads(cleaned_response)
 
-            return result.get('rankings', [])
-
-        except Exception as e:
-            print(f"❌ Erro na análise Anthropic: {e}")
-            return []
+        return self._extract_rankings(result)
 
     def _clean_ai_response(self, ai_response: str) -> str:
         """
@@ -426,90 +1777,63 @@ class EvolutionAPIConstructor:
         # Se não há blocos de código, retorna original
         return ai_response.strip()
 
-    def _ai_single_call_openai(self, user_query: str, endpoints_table: str) -> List[Dict]:
+    def _ai_single_call_openai(self, user_query: str, prompt_prefix: str,
+                               model: Optional[str] = None) -> List[Dict]:
         """
         Chamada única para OpenAI
+
+        Prefixo estático abre o prompt (cache automático de prefixo), consulta vai por último.
+        Erros são propagados para o executor (deadline/hedging).
         """
 
         # Detecta se modelo suporta system messages
-        model = self.config['openai']['model']
+        model = model or self.config['openai']['model']
         supports_system = not model.startswith('o1-')  # o1 models não suportam system
+        client = self._get_ai_client('openai')
 
-        system_prompt = """
-        Você é um especialista em APIs REST e especificamente na Evolution API para WhatsApp.
+        query_prompt = self._build_ranking_query_prompt(user_query)
 
-        TAREFA: Analisar uma consulta do usuário e calcular a probabilidade de cada endpoint da tabela corresponder à intenção da consulta.
-
-        RETORNE um JSON com esta estrutura EXATA:
-        {
-            "rankings": [
-                {
-                    "id": "endpoint_id",
-                    "index": 0,
-                    "probability": 0.95,
-                    "reasoning": "Breve explicação do match"
-                }
+        # Prepara mensagens baseado no suporte a system
+        if supports_system:
+            messages = [
+                {"role": "system", "content": prompt_prefix},
+                {"role": "user", "content": query_prompt}
+            ]
+        else:
+            # Para modelos o1, combina prefixo e consulta (prefixo sempre primeiro)
+            combined_prompt = f"{prompt_prefix}\n\n{query_prompt}"
+            messages = [
+                {"role": "user", "content": combined_prompt}
             ]
-        }
-
-        CRITÉRIOS DE PROBABILIDADE:
-        - 0.90-1.00: Match perfeito - endpoint faz exatamente o que o usuário quer
-        - 0.70-0.89: Match muito bom - endpoint resolve o problema com algumas adaptações
-        - 0.40-0.69: Match moderado - endpoint está relacionado mas não é ideal
-        - 0.20-0.39: Match fraco - endpoint tem alguma relação distante
-        - 0.00-0.19: Sem match - endpoint não tem relação com a consulta
-
-        IMPORTANTE:
-        - Seja rigoroso: a maioria dos endpoints devem ter probabilidades baixas (< 0.3)
-        - Apenas endpoints realmente relevantes devem ter probabilidades altas
-        - Use seu conhecimento da Evolution API para validar se faz sentido
-        - Considere sinônimos e variações linguísticas (criar/adicionar, buscar/listar, etc.)
-        - Analise a intenção do usuário (configurar vs consultar vs deletar)
-        """
-
-        user_prompt = f"""
-        CONSULTA DO USUÁRIO: "{user_query}"
 
-        TABELA DE ENDPOINTS:
-        {endpoints_table}
+        ranking_config = self._get_ranking_config()
+        request = {
+            "model": model,
+            "max_tokens": ranking_config['max_tokens'],
+            "temperature": self.config['openai']['temperature_phase1'],
+            "messages": messages,
+            "timeout": self._get_call_timeout('ranking')
+        }
 
-        Analise cada endpoint da tabela e calcule a probabilidade dele corresponder à consulta.
-        Retorne o JSON com probabilidades para TODOS os endpoints listados.
-        Use o índice da linha (começando em 0) como "index".
-        """
+        # Saída estruturada (json_schema / json_object) quando o modelo suporta
+        response_format = self._openai_response_format(model)
+        if response_format:
+            request["response_format"] = response_format
 
-        try:
-            # Prepara mensagens baseado no suporte a system
-            if supports_system:
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-            else:
-                # Para modelos o1, combina system e user em uma única mensagem
-                combined_prompt = f"{system_prompt}\n\n{user_prompt}"
-                messages = [
-                    {"role": "user", "content": combined_prompt}
-                ]
-
-            response = self.ai_client.chat.completions.create(
-                model=model,
-                max_tokens=8000,
-                temperature=self.config['openai']['temperature_phase1'],
-                messages=messages
-            )
+        if ranking_config['streaming']:
+            result = self._consume_ranking_stream(self._stream_openai_chunks(client, request))
+            return self._extract_rankings(result)
 
-            ai_response = response.choices[0].message.content
+        response = client.chat.completions.create(**request)
+        self._record_token_usage('openai', getattr(response, 'usage', None), request['model'])
 
-            # Limpa resposta de possíveis blocos de código markdown
-            cleaned_response = self._clean_ai_response(ai_response)
-            result = json.loads(cleaned_response)
+        ai_response = response.choices[0].message.content
 
-            return result.get('rankings', [])
+        # Limpa resposta de possíveis blocos de código markdown
+        cleaned_response = self._clean_ai_response(ai_response)
+        result = json.loads(cleaned_response)
 
-        except Exception as e:
-            print(f"❌ Erro na análise OpenAI: {e}")
-            return []
+        return self._extract_rankings(result)
 
     def _ai_calculate_probabilities(self, user_query: str, endpoints_for_ai: List[Dict]) -> List[Dict]:
         """
@@ -525,7 +1849,7 @@ class EvolutionAPIConstructor:
         all_probabilities = []
 
         for chunk_idx, chunk in enumerate(chunks):
-            print(f"🔄 Processando chunk {chunk_idx + 1}/{len(chunks)} ({len(chunk)} endpoints)...")
+            logger.info("🔄 Processando chunk %s/%s (%s endpoints)...", chunk_idx + 1, len(chunks), len(chunk))
 
             chunk_probabilities = self._ai_process_endpoints_chunk(user_query, chunk)
             if chunk_probabilities:
@@ -596,7 +1920,7 @@ class EvolutionAPIConstructor:
             response = self.client.messages.create(
                 model=self.config['anthropic']['model'],
                 max_tokens=4000,  # Aumenta para lidar com mais endpoints
-                temperature=self.config[self.config['current_provider']]['temperature_phase23'],  # Baixa para ser mais consistente
+                temperature=self.config[self.provider]['temperature_phase23'],  # Baixa para ser mais consistente
                 system=system_prompt,
                 messages=[{"role": "user", "content": user_prompt}]
             )
@@ -608,7 +1932,7 @@ class EvolutionAPIConstructor:
             return result.get('rankings', [])
 
         except Exception as e:
-            print(f"❌ Erro na análise de probabilidades IA: {e}")
+            logger.error("❌ Erro na análise de probabilidades IA: %s", e)
             return []
 
     def _fallback_textual_ranking(self, user_query: str, all_endpoints: List[Dict]) -> List[SearchResult]:
@@ -770,7 +2094,7 @@ class EvolutionAPIConstructor:
             start_pos = content.find(start_marker)
 
             if start_pos == -1:
-                print(f"⚠️ Tag {endpoint_tag} não encontrada em {file_path}")
+                logger.warning("⚠️ Tag %s não encontrada em %s", endpoint_tag, file_path)
                 return None
 
             # Busca fim da seção (próximo delimitador)
@@ -788,13 +2112,13 @@ class EvolutionAPIConstructor:
             # Extrai seção literal
             section_content = content[start_pos:end_pos].strip()
 
-            if self.config.get('debug_mode', False):
-                print(f"✅ Seção {endpoint_tag} extraída: {len(section_content)} chars")
+            logger.debug("✅ Seção %s extraída: %s chars", endpoint_tag, len(section_content))
 
             return section_content
 
         except Exception as e:
-            print(f"❌ Erro ao extrair seção {endpoint_tag} de {file_path}: {e}")
+            self.metric.errors.inc(stage="enrichment")
+            logger.error("❌ Erro ao extrair seção %s de %s: %s", endpoint_tag, file_path, e)
             return None
 
     def _extract_other_sections_from_complement(self, file_path: str) -> str:
@@ -836,7 +2160,8 @@ class EvolutionAPIConstructor:
             return "\n\n".join(relevant_sections) if relevant_sections else ""
 
         except Exception as e:
-            print(f"❌ Erro ao extrair outras seções de {file_path}: {e}")
+            self.metric.errors.inc(stage="enrichment")
+            logger.error("❌ Erro ao extrair outras seções de %s: %s", file_path, e)
             return ""
 
     def _detect_context_needs(self, endpoint_info: Dict) -> List[str]:
@@ -873,15 +2198,18 @@ class EvolutionAPIConstructor:
         context_file = self.context_files[context_type]
 
         try:
-            # Carrega arquivo de contexto completo
-            with open(context_file, 'r', encoding='utf-8') as f:
-                context_content = f.read()
+            # Passagens relevantes ao endpoint; sem índice, o arquivo de contexto completo
+            endpoint_text = f"{endpoint_info.get('name', '')} {endpoint_info.get('category', '')} {endpoint_info.get('summary', '')}"
+            context_content = self._retrieve_passages(context_type, endpoint_text) if self.passage_index else ""
+            if not context_content:
+                with open(context_file, 'r', encoding='utf-8') as f:
+                    context_content = f.read()
 
             # IA extrai informações relevantes ao endpoint
             return self._ai_extract_relevant_context(context_content, context_type, endpoint_info)
 
         except Exception as e:
-            print(f"❌ Erro ao carregar contexto {context_type}: {e}")
+            logger.error("❌ Erro ao carregar contexto %s: %s", context_type, e)
             return None
 
     def _ai_extract_relevant_context(self, context_content: str, context_type: str, endpoint_info: Dict) -> Dict:
@@ -936,19 +2264,20 @@ class EvolutionAPIConstructor:
         - Resumo: {endpoint_info.get('summary', '')}
 
         CONTEÚDO DO ARQUIVO DE CONTEXTO:
-        {context_content[:8000]}  # Limita para não exceder tokens
+        {context_content[:8000]}
 
         Extraia informações relevantes do contexto que ajudem a entender melhor este endpoint específico.
         """
 
         try:
-            provider = self.config['current_provider']
+            provider = self.provider
 
             if provider == 'anthropic':
                 response = self.ai_client.messages.create(
                     model=self.config['anthropic']['model'],
                     max_tokens=2000,
-                    temperature=self.config[self.config['current_provider']]['temperature_phase23'],
+                    temperature=self.config[self.provider]['temperature_phase23'],
+                    timeout=self._get_call_timeout('observations'),
                     system=system_prompt,
                     messages=[{"role": "user", "content": user_prompt}]
                 )
@@ -970,7 +2299,8 @@ class EvolutionAPIConstructor:
                 response = self.ai_client.chat.completions.create(
                     model=model,
                     max_tokens=2000,
-                    temperature=self.config[self.config['current_provider']]['temperature_phase23'],
+                    temperature=self.config[self.provider]['temperature_phase23'],
+                    timeout=self._get_call_timeout('observations'),
                     messages=messages
                 )
                 ai_response = response.choices[0].message.content
@@ -982,7 +2312,7 @@ class EvolutionAPIConstructor:
             return json.loads(cleaned_response)
 
         except Exception as e:
-            print(f"❌ Erro na extração de contexto IA: {e}")
+            logger.error("❌ Erro na extração de contexto IA: %s", e)
             return {
                 "source_file": f"{context_type}.md",
                 "practical_scenarios": [],
@@ -991,14 +2321,20 @@ class EvolutionAPIConstructor:
                 "related_endpoints": []
             }
 
-    def _enrich_response_with_context(self, base_response: Dict, endpoint_name: str, user_query: str) -> Dict:
+    def _enrich_response_with_context(self, base_response: Dict, endpoint_name: str, user_query: str,
+                                      live_ai: bool = True) -> Dict:
         """
         🌶️ NOVA FASE 3: Enriquecimento Contextual com Extração Literal
 
         Nova estratégia:
         1. Detecta arquivos complementares por nome exato do endpoint
         2. Extrai seções literais dos arquivos
-        3. IA gera observações contextuais
+        3. Observações pré-geradas do endpoint (observations.py); IA por consulta
+           só se ausentes/desatualizadas (observations.live_fallback)
+        4. Refinamento para a consulta em segundo plano (observations.refine_async)
+
+        live_ai=False (consulta composta) anexa só observações pré-geradas: sem
+        fallback nem refinamento via IA
         """
 
         # Detecta quais arquivos de complemento devem ser consultados
@@ -1008,18 +2344,64 @@ class EvolutionAPIConstructor:
             # Nenhum enriquecimento necessário
             return base_response
 
-        print(f"🔍 Complementos detectados: {', '.join(complement_files)}")
+        logger.info("🔍 Complementos detectados: %s", ', '.join(complement_files))
+
+        complement_content, other_sections_content = self._collect_complements(endpoint_name)
+
+        # Adiciona conteúdo literal ao response
+        base_response.update(complement_content)
+
+        if complement_content or other_sections_content:
+            observations_config = self.config.get('observations', {})
+            version = docs_version(complement_content, other_sections_content)
+            observations = self.observation_store.get(endpoint_name, version)
+            refine_async = live_ai and observations_config.get('refine_async', False)
+
+            # Chamadas por consulta usam passagens escolhidas também pela consulta
+            if live_ai and (observations is None or refine_async):
+                if self.passage_index is not None:
+                    other_sections_content = self._collect_complements(endpoint_name, user_query)[1]
+
+            if observations is not None:
+                self.metric.observations.inc(source="precomputed")
+                if refine_async:
+                    base_response["observacao_refinada_id"] = self._schedule_refinement(
+                        user_query, endpoint_name, complement_content, other_sections_content)
+            elif live_ai and observations_config.get('live_fallback', True):
+                # Gera observações contextuais via IA (endpoint ainda sem observação pré-gerada)
+                with self._timed_phase('observations'), \
+                        self.tracer.span('_generate_contextual_observations', kind=SPAN_KIND_CLIENT,
+                                         **{"ai.provider": self.provider}):
+                    observations = self._generate_contextual_observations(
+                        user_query, endpoint_name, complement_content, other_sections_content
+                    )
+                self.metric.observations.inc(source="live")
+            else:
+                self.metric.observations.inc(source="missing")
+
+            if observations:
+                base_response["observacao"] = observations
+
+            logger.info("✨ Resposta enriquecida com %s complementos", len(complement_content))
 
-        # Extrai conteúdo literal dos complementos
+        return base_response
+
+    def _collect_complements(self, endpoint_name: str, user_query: Optional[str] = None) -> Tuple[Dict, Dict]:
+        """
+        Seção literal do endpoint (complemento-*) e, de cada arquivo complementar,
+        as passagens mais relevantes ao endpoint (e à consulta, se informada);
+        sem índice de passagens, todas as demais seções
+        """
         complement_content = {}
         other_sections_content = {}
+        query_text = self._endpoint_context_query(endpoint_name, user_query) if self.passage_index else None
 
-        for file_type in complement_files:
+        for file_type in self._get_complement_files(endpoint_name):
             # Obter tag do endpoint para este arquivo
             endpoint_tag = self.endpoint_tag_mapping.get(endpoint_name)
 
             if not endpoint_tag:
-                print(f"⚠️ Tag não encontrada para endpoint: {endpoint_name}")
+                logger.warning("⚠️ Tag não encontrada para endpoint: %s", endpoint_name)
                 continue
 
             file_path = self.context_files[file_type]
@@ -1033,31 +2415,56 @@ class EvolutionAPIConstructor:
                     complement_content["complemento-webhook"] = literal_section
 
             # Extrai outras seções relevantes
-            other_sections = self._extract_other_sections_from_complement(file_path)
+            if self.passage_index is not None:
+                other_sections = self._retrieve_passages(file_type, query_text)
+            else:
+                other_sections = self._extract_other_sections_from_complement(file_path)
             if other_sections:
                 other_sections_content[file_type] = other_sections
 
-        # Adiciona conteúdo literal ao response
-        base_response.update(complement_content)
+        return complement_content, other_sections_content
 
-        # Gera observações contextuais via IA (se há complementos)
-        if complement_content or other_sections_content:
-            observations = self._generate_contextual_observations(
-                user_query, endpoint_name, complement_content, other_sections_content
-            )
-            if observations:
-                base_response["observacao"] = observations
-
-            print(f"✨ Resposta enriquecida com {len(complement_content)} complementos")
+    def _schedule_refinement(self, user_query: str, endpoint_name: str,
+                             complement_content: Dict, other_sections_content: Dict) -> str:
+        """
+        🧵 Observações específicas da consulta geradas em segundo plano
 
-        return base_response
+        A resposta sai com a observação pré-gerada; a versão refinada é obtida
+        depois via get_refined_observation(query_id).
+        """
+        observations_config = self.config.get('observations', {})
+        query_id = self._query_context()["query_id"]
+
+        with self._refinements_lock:
+            if self._refine_pool is None:
+                self._refine_pool = ThreadPoolExecutor(max_workers=observations_config.get('refine_workers', 2),
+                                                       thread_name_prefix="observations")
+            self._refinements[query_id] = self._refine_pool.submit(
+                self._generate_contextual_observations,
+                user_query, endpoint_name, complement_content, other_sections_content)
+            while len(self._refinements) > observations_config.get('refine_max_pending', 256):
+                self._refinements.popitem(last=False)
+
+        return query_id
+
+    def get_refined_observation(self, query_id: str, timeout: Optional[float] = 0) -> Optional[str]:
+        """Observação refinada da consulta (None se inexistente, com falha ou ainda em andamento)"""
+        with self._refinements_lock:
+            future = self._refinements.get(query_id)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
 
-    def _generate_contextual_observations(self, user_query: str, endpoint_name: str,
+    def _generate_contextual_observations(self, user_query: Optional[str], endpoint_name: str,
                                         complement_content: Dict, other_sections_content: Dict) -> Optional[str]:
         """
         🤖 NOVA FUNÇÃO: Gera observações contextuais usando IA
 
         Analisa o conteúdo literal extraído e outras seções para gerar observações práticas.
+        Sem user_query gera a observação geral do endpoint (pré-geração offline).
         """
         if not complement_content and not other_sections_content:
             return None
@@ -1094,8 +2501,13 @@ class EvolutionAPIConstructor:
         - Máximo 200 palavras
         """
 
+        if user_query:
+            query_line = f'CONSULTA ORIGINAL DO USUÁRIO: "{user_query}"'
+        else:
+            query_line = "CONSULTA ORIGINAL DO USUÁRIO: nenhuma (observações gerais do endpoint, válidas para qualquer consulta)"
+
         user_prompt = f"""
-        CONSULTA ORIGINAL DO USUÁRIO: "{user_query}"
+        {query_line}
 
         ENDPOINT ENCONTRADO: "{endpoint_name}"
 
@@ -1108,18 +2520,25 @@ class EvolutionAPIConstructor:
         Analise essas informações e gere observações práticas para contextualizar a resposta ao usuário.
         """
 
-        try:
-            provider = self.config['current_provider']
+        if not self._ai_stage_allowed('observations'):
+            return None
 
+        provider = self.provider
+        breaker = self._get_circuit_breaker(provider)
+        start = time.monotonic()
+        self._count_ai_call('observations')
+
+        try:
             if provider == 'anthropic':
                 response = self.ai_client.messages.create(
                     model=self.config['anthropic']['model'],
                     max_tokens=1000,
-                    temperature=self.config[self.config['current_provider']]['temperature_phase23'],
+                    temperature=self.config[self.provider]['temperature_phase23'],
+                    timeout=self._get_call_timeout('observations'),
                     system=system_prompt,
                     messages=[{"role": "user", "content": user_prompt}]
                 )
-                return response.content[0].text.strip()
+                observations = response.content[0].text.strip()
 
             elif provider == 'openai':
                 model = self.config['openai']['model']
@@ -1137,19 +2556,120 @@ class EvolutionAPIConstructor:
                 response = self.ai_client.chat.completions.create(
                     model=model,
                     max_tokens=1000,
-                    temperature=self.config[self.config['current_provider']]['temperature_phase23'],
+                    temperature=self.config[self.provider]['temperature_phase23'],
+                    timeout=self._get_call_timeout('observations'),
                     messages=messages
                 )
-                return response.choices[0].message.content.strip()
+                observations = response.choices[0].message.content.strip()
 
             else:
                 raise ValueError(f"Provider não suportado: {provider}")
 
+            breaker.record_success(time.monotonic() - start)
+            self.metric.ai_call_duration.observe(time.monotonic() - start, provider=provider,
+                                                 model=self.config[provider]['model'],
+                                                 stage="observations", outcome="ok")
+            self._record_token_usage(provider, getattr(response, 'usage', None))
+            return observations
+
+        except CassetteMissError as e:
+            breaker.release()
+            self.metric.errors.inc(stage="observations")
+            self._warn_cassette_miss(e)
+            return None
+
         except Exception as e:
-            print(f"❌ Erro na geração de observações: {e}")
+            breaker.record_failure()
+            self.metric.ai_call_duration.observe(time.monotonic() - start, provider=provider,
+                                                 model=self.config[provider]['model'],
+                                                 stage="observations", outcome="error")
+            self.metric.errors.inc(stage="observations")
+            logger.error("❌ Erro na geração de observações: %s", e)
             return None
 
-    def search_api(self, user_query: str) -> Dict:
+    def search_api(self, user_query: str, include_trace: Optional[bool] = None,
+                   profile: Optional[bool] = None) -> Dict:
+        """
+        🎯 Ponto de entrada da busca, com tracing, custo e profiling opcionais
+
+        Com tracing.enabled (ou include_trace=True) a consulta gera um trace com
+        spans por fase, exportado conforme tracing.exporter. Com include_trace
+        (padrão: tracing.attach_to_response) os spans são anexados em "trace".
+        Com cost_control.attach_to_response o uso de tokens/custo da consulta
+        é anexado em "usage". Com profile=True (ou sorteada por
+        profiling.sample_rate) a consulta é perfilada em arquivo por query_id;
+        o caminho vai em "profile" quando profile=True.
+        """
+        tracing = self.config.get('tracing', {})
+        if include_trace is None:
+            include_trace = tracing.get('attach_to_response', False)
+
+        query_id = uuid.uuid4().hex[:16]
+        profile_info = None
+
+        if self.profiler.should_profile(profile):
+            with self.profiler.profile(query_id) as profile_info:
+                result, root, spans = self._run_search(user_query, query_id, include_trace)
+            if profile_info["path"]:
+                logger.info("🔬 Perfil da consulta %s salvo em %s", query_id, profile_info["path"])
+        else:
+            result, root, spans = self._run_search(user_query, query_id, include_trace)
+
+        attach_usage = self.config.get('cost_control', {}).get('attach_to_response', False)
+        attach_profile = profile and profile_info is not None
+        if not (attach_usage or include_trace or attach_profile):
+            return result
+
+        # Cópia rasa: não altera a resposta armazenada no cache
+        result = dict(result)
+        if attach_usage:
+            result["usage"] = dict(self._query_context()["usage"])
+        if include_trace:
+            result["trace"] = {
+                "trace_id": root.trace_id,
+                "duration_ms": round(root.duration_ms, 3),
+                "spans": [span.to_dict() for span in spans]
+            }
+        if attach_profile:
+            result["profile"] = dict(profile_info)
+        return result
+
+    def _run_search(self, user_query: str, query_id: str, include_trace: bool):
+        """Executa a busca (com trace raiz se tracing ativo) e registra métricas"""
+        root, spans = None, []
+        if self.tracer.enabled or include_trace:
+            try:
+                with self.tracer.start_trace('search_api', query=user_query, query_id=query_id) as root:
+                    result = self._execute_search(user_query, query_id)
+                    root.set_attribute('cache.hit', self._query_context().get('cache_hit', False))
+                    root.set_attribute('error', 'error' in result)
+            finally:
+                # Trace com exceção também é exportado (e liberado de Tracer._finished)
+                if root is not None:
+                    spans = self.tracer.end_trace(root)
+            elapsed = root.duration_ms / 1000.0
+        else:
+            start = time.perf_counter()
+            result = self._execute_search(user_query, query_id)
+            elapsed = time.perf_counter() - start
+
+        self._observe_query(result, elapsed)
+        return result, root, spans
+
+    def _observe_query(self, result: Dict, elapsed: float):
+        """📈 Registra resultado e latência da consulta nas métricas"""
+        if "error" in result:
+            outcome = "error"
+        elif self._query_context().get("cache_hit"):
+            outcome = "cached"
+        elif result.get("degraded"):
+            outcome = "degraded"
+        else:
+            outcome = "ok"
+        self.metric.queries.inc(outcome=outcome)
+        self.metric.query_duration.observe(elapsed)
+
+    def _execute_search(self, user_query: str, query_id: Optional[str] = None) -> Dict:
         """
         🎯 FLUXO COMPLETO: Scoring + IA Validation + Contextual Enhancement
 
@@ -1161,35 +2681,55 @@ class EvolutionAPIConstructor:
         5. Retorna resultado estruturado + contexto enriquecido
         """
 
-        print(f"🔍 Buscando: '{user_query}'")
+        logger.info("🔍 Buscando: '%s'", user_query)
+
+        query_context = self._new_query_context(user_query, query_id)
 
         # Cache check
         if self._is_cached(user_query):
-            print("💾 Resultado encontrado no cache")
+            logger.info("💾 Resultado encontrado no cache")
+            query_context["cache_hit"] = True
             return self.cache[user_query]
 
+        # 🔡 Erros de digitação corrigidos antes do ranking (a consulta original segue como chave do cache)
+        search_query = self._correct_query(user_query)
+
         # NOVA ESTRATÉGIA HÍBRIDA: Textual primeiro, IA apenas se necessário
         all_endpoints = (self.consolidated_index.get('endpoints', []) +
                         self.consolidated_index.get('webhooks', []))
 
-        top_candidates = self._hybrid_ranking_strategy(user_query, all_endpoints)
+        # 🧩 Consulta composta ("criar instância e configurar webhook"): um endpoint por sub-intenção
+        sub_queries = self._split_query(search_query)
+        if len(sub_queries) > 1:
+            return self._execute_multi_intent_search(user_query, search_query, sub_queries, all_endpoints)
+
+        with self.tracer.span('_hybrid_ranking_strategy') as span:
+            top_candidates = self._hybrid_ranking_strategy(search_query, all_endpoints)
+            if span:
+                span.set_attribute('ranking.candidates', len(top_candidates))
+                span.set_attribute('ranking.ai_used', bool(self._query_context()["ai_calls"].get('ranking')))
 
         if not top_candidates:
             return {"error": "Nenhum endpoint encontrado para a consulta", "query": user_query}
 
-        print(f"📊 Fase 1: TOP 3 candidatos selecionados por IA")
+        # 🏷️ Ranking por id (avaliação offline: MRR / precision@k)
+        query_context["ranking"] = [candidate.endpoint_id for candidate in top_candidates]
+
+        logger.info("📊 Fase 1: TOP 3 candidatos selecionados por IA")
         for i, candidate in enumerate(top_candidates[:3], 1):
-            print(f"  {i}º: {candidate.name} (Prob: {candidate.relevance_score:.3f})")
+            logger.info("  %sº: %s (Prob: %.3f)", i, candidate.name, candidate.relevance_score)
 
         # FASE 2: IA Validation com Strategy de Múltiplos Candidatos
         first_candidate = top_candidates[0]
         second_candidate = top_candidates[1] if len(top_candidates) > 1 else None
         third_candidate = top_candidates[2] if len(top_candidates) > 2 else None
 
-        print(f"🤖 Fase 2: Validando candidatos em ordem de probabilidade...")
+        logger.info("🤖 Fase 2: Validando candidatos em ordem de probabilidade...")
 
         # Testa primeiro candidato (mais provável)
-        first_result = self._extract_detailed_info_with_ai_validation(user_query, first_candidate)
+        with self._timed_phase('materialization'), \
+                self.tracer.span('_extract_detailed_info_with_ai_validation', candidate=first_candidate.name):
+            first_result = self._extract_detailed_info_with_ai_validation(search_query, first_candidate)
 
         # Strategy: testa múltiplos candidatos se primeiro não for convincente
         candidate_results = []
@@ -1208,10 +2748,12 @@ class EvolutionAPIConstructor:
 
             # Se score IA for muito menor que probabilidade IA, testa outros
             if first_ai_score < first_probability * 0.8:  # 20% de degradação
-                print(f"⚠️  Score final ({first_ai_score:.3f}) < Probabilidade IA ({first_probability:.3f})")
-                print(f"🔄 Testando segundo candidato...")
+                logger.info("⚠️  Score final (%.3f) < Probabilidade IA (%.3f)", first_ai_score, first_probability)
+                logger.info("🔄 Testando segundo candidato...")
 
-                second_result = self._extract_detailed_info_with_ai_validation(user_query, second_candidate)
+                with self._timed_phase('materialization'), \
+                        self.tracer.span('_extract_detailed_info_with_ai_validation', candidate=second_candidate.name):
+                    second_result = self._extract_detailed_info_with_ai_validation(search_query, second_candidate)
                 if second_result:
                     candidate_results.append({
                         'candidate': second_candidate,
@@ -1224,8 +2766,10 @@ class EvolutionAPIConstructor:
         if third_candidate and len(candidate_results) == 2:
             best_score = max(r['ai_score'] for r in candidate_results)
             if best_score < 0.7:  # Se nenhum dos dois primeiros for convincente
-                print(f"🔄 Testando terceiro candidato...")
-                third_result = self._extract_detailed_info_with_ai_validation(user_query, third_candidate)
+                logger.info("🔄 Testando terceiro candidato...")
+                with self._timed_phase('materialization'), \
+                        self.tracer.span('_extract_detailed_info_with_ai_validation', candidate=third_candidate.name):
+                    third_result = self._extract_detailed_info_with_ai_validation(search_query, third_candidate)
                 if third_result:
                     candidate_results.append({
                         'candidate': third_candidate,
@@ -1240,7 +2784,7 @@ class EvolutionAPIConstructor:
             final_result = best_result['result']
             selected_candidate = best_result['candidate']
 
-            print(f"✅ Melhor candidato: {selected_candidate.name} (Score final: {best_result['ai_score']:.3f})")
+            logger.info("✅ Melhor candidato: %s (Score final: %.3f)", selected_candidate.name, best_result['ai_score'])
         else:
             final_result = None
             selected_candidate = first_candidate
@@ -1248,17 +2792,131 @@ class EvolutionAPIConstructor:
         if not final_result:
             return {"error": "Nenhum resultado detalhado encontrado", "query": user_query}
 
+        query_context["selected_endpoint"] = selected_candidate.endpoint_id
+
         # 🌶️ FASE 3: Enriquecimento Contextual (NOVA IMPLEMENTAÇÃO)
-        print(f"🌶️ Fase 3: Analisando necessidade de enriquecimento contextual...")
+        logger.info("🌶️ Fase 3: Analisando necessidade de enriquecimento contextual...")
 
-        # Aplica enriquecimento contextual com nova lógica
-        enriched_result = self._enrich_response_with_context(final_result, selected_candidate.name, user_query)
+        enriched_result = self._enrich_selected_result(final_result, selected_candidate, search_query)
+
+        self._attach_corrections(enriched_result, user_query, search_query)
+
+        # 🔌 Modo degradado: não cacheia resposta degradada para servir versão completa após recuperação
+        if self._attach_degraded(enriched_result):
+            return enriched_result
 
         # Cache do resultado enriquecido
         self._cache_result(user_query, enriched_result)
 
         return enriched_result
 
+    def _enrich_selected_result(self, result: Dict, candidate: SearchResult, search_query: str,
+                                live_ai: bool = True) -> Dict:
+        """🌶️ Enriquecimento contextual + trechos do description.md do endpoint selecionado"""
+        # Aplica enriquecimento contextual com nova lógica
+        with self._timed_phase('enrichment'), \
+                self.tracer.span('_enrich_response_with_context', endpoint=candidate.name):
+            enriched_result = self._enrich_response_with_context(result, candidate.name, search_query, live_ai)
+
+        # 🔎 Trechos pontuais do description.md da origem selecionada (ex.: "qual campo define o delay")
+        if self.config.get('description_passages', {}).get('attach_to_response', True):
+            enriched_result["trechos"] = self.search_passages(search_query, source=candidate.source)
+
+        return enriched_result
+
+    def _attach_degraded(self, result: Dict) -> bool:
+        """🔌 Marca a resposta como degradada se algum estágio IA foi pulado (circuit breaker/orçamento)"""
+        query_context = self._query_context()
+        if not query_context["degraded_stages"]:
+            return False
+        result["degraded"] = True
+        result["degraded_stages"] = list(query_context["degraded_stages"])
+        result["degraded_reasons"] = dict(query_context["degraded_reasons"])
+        return True
+
+    def _attach_corrections(self, result: Dict, user_query: str, search_query: str):
+        """🔡 Informa na resposta as correções ortográficas aplicadas à consulta"""
+        corrections = self._query_context()["corrections"]
+        if corrections:
+            result["correcao_ortografica"] = {
+                "consulta_original": user_query,
+                "consulta_corrigida": search_query,
+                "termos": dict(corrections)
+            }
+
+    def _split_query(self, search_query: str) -> List[str]:
+        """Sub-intenções da consulta (lista com a própria consulta se não for composta)"""
+        multi_config = self.config.get('multi_intent', {})
+        if self.intent_classifier is None or not multi_config.get('enabled', True):
+            return [search_query]
+        return self.intent_classifier.split(search_query, max_parts=multi_config.get('max_parts', 3))
+
+    def _execute_multi_intent_search(self, user_query: str, search_query: str, sub_queries: List[str],
+                                     all_endpoints: List[Dict]) -> Dict:
+        """
+        🧩 Consulta com várias intenções, sem chamadas IA
+
+        Ranking textual em lote (uma passada pelo índice para todas as
+        sub-consultas); sub-consulta sem confiança textual tenta o ranker
+        aprendido. O melhor endpoint materializável de cada parte recebe
+        documentação, observações pré-geradas (nunca geradas na hora) e
+        trechos, e entra na resposta composta, uma entrada por intenção, na
+        ordem da consulta.
+        """
+        query_context = self._query_context()
+        query_context["sub_queries"] = list(sub_queries)
+        logger.info("🧩 Consulta composta em %s intenções: %s", len(sub_queries), sub_queries)
+
+        confidence_threshold = self.config.get('hybrid_strategy', {}).get('textual_confidence_threshold', 0.75)
+        with self.tracer.span('_batched_textual_ranking', sub_queries=len(sub_queries)), \
+                self._timed_phase('textual_ranking'):
+            rankings = self._batched_textual_ranking(sub_queries, all_endpoints)
+
+        intents = []
+        for sub_query, candidates in zip(sub_queries, rankings):
+            stage = 'textual'
+            if not candidates or candidates[0].relevance_score < confidence_threshold:
+                learned_candidates = self._learned_ranking(sub_query)
+                if learned_candidates:
+                    candidates, stage = learned_candidates, 'learned'
+            if not candidates:
+                intents.append({"consulta": sub_query, "error": "Nenhum endpoint encontrado para a consulta"})
+                continue
+            self.metric.ranking_decisions.inc(stage=stage)
+
+            # Materialização local: segue para o próximo candidato se o endpoint não estiver no map
+            for candidate in candidates:
+                with self._timed_phase('materialization'), \
+                        self.tracer.span('_extract_detailed_info_with_ai_validation', candidate=candidate.name):
+                    result = self._extract_detailed_info_with_ai_validation(sub_query, candidate)
+                if result:
+                    query_context["ranking"].append(candidate.endpoint_id)
+                    intents.append({"consulta": sub_query,
+                                    **self._enrich_selected_result(result, candidate, sub_query,
+                                                                   live_ai=False)})
+                    break
+            else:
+                intents.append({"consulta": sub_query, "error": "Nenhum resultado detalhado encontrado"})
+
+        found = [intent for intent in intents if "error" not in intent]
+        if not found:
+            return {"error": "Nenhum endpoint encontrado para a consulta", "query": user_query}
+        query_context["selected_endpoint"] = query_context["ranking"][0]
+
+        composite_result = {
+            "consulta_composta": True,
+            "query": user_query,
+            "intencoes": intents,
+            "final_score": min(intent["final_score"] for intent in found)
+        }
+        self._attach_corrections(composite_result, user_query, search_query)
+
+        if self._attach_degraded(composite_result):
+            return composite_result
+
+        self._cache_result(user_query, composite_result)
+        return composite_result
+
     def _initial_keyword_filter(self, query: str, endpoints: List[Dict]) -> List[Dict]:
         """Filtragem inicial por keywords e texto"""
         query_words = set(query.lower().split())
@@ -1285,8 +2943,15 @@ class EvolutionAPIConstructor:
         """
 
         try:
+            # Localização compilada e validada: fatia direta do description.md em memória
+            catalog_entry = self.catalog.lookup(candidate.source, candidate.name, candidate.category) \
+                if self.catalog else None
+            if catalog_entry:
+                return self._ai_structure_final_response(
+                    user_query, candidate, catalog_entry, self.catalog.read(candidate.source, catalog_entry))
+
             # Carrega map específico
-            map_path = f"endpoints-and-hooks/{candidate.source}/map.json"
+            map_path = self._resource_path("endpoints-and-hooks", candidate.source, "map.json")
             with open(map_path, 'r', encoding='utf-8') as f:
                 map_data = json.load(f)
 
@@ -1294,11 +2959,11 @@ class EvolutionAPIConstructor:
             location_info = self._find_endpoint_in_map(candidate.name, map_data)
 
             if not location_info:
-                print(f"❌ Localização não encontrada no map para {candidate.name}")
+                logger.error("❌ Localização não encontrada no map para %s", candidate.name)
                 return None
 
             # Extrai conteúdo específico do description.md
-            description_path = f"endpoints-and-hooks/{candidate.source}/description.md"
+            description_path = self._resource_path("endpoints-and-hooks", candidate.source, "description.md")
 
             # Determina linha final baseado na disponibilidade de response
             start_line = location_info['request']['startLine']
@@ -1314,14 +2979,15 @@ class EvolutionAPIConstructor:
             )
 
             if not detailed_content:
-                print(f"❌ Conteúdo não extraído para {candidate.name}")
+                logger.error("❌ Conteúdo não extraído para %s", candidate.name)
                 return None
 
             # IA processa e estrutura a informação final
             return self._ai_structure_final_response(user_query, candidate, location_info, detailed_content)
 
         except Exception as e:
-            print(f"❌ Erro na extração detalhada: {e}")
+            self.metric.errors.inc(stage="materialization")
+            logger.error("❌ Erro na extração detalhada: %s", e)
             return None
 
     def _find_endpoint_in_map(self, endpoint_name: str, map_data: Dict) -> Optional[Dict]:
@@ -1354,7 +3020,7 @@ class EvolutionAPIConstructor:
             return ''.join(lines[context_start:context_end])
 
         except Exception as e:
-            print(f"❌ Erro ao extrair conteúdo: {e}")
+            logger.error("❌ Erro ao extrair conteúdo: %s", e)
             return ""
 
     def _ai_structure_final_response(self, user_query: str, candidate: SearchResult,
@@ -1379,7 +3045,7 @@ class EvolutionAPIConstructor:
             "documentacao": content.strip(),  # CONTEÚDO LITERAL do description.md
             "final_score": candidate.relevance_score,
             "confidence": candidate.confidence,
-            "match_reasoning": f"Endpoint '{candidate.name}' selecionado por correspondência com '{user_query}'"
+            "match_reasoning": candidate.reasoning or f"Endpoint '{candidate.name}' selecionado por correspondência com '{user_query}'"
         }
 
         return basic_info
@@ -1393,8 +3059,11 @@ class EvolutionAPIConstructor:
             cache_time = self.cache_timestamps.get(query)
             if cache_time:
                 ttl = timedelta(seconds=self.config.get('cache_ttl_seconds', 3600))
-                return datetime.now() - cache_time < ttl
+                if datetime.now() - cache_time < ttl:
+                    self.metric.cache_requests.inc(cache="response", result="hit")
+                    return True
 
+        self.metric.cache_requests.inc(cache="response", result="miss")
         return False
 
     def _cache_result(self, query: str, result: Dict):
@@ -1404,7 +3073,8 @@ class EvolutionAPIConstructor:
             self.cache_timestamps[query] = datetime.now()
 
 
-def optimized_constructor(user_query: str, config_path: str = "endpoints-and-hooks/config/ai_config.json") -> Dict:
+def optimized_constructor(user_query: str, config_path: Optional[str] = None,
+                          resource_root: Optional[str] = None) -> Dict:
     """
     🎯 FUNÇÃO PRINCIPAL DO CONSTRUCTOR
 
@@ -1412,23 +3082,24 @@ def optimized_constructor(user_query: str, config_path: str = "endpoints-and-hoo
 
     Args:
         user_query: Consulta do usuário (ex: "como criar instância", "webhook de monitoramento")
-        config_path: Caminho para arquivo de configuração
+        config_path: Caminho para arquivo de configuração (relativo à raiz dos recursos)
+        resource_root: Raiz dos recursos (padrão: $EVOLUTION_CONSTRUCTOR_ROOT, config ou pacote)
 
     Returns:
         Dict: JSON estruturado com informações completas do endpoint
     """
 
-    print("🚀 Evolution API Constructor iniciado")
-    print(f"📝 Query: '{user_query}'")
+    logger.info("🚀 Evolution API Constructor iniciado")
+    logger.info("📝 Query: '%s'", user_query)
 
     try:
         # Inicializa o agente
-        agent = EvolutionAPIConstructor(config_path)
+        agent = EvolutionAPIConstructor(config_path, resource_root)
 
         # Executa busca híbrida
         result = agent.search_api(user_query)
 
-        print("✅ Busca concluída com sucesso")
+        logger.info("✅ Busca concluída com sucesso")
         return result
 
     except Exception as e:
@@ -1437,7 +3108,7 @@ def optimized_constructor(user_query: str, config_path: str = "endpoints-and-hoo
             "query": user_query,
             "timestamp": datetime.now().isoformat()
         }
-        print(f"❌ {error_result['error']}")
+        logger.error("❌ %s", error_result['error'])
         return error_result
 
 
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+🚨 Error Handling do Constructor
+Resiliência das chamadas IA: deadlines por chamada, requisições hedged, circuit breaker
+e orçamento de tokens/custo
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional
+
+
+class LatencyTracker:
+    """Janela deslizante de latências (segundos) para cálculo de percentis"""
+
+    def __init__(self, window_size: int = 200):
+        self.samples = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Percentil por nearest-rank; None se não há amostras"""
+        with self._lock:
+            ordered = sorted(self.samples)
+
+        if not ordered:
+            return None
+
+        rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[rank]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+class HedgedExecutor:
+    """
+    ⏱️ Executor de chamadas IA com deadline e hedging
+
+    Fluxo:
+    1. Dispara a chamada primária com deadline total (deadline_seconds)
+    2. Se ela não responder até o p95 histórico do alvo, dispara uma segunda
+       chamada (mesmo provider/modelo ou alternativo) e usa a que chegar primeiro
+    3. Controle de custo: hedging só com amostras suficientes, atraso mínimo
+       e taxa máxima de hedge (max_hedge_rate) sobre o total de chamadas
+
+    A chamada perdedora não é cancelada (SDKs síncronos); seu resultado é descartado.
+    """
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.hedging = config.get('hedging', {})
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.stats = {
+            "calls": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "timeouts": 0,
+            "errors": 0
+        }
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=config.get('max_workers', 8),
+            thread_name_prefix="ai-call"
+        )
+
+    @staticmethod
+    def target_key(target: Dict) -> str:
+        return f"{target['provider']}:{target['model']}"
+
+    def _tracker(self, target: Dict) -> LatencyTracker:
+        key = self.target_key(target)
+        with self._lock:
+            if key not in self.latency:
+                self.latency[key] = LatencyTracker(self.hedging.get('window_size', 200))
+            return self.latency[key]
+
+    def hedge_delay(self, target: Dict) -> Optional[float]:
+        """Atraso até disparar o hedge (percentil configurado), ou None se não permitido"""
+        if not self.hedging.get('enabled', False):
+            return None
+
+        tracker = self._tracker(target)
+        if len(tracker) < self.hedging.get('min_samples', 20):
+            return None
+
+        with self._lock:
+            calls = max(1, self.stats["calls"])
+            if self.stats["hedged"] / calls >= self.hedging.get('max_hedge_rate', 0.1):
+                return None
+
+        delay = tracker.percentile(self.hedging.get('percentile', 95))
+        return max(delay or 0.0, self.hedging.get('min_delay_seconds', 0.5))
+
+    def run(self, call: Callable[[Dict], Any], primary: Dict, hedge: Optional[Dict] = None,
+            deadline_seconds: Optional[float] = None) -> Any:
+        """
+        Executa call(target) com deadline e hedging opcional
+
+        Levanta TimeoutError se nenhuma chamada responder dentro do deadline,
+        ou a última exceção se todas as chamadas disparadas falharem.
+        """
+        deadline_seconds = deadline_seconds or self.config.get('timeout_seconds', 30)
+        start = time.monotonic()
+        deadline = start + deadline_seconds
+
+        with self._lock:
+            self.stats["calls"] += 1
+
+        delay = self.hedge_delay(primary) if hedge else None
+
+        def timed_call(target: Dict):
+            call_start = time.monotonic()
+            result = call(target)
+            self._tracker(target).record(time.monotonic() - call_start)
+            return result
+
+        futures = {self._pool.submit(timed_call, primary): "primary"}
+        pending = set(futures)
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            wait_timeout = deadline - now
+            if delay is not None and not hedged:
+                wait_timeout = min(wait_timeout, max(0.0, start + delay - now))
+
+            done, pending = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+
+                if futures[future] == "hedge":
+                    with self._lock:
+                        self.stats["hedge_wins"] += 1
+                return result
+
+            if pending and delay is not None and not hedged and time.monotonic() >= start + delay:
+                hedged = True
+                with self._lock:
+                    self.stats["hedged"] += 1
+                hedge_future = self._pool.submit(timed_call, hedge)
+                futures[hedge_future] = "hedge"
+                pending.add(hedge_future)
+
+        if pending or last_error is None:
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise TimeoutError(f"Chamada IA excedeu o deadline de {deadline_seconds:.1f}s")
+
+        with self._lock:
+            self.stats["errors"] += 1
+        raise last_error
+
+    def get_stats(self) -> Dict:
+        """Métricas de hedging: taxa de hedge, vitórias do hedge e p95 por alvo"""
+        with self._lock:
+            stats = dict(self.stats)
+            trackers = dict(self.latency)
+
+        calls = stats["calls"]
+        stats["hedge_rate"] = stats["hedged"] / calls if calls else 0.0
+        stats["hedge_win_rate"] = stats["hedge_wins"] / stats["hedged"] if stats["hedged"] else 0.0
+        stats["p95_seconds"] = {key: tracker.percentile(95) for key, tracker in trackers.items()}
+        return stats
+
+
+class CircuitBreaker:
+    """
+    🔌 Circuit breaker por provider de IA
+
+    Estados:
+    - closed: chamadas liberadas; abre se a taxa de erro ou de chamadas lentas
+      na janela deslizante ultrapassar o limite (após minimum_calls)
+    - open: chamadas rejeitadas imediatamente durante open_seconds
+    - half_open: libera até half_open_max_calls sondas; sucesso fecha, falha reabre
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, config: Dict):
+        self.name = name
+        self.enabled = config.get('enabled', True)
+        self.window_size = config.get('window_size', 20)
+        self.minimum_calls = config.get('minimum_calls', 5)
+        self.failure_rate_threshold = config.get('failure_rate_threshold', 0.5)
+        self.slow_call_threshold = config.get('slow_call_threshold_seconds', 10.0)
+        self.slow_call_rate_threshold = config.get('slow_call_rate_threshold', 0.8)
+        self.open_seconds = config.get('open_seconds', 30.0)
+        self.half_open_max_calls = config.get('half_open_max_calls', 1)
+        self.half_open_success_threshold = config.get('half_open_success_threshold', 1)
+
+        self.state = self.CLOSED
+        self.stats = {"successes": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+        self._window = deque(maxlen=self.window_size)
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Verifica se a chamada pode seguir (em half_open consome uma sonda)"""
+        if not self.enabled:
+            return True
+
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.stats["rejected"] += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._half_open_in_flight = 0
+                self._half_open_successes = 0
+
+            if self.state == self.HALF_OPEN:
+                if self._half_open_in_flight >= self.half_open_max_calls:
+                    self.stats["rejected"] += 1
+                    return False
+                self._half_open_in_flight += 1
+
+            return True
+
+    def is_closed(self) -> bool:
+        return not self.enabled or self.state == self.CLOSED
+
+    def record_success(self, latency_seconds: float):
+        slow = latency_seconds >= self.slow_call_threshold
+
+        with self._lock:
+            self.stats["successes"] += 1
+            if slow:
+                self.stats["slow_calls"] += 1
+
+            if self.state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                if slow:
+                    self._open()
+                    return
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_success_threshold:
+                    self._close()
+                return
+
+            if self.state == self.CLOSED:
+                self._window.append((True, slow))
+                self._evaluate()
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+
+            if self.state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._open()
+                return
+
+            if self.state == self.CLOSED:
+                self._window.append((False, False))
+                self._evaluate()
+
+    def release(self):
+        """Libera a sonda sem contar sucesso/falha (erro de configuração, não do provider)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def _evaluate(self):
+        total = len(self._window)
+        if total < self.minimum_calls:
+            return
+
+        failures = sum(1 for ok, _ in self._window if not ok)
+        slow_calls = sum(1 for _, slow in self._window if slow)
+
+        if (failures / total >= self.failure_rate_threshold or
+                slow_calls / total >= self.slow_call_rate_threshold):
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+        self.stats["opened"] += 1
+
+    def _close(self):
+        self.state = self.CLOSED
+        self._window.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["state"] = self.state
+            stats["window_calls"] = len(self._window)
+        return stats
+
+
+class UsageBudget:
+    """
+    💸 Orçamento de tokens/custo das chamadas IA
+
+    Janelas:
+    - per_minute: janela deslizante de 60s
+    - per_day: dia corrente (horário local), zerado na virada do dia
+
+    Cada janela aceita limites de "tokens" e/ou "cost_usd" (ausente = sem limite).
+    Com o orçamento esgotado os estágios IA são pulados (modo degradado textual).
+    """
+
+    def __init__(self, config: Dict):
+        self.enabled = config.get('enabled', False)
+        self.per_minute = config.get('per_minute', {})
+        self.per_day = config.get('per_day', {})
+        self._minute_window = deque()
+        self._day = time.strftime('%Y-%m-%d')
+        self._day_totals = {"tokens": 0, "cost_usd": 0.0}
+        self.stats = {"rejected": 0}
+        self._lock = threading.Lock()
+
+    def _roll(self, now: float):
+        while self._minute_window and now - self._minute_window[0][0] >= 60:
+            self._minute_window.popleft()
+
+        today = time.strftime('%Y-%m-%d')
+        if today != self._day:
+            self._day = today
+            self._day_totals = {"tokens": 0, "cost_usd": 0.0}
+
+    def _minute_totals(self) -> Dict:
+        return {
+            "tokens": sum(tokens for _, tokens, _ in self._minute_window),
+            "cost_usd": sum(cost for _, _, cost in self._minute_window)
+        }
+
+    @staticmethod
+    def _exceeded(totals: Dict, limits: Dict) -> Optional[str]:
+        for key in ("tokens", "cost_usd"):
+            limit = limits.get(key)
+            if limit is not None and totals[key] >= limit:
+                return key
+        return None
+
+    def check(self) -> Optional[str]:
+        """Retorna o limite esgotado (ex.: 'per_minute.tokens') ou None se há orçamento"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._roll(time.time())
+            for window, totals, limits in (("per_minute", self._minute_totals(), self.per_minute),
+                                           ("per_day", self._day_totals, self.per_day)):
+                exceeded = self._exceeded(totals, limits)
+                if exceeded:
+                    self.stats["rejected"] += 1
+                    return f"{window}.{exceeded}"
+        return None
+
+    def record(self, tokens: int, cost_usd: float):
+        with self._lock:
+            now = time.time()
+            self._roll(now)
+            self._minute_window.append((now, tokens, cost_usd))
+            self._day_totals["tokens"] += tokens
+            self._day_totals["cost_usd"] += cost_usd
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            self._roll(time.time())
+            return {
+                "enabled": self.enabled,
+                "rejected": self.stats["rejected"],
+                "per_minute": {"used": self._minute_totals(), "limits": self.per_minute},
+                "per_day": {"date": self._day, "used": dict(self._day_totals), "limits": self.per_day}
+            }
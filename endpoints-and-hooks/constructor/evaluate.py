@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+🎯 Avaliação Offline de Relevância
+Executa o dataset rotulado (relevance-dataset.json) contra o engine (provider
+replay) e reporta qualidade e latência juntas: accuracy@1, MRR, precision@k,
+taxa de escalonamento para IA e percentis de latência.
+
+Otimizações de velocidade só devem entrar se a qualidade se mantiver:
+--compare com --max-drop falha (exit 1) se accuracy@1 ou MRR caírem além do limite.
+Os casos de "regressions" do dataset (bugs já corrigidos) também falham com exit 1.
+
+Uso:
+    python evaluate.py --output eval.json
+    python evaluate.py --compare eval.json --max-drop 0.02
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from benchmark import DEFAULT_CONFIG, REPO_ROOT, SCRIPT_DIR, build_config, git_commit, summarize
+from constructor import EvolutionAPIConstructor
+
+DEFAULT_DATASET = os.path.join(SCRIPT_DIR, "relevance-dataset.json")
+K_VALUES = (1, 3)
+
+
+def load_dataset(dataset_path: str) -> Tuple[List[Dict], List[Dict]]:
+    """Consultas rotuladas e casos de regressão"""
+    with open(dataset_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data["queries"], data.get("regressions", [])
+
+
+def ranked_ids(metrics: Dict) -> List[str]:
+    """Ranking final: endpoint escolhido primeiro, depois os demais candidatos na ordem"""
+    ranking = []
+    for endpoint_id in [metrics.get("selected_endpoint")] + metrics.get("ranking", []):
+        if endpoint_id and endpoint_id not in ranking:
+            ranking.append(endpoint_id)
+    return ranking
+
+
+def reciprocal_rank(ranking: List[str], expected: List[str]) -> float:
+    for position, endpoint_id in enumerate(ranking, 1):
+        if endpoint_id in expected:
+            return 1.0 / position
+    return 0.0
+
+
+def precision_at_k(ranking: List[str], expected: List[str], k: int) -> float:
+    return sum(1 for endpoint_id in ranking[:k] if endpoint_id in expected) / k
+
+
+def run_evaluation(args: argparse.Namespace) -> Dict:
+    dataset, regressions = load_dataset(os.path.abspath(args.dataset))
+    if args.limit:
+        dataset = dataset[:args.limit]
+
+    config = build_config(os.path.abspath(args.config), args)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as tmp:
+        json.dump(config, tmp, ensure_ascii=False)
+        tmp_config_path = tmp.name
+
+    try:
+        engine = EvolutionAPIConstructor(tmp_config_path, resource_root=REPO_ROOT)
+    finally:
+        os.unlink(tmp_config_path)
+
+    print(f"🎯 Avaliação: {len(dataset)} consultas rotuladas", file=sys.stderr)
+
+    latencies: List[float] = []
+    escalated = 0
+    in_scope = []
+    out_of_scope = []
+    by_category: Dict[str, List[int]] = {}
+    per_query = []
+
+    for entry in dataset:
+        start = time.perf_counter()
+        try:
+            result = engine.search_api(entry["query"])
+        except Exception as e:
+            result = {"error": str(e)}
+        elapsed = time.perf_counter() - start
+
+        metrics = engine.get_query_metrics()
+        ranking = ranked_ids(metrics) if "error" not in result else []
+        ai_escalated = bool(metrics["ai_calls"].get("ranking"))
+
+        latencies.append(elapsed)
+        escalated += ai_escalated
+
+        record = {
+            "number": entry["number"],
+            "query": entry["query"],
+            "expected": entry["expected"],
+            "ranking": ranking,
+            "ai_escalated": ai_escalated,
+            "latency_ms": round(elapsed * 1000, 3)
+        }
+
+        if entry["expected"]:
+            record["correct"] = bool(ranking) and ranking[0] in entry["expected"]
+            record["reciprocal_rank"] = reciprocal_rank(ranking, entry["expected"])
+            in_scope.append(record)
+            by_category.setdefault(entry.get("category") or "-", []).append(int(record["correct"]))
+            status = "✅" if record["correct"] else "❌"
+        else:
+            # Fora do escopo: o ideal é não responder com um endpoint
+            record["answered"] = bool(ranking)
+            out_of_scope.append(record)
+            status = "⚠️" if record["answered"] else "✅"
+
+        per_query.append(record)
+        print(f"  {status} #{entry['number']} {elapsed * 1000:.1f}ms - {entry['query']} → "
+              f"{ranking[0] if ranking else '-'}", file=sys.stderr)
+
+    regression_failures = run_regressions(engine, regressions)
+
+    total = len(dataset)
+    scored = len(in_scope)
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "provider": engine.provider,
+        "queries": total,
+        "in_scope": scored,
+        "out_of_scope": len(out_of_scope),
+        "quality": {
+            "accuracy_at_1": sum(r["correct"] for r in in_scope) / scored if scored else 0.0,
+            "mrr": sum(r["reciprocal_rank"] for r in in_scope) / scored if scored else 0.0,
+            **{f"precision_at_{k}": (sum(precision_at_k(r["ranking"], r["expected"], k) for r in in_scope) / scored
+                                     if scored else 0.0)
+               for k in K_VALUES},
+            "out_of_scope_answer_rate": (sum(r["answered"] for r in out_of_scope) / len(out_of_scope)
+                                         if out_of_scope else 0.0)
+        },
+        "accuracy_by_category": {category: sum(hits) / len(hits) for category, hits in by_category.items()},
+        "ai_escalation_rate": escalated / total if total else 0.0,
+        "latency": summarize(latencies),
+        "tokens": engine.get_token_usage(),
+        "regressions": {"total": len(regressions), "failed": regression_failures},
+        "misses": [{"number": r["number"], "query": r["query"], "expected": r["expected"], "got": r["ranking"][:3]}
+                   for r in in_scope if not r["correct"]],
+        "per_query": per_query if args.per_query else None
+    }
+
+
+def run_regressions(engine: EvolutionAPIConstructor, regressions: List[Dict]) -> List[Dict]:
+    """
+    Casos que já falharam em produção; cada um pode exigir:
+    expected (TOP 1 aceito), forbidden (TOP 1 proibido), corrections (correção
+    ortográfica exata, {} = nenhuma), canonical (token → termo canônico) e
+    intents (texto → intenção classificada, null = indeterminada)
+    """
+    failures = []
+    # Colisão entre grupos de sinônimos é sempre regressão (synonyms.json precisa ser corrigido)
+    for collision in (engine.text_index.collisions if engine.text_index else []):
+        print(f"  ❌ regressão: colisão de sinônimos {collision}", file=sys.stderr)
+        failures.append({"case": "synonyms.json", "note": "colisão de sinônimos", "problems": [collision]})
+
+    for case in regressions:
+        problems = []
+        for token, term in case.get("canonical", {}).items():
+            got = engine.text_index.canonical(token) if engine.text_index else token
+            if got != term:
+                problems.append(f"canonical({token}) = {got}, esperado {term}")
+        for text, intent in case.get("intents", {}).items():
+            got = engine.intent_classifier.classify(text) if engine.intent_classifier else None
+            if got != intent:
+                problems.append(f"intenção({text}) = {got}, esperado {intent}")
+
+        if "query" in case:
+            try:
+                result = engine.search_api(case["query"])
+            except Exception as e:
+                result = {"error": str(e)}
+            metrics = engine.get_query_metrics()
+            ranking = ranked_ids(metrics) if "error" not in result else []
+            top = ranking[0] if ranking else None
+            if case.get("expected") and top not in case["expected"]:
+                problems.append(f"TOP 1 {top}, esperado {case['expected']}")
+            if top and top in case.get("forbidden", []):
+                problems.append(f"TOP 1 proibido {top}")
+            if "corrections" in case and metrics.get("corrections", {}) != case["corrections"]:
+                problems.append(f"correções {metrics.get('corrections', {})}, esperado {case['corrections']}")
+
+        label = case.get("query") or ", ".join({**case.get("canonical", {}), **case.get("intents", {})})
+        print(f"  {'❌' if problems else '✅'} regressão: {label}{' - ' + '; '.join(problems) if problems else ''}",
+              file=sys.stderr)
+        if problems:
+            failures.append({"case": label, "note": case.get("note"), "problems": problems})
+    return failures
+
+
+def compare(current: Dict, baseline: Dict, max_drop: float) -> bool:
+    """
+    Imprime em stderr (stdout é do relatório) a variação de qualidade/latência;
+    False se a qualidade caiu além de max_drop
+    """
+    print(f"\n📊 Comparação com {baseline.get('git_commit') or 'baseline'}:", file=sys.stderr)
+    passed = True
+
+    for key, value in current["quality"].items():
+        before = baseline.get("quality", {}).get(key)
+        if before is None:
+            print(f"  {key:<26} {value:.3f} (sem baseline)", file=sys.stderr)
+            continue
+        delta = value - before
+        gated = key in ("accuracy_at_1", "mrr") and delta < -max_drop
+        passed = passed and not gated
+        print(f"  {key:<26} {value:.3f} ({delta:+.3f}){' ❌' if gated else ''}", file=sys.stderr)
+
+    before_rate = baseline.get("ai_escalation_rate", 0.0)
+    print(f"  {'ai_escalation_rate':<26} {current['ai_escalation_rate']:.1%} (antes {before_rate:.1%})",
+          file=sys.stderr)
+
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        now, before = current["latency"].get(key), baseline.get("latency", {}).get(key)
+        if now is not None and before:
+            print(f"  latency {key[:-3]:<18} {now:.1f}ms ({(now - before) / before * 100:+.1f}%)", file=sys.stderr)
+
+    print("✅ Qualidade mantida" if passed else f"❌ Qualidade caiu mais que {max_drop:.3f}", file=sys.stderr)
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação offline de relevância do Constructor")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="ai_config.json base")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="dataset rotulado (JSON)")
+    parser.add_argument("--output", default=None, help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--limit", type=int, default=None, help="avalia apenas as N primeiras consultas")
+    parser.add_argument("--replay-mode", choices=["replay", "record", "auto"], default=None)
+    parser.add_argument("--cassette", default=None, help="sobrescreve replay.cassette_path")
+    parser.add_argument("--latency-mode", choices=["recorded", "fixed", "none"], default=None)
+    parser.add_argument("--compare", default=None, help="JSON de avaliação anterior para comparação")
+    parser.add_argument("--max-drop", type=float, default=0.0,
+                        help="queda máxima aceita em accuracy@1/MRR no --compare (padrão: 0)")
+    parser.add_argument("--per-query", action="store_true", help="inclui detalhes por consulta no JSON")
+    parser.add_argument("--verbose", action="store_true", help="mostra logs do engine")
+    args = parser.parse_args()
+
+    report = run_evaluation(args)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultado salvo em: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    failed = report["regressions"]["failed"]
+    if failed:
+        print(f"\n❌ {len(failed)}/{report['regressions']['total']} casos de regressão falharam", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            if not compare(report, json.load(f), args.max_drop):
+                sys.exit(1)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+🧭 Classificador de Intenção (create/read/update/delete/stats/test)
+Regras + léxico sobre os termos canônicos do TextIndex (sinônimos incluídos).
+A intenção de cada endpoint é calculada uma única vez a partir do nome
+("Consultar Filtros" → read, "Atualizar Filtros" → update); a da consulta
+vem do primeiro termo com intenção que não seja complemento ("webhook para
+enviar mensagens"). Usada para filtrar ou pontuar candidatos
+com o mesmo substantivo e verbos diferentes, e para decompor consultas
+compostas ("criar instância e configurar webhook") em sub-intenções.
+"""
+
+import re
+from typing import Dict, FrozenSet, List, Optional
+
+from text_index import STOPWORDS, TextIndex, normalize, tokenize
+
+INTENTS = ("create", "read", "update", "delete", "stats", "test")
+
+# Palavras (qualquer flexão/sinônimo) que indicam cada intenção; a primeira intenção listada vence colisões
+INTENT_LEXICON = {
+    "create": ["criar", "adicionar", "novo", "cadastrar", "gerar", "enviar", "mandar", "duplicar", "iniciar"],
+    "delete": ["deletar", "remover", "excluir", "apagar", "limpar", "resetar", "zerar", "revogar", "logout",
+               "sair", "finalizar"],
+    "update": ["atualizar", "alterar", "configurar", "definir", "ajustar", "editar", "ativar", "desativar",
+               "habilitar", "desabilitar", "marcar", "arquivar", "conectar", "reiniciar"],
+    "test": ["testar", "validar", "diagnosticar"],
+    "stats": ["estatistica", "metrica", "relatorio", "dashboard", "saude", "monitorar"],
+    "read": ["listar", "buscar", "consultar", "obter", "verificar", "mostrar", "status", "estado", "exportar",
+             "quais"]
+}
+
+# Pares que não se penalizam (consultar métricas ≈ ver estatísticas)
+COMPATIBLE = {frozenset(("read", "stats"))}
+
+# Separadores de sub-intenções (além de , ; .)
+CONJUNCTIONS = {"e", "depois", "entao", "tambem", "mais", "alem"}
+
+# Após estas palavras o verbo é complemento, não nova intenção ("webhook para enviar mensagens")
+LINKING_WORDS = {"para", "pra", "de", "do", "da", "que", "ao", "sem", "por", "como", "quero", "preciso",
+                 "posso", "devo", "vou", "consigo"}
+
+
+def _is_verb(token: str) -> bool:
+    return len(token) > 4 and token.endswith(("ar", "er", "ir"))
+
+
+class IntentClassifier:
+    """🧭 Intenção por termos canônicos; intenções dos endpoints pré-computadas"""
+
+    def __init__(self, text_index: TextIndex):
+        self.text_index = text_index
+        self.lexicon: Dict[str, str] = {}
+        for intent, words in INTENT_LEXICON.items():
+            for word in words:
+                for token in tokenize(word):
+                    self.lexicon.setdefault(text_index.canonical(token), intent)
+
+    def _token_intent(self, token: str) -> Optional[str]:
+        return self.lexicon.get(self.text_index.canonical(token))
+
+    def classify(self, text: str) -> Optional[str]:
+        """
+        Intenção do primeiro termo que tiver uma (None = indeterminada). Como no
+        split(), verbo após palavra de ligação que segue outro termo é complemento
+        ("webhook para enviar mensagens" não é create); no início vale ("quero listar")
+        """
+        previous, has_head = None, False
+        for word in re.findall(r"\w+", normalize(text or '')):
+            intent = self._token_intent(word) if word not in STOPWORDS else None
+            complement = previous in LINKING_WORDS and has_head and _is_verb(word)
+            if intent and not complement:
+                return intent
+            has_head = has_head or (word not in LINKING_WORDS and word not in STOPWORDS)
+            previous = word
+        return None
+
+    def endpoint_intents(self, endpoint: Dict) -> FrozenSet[str]:
+        """
+        Verbos no início do nome ("Criar/Atualizar ..." → create+update); sem
+        verbo inicial, a primeira palavra com intenção ("Métricas da Fila" → stats)
+        """
+        tokens = tokenize(endpoint.get('name', ''))
+        leading = []
+        for token in tokens:
+            if not _is_verb(token):
+                break
+            intent = self._token_intent(token)
+            if intent:
+                leading.append(intent)
+        if leading:
+            return frozenset(leading)
+
+        intent = self.classify(endpoint.get('name', ''))
+        return frozenset([intent]) if intent else frozenset()
+
+    def split(self, text: str, max_parts: int = 3) -> List[str]:
+        """
+        Sub-intenções de uma consulta composta: corta em conjunções/pontuação e
+        antes de um novo verbo com intenção ("criar instância configurar webhook").
+        Trecho sem intenção ou sem objeto volta a se juntar ao vizinho
+        ("enviar áudio e vídeo", "listar e apagar mensagens" seguem inteiros)
+        """
+        segments: List[List[str]] = [[]]
+        previous = None
+        for word in re.findall(r"\w+|[,;.]", text or ''):
+            normalized = normalize(word)
+            if normalized in (",", ";", ".") or normalized in CONJUNCTIONS:
+                segments.append([word])
+                previous = None
+                continue
+            if (_is_verb(normalized) and self._token_intent(normalized) and previous not in LINKING_WORDS
+                    and self._is_complete(segments[-1])):
+                segments.append([])
+            segments[-1].append(word)
+            previous = normalized
+
+        # Só trechos completos viram sub-intenção; os demais se juntam ao vizinho
+        parts: List[List[str]] = []
+        pending: List[str] = []
+        for segment in segments:
+            if self._is_complete(segment):
+                parts.append(pending + segment)
+                pending = []
+            elif parts and not pending:
+                parts[-1].extend(segment)
+            else:
+                pending.extend(segment)
+        if pending:
+            if parts:
+                parts[-1].extend(pending)
+            else:
+                parts.append(pending)
+
+        queries = [self._join(part) for part in parts]
+        if len(queries) > max_parts:
+            queries = queries[:max_parts - 1] + [' '.join(queries[max_parts - 1:])]
+        return [query for query in queries if query]
+
+    def _is_complete(self, words: List[str]) -> bool:
+        """Tem intenção e ao menos um objeto (termo que não seja verbo com intenção, ex.: "status")"""
+        tokens = [token for word in words for token in tokenize(word)]
+        verbs = [_is_verb(token) and self._token_intent(token) is not None for token in tokens]
+        return any(self._token_intent(token) for token in tokens) and not all(verbs)
+
+    @staticmethod
+    def _join(words: List[str]) -> str:
+        separators = CONJUNCTIONS | {",", ";", "."}
+        while words and normalize(words[0]) in separators:
+            words = words[1:]
+        while words and normalize(words[-1]) in separators:
+            words = words[:-1]
+        text = ' '.join(words)
+        return re.sub(r'\s+([,;.])', r'\1', text).strip(' ,;.')
+
+    def compile(self, endpoints: List[Dict]) -> Dict[int, FrozenSet[str]]:
+        """id(endpoint) → intenções (calculado na carga do índice)"""
+        return {id(endpoint): self.endpoint_intents(endpoint) for endpoint in endpoints}
+
+    @staticmethod
+    def relation(query_intent: Optional[str], endpoint_intents: FrozenSet[str]) -> str:
+        """match | neutral | mismatch"""
+        if not query_intent or not endpoint_intents:
+            return "neutral"
+        if query_intent in endpoint_intents:
+            return "match"
+        if any(frozenset((query_intent, intent)) in COMPATIBLE for intent in endpoint_intents):
+            return "neutral"
+        return "mismatch"
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+🎓 Ranker Local Aprendido (destilação das decisões da IA)
+Cada consulta que escala para a IA gera um rótulo (endpoint vencedor). As
+decisões são gravadas em JSONL (DecisionLog) e treinam um modelo linear
+local (regressão logística multinomial sobre todos os endpoints), usado como
+estágio extra de scoring antes da IA em _hybrid_ranking_strategy.
+
+Features (consulta × endpoint):
+- cobertura de palavras e matches parciais em nome, resumo e keywords
+- pares esparsos token da consulta × id do endpoint e × categoria
+
+Uso:
+    python learned_ranker.py                    # treina com o log e salva o modelo
+    python learned_ranker.py --holdout 0.2      # reporta acurácia em exemplos separados
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+MODEL_VERSION = 1
+
+# Palavras sem valor discriminativo para o ranking
+STOPWORDS = {
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "no", "na", "nos", "nas",
+    "um", "uma", "para", "por", "com", "que", "se", "como", "ao", "aos", "ou"
+}
+
+FIELDS = ("name", "summary", "keywords")
+
+
+def tokenize(text: str) -> List[str]:
+    """Minúsculas, sem acentos, apenas [a-z0-9], sem stopwords"""
+    normalized = unicodedata.normalize('NFD', (text or '').lower())
+    normalized = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
+    return [token for token in re.findall(r'[a-z0-9]+', normalized) if token not in STOPWORDS]
+
+
+class DecisionLog:
+    """📝 Log append-only (JSONL) das decisões de ranking da IA"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, query: str, winner: str, candidates: List[str], **extra):
+        entry = {"ts": datetime.now().isoformat(), "query": query, "winner": winner,
+                 "candidates": candidates, **extra}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+        except OSError as e:
+            logger.warning("⚠️ Decisão da IA não registrada em %s: %s", self.path, e)
+
+    def read(self) -> List[Dict]:
+        """Todas as decisões gravadas (linhas inválidas são ignoradas)"""
+        if not os.path.exists(self.path):
+            return []
+
+        entries = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("query") and entry.get("winner"):
+                    entries.append(entry)
+        return entries
+
+
+class LearnedRanker:
+    """
+    🎓 Modelo linear: score(q, e) = w · φ(q, e), probabilidades via softmax
+    sobre todos os endpoints do índice (regressão logística multinomial)
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, metadata: Optional[Dict] = None):
+        self.weights = weights or {}
+        self.metadata = metadata or {}
+        self._endpoints: List[Dict] = []
+        self._prepared: List[Dict] = []
+
+    @property
+    def examples(self) -> int:
+        return self.metadata.get("examples", 0)
+
+    def prepare(self, endpoints: List[Dict]):
+        """Tokeniza os campos dos endpoints uma única vez"""
+        self._endpoints = endpoints
+        self._prepared = [{
+            "id": endpoint.get('id', f"endpoint_{i}"),
+            "category": endpoint.get('category', ''),
+            "name": set(tokenize(endpoint.get('name', ''))),
+            "summary": set(tokenize(endpoint.get('summary', ''))),
+            "keywords": set(tokenize(' '.join(endpoint.get('keywords', []))))
+        } for i, endpoint in enumerate(endpoints)]
+
+    @staticmethod
+    def _features(query_tokens: List[str], prepared: Dict) -> Dict[str, float]:
+        features = {}
+        unique = set(query_tokens)
+        if not unique:
+            return features
+
+        for field in FIELDS:
+            field_tokens = prepared[field]
+            overlap = len(unique & field_tokens)
+            partial = sum(1 for token in unique if len(token) > 3 and
+                          any(token[:4] == other[:4] for other in field_tokens))
+            if overlap:
+                features[f"{field}_overlap"] = overlap / len(unique)
+            if partial:
+                features[f"{field}_partial"] = partial / len(unique)
+
+        for token in unique:
+            features[f"t:{token}|e:{prepared['id']}"] = 1.0
+            features[f"t:{token}|c:{prepared['category']}"] = 1.0
+
+        return features
+
+    def _probabilities(self, feature_rows: List[Dict[str, float]]) -> List[float]:
+        scores = [sum(self.weights.get(name, 0.0) * value for name, value in row.items())
+                  for row in feature_rows]
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def rank(self, query: str, top_k: int = 3) -> List[Tuple[Dict, float]]:
+        """TOP k endpoints com probabilidade; [] se a consulta não tem tokens úteis"""
+        query_tokens = tokenize(query)
+        if not query_tokens or not self._prepared:
+            return []
+
+        probabilities = self._probabilities([self._features(query_tokens, p) for p in self._prepared])
+        order = sorted(range(len(probabilities)), key=lambda i: probabilities[i], reverse=True)
+        return [(self._endpoints[i], probabilities[i]) for i in order[:top_k]]
+
+    def build_examples(self, decisions: List[Dict]) -> List[Tuple[List[str], int]]:
+        """(tokens, índice do vencedor); uma decisão por consulta (a mais recente)"""
+        index_by_id = {prepared["id"]: i for i, prepared in enumerate(self._prepared)}
+        latest = {}
+        for decision in decisions:
+            query_tokens = tokenize(decision["query"])
+            if query_tokens and decision["winner"] in index_by_id:
+                latest[' '.join(query_tokens)] = (query_tokens, index_by_id[decision["winner"]])
+        return list(latest.values())
+
+    def train(self, examples: List[Tuple[List[str], int]], epochs: int = 30,
+              learning_rate: float = 0.5, l2: float = 0.0001, seed: int = 42) -> Dict:
+        """SGD no log-loss do softmax; retorna acurácia e loss de treino"""
+        rng = random.Random(seed)
+        examples = list(examples)
+
+        for _ in range(epochs):
+            rng.shuffle(examples)
+            for query_tokens, gold in examples:
+                rows = [self._features(query_tokens, prepared) for prepared in self._prepared]
+                probabilities = self._probabilities(rows)
+
+                gradient: Dict[str, float] = {}
+                for i, row in enumerate(rows):
+                    error = probabilities[i] - (1.0 if i == gold else 0.0)
+                    if abs(error) < 1e-6:
+                        continue
+                    for name, value in row.items():
+                        gradient[name] = gradient.get(name, 0.0) + error * value
+
+                # L2 aplicado apenas às features tocadas (regularização preguiçosa)
+                for name, grad in gradient.items():
+                    weight = self.weights.get(name, 0.0)
+                    self.weights[name] = weight - learning_rate * (grad + l2 * weight)
+
+        self.weights = {name: weight for name, weight in self.weights.items() if abs(weight) > 1e-6}
+        stats = self.evaluate(examples)
+        self.metadata.update({
+            "version": MODEL_VERSION,
+            "trained_at": datetime.now().isoformat(),
+            "examples": len(examples),
+            "features": len(self.weights),
+            "train_accuracy": stats["accuracy"],
+            "train_log_loss": stats["log_loss"]
+        })
+        return stats
+
+    def evaluate(self, examples: List[Tuple[List[str], int]]) -> Dict:
+        hits = 0
+        loss = 0.0
+        for query_tokens, gold in examples:
+            probabilities = self._probabilities([self._features(query_tokens, p) for p in self._prepared])
+            hits += max(range(len(probabilities)), key=lambda i: probabilities[i]) == gold
+            loss -= math.log(max(probabilities[gold], 1e-12))
+        total = len(examples)
+        return {"examples": total,
+                "accuracy": hits / total if total else 0.0,
+                "log_loss": loss / total if total else 0.0}
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"metadata": self.metadata, "weights": self.weights}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, index_version: Optional[str] = None) -> Optional["LearnedRanker"]:
+        """Modelo salvo ou None se inexistente/inválido ou treinado com outra versão do índice"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("metadata", {}).get("version") != MODEL_VERSION:
+                logger.warning("⚠️ Modelo do ranker em versão incompatível: %s", path)
+                return None
+            trained_on = data["metadata"].get("index_version")
+            if index_version is not None and trained_on != index_version:
+                logger.warning("⚠️ Modelo do ranker treinado com o índice %s (atual %s): retreine com "
+                               "learned_ranker.py", trained_on, index_version)
+                return None
+            return cls(data["weights"], data["metadata"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("⚠️ Modelo do ranker inválido (%s): %s", path, e)
+            return None
+
+
+def main():
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from constructor import EvolutionAPIConstructor
+
+    parser = argparse.ArgumentParser(description="Treina o ranker local com as decisões da IA")
+    parser.add_argument("--config", default=None, help="ai_config.json (padrão: endpoints-and-hooks/config)")
+    parser.add_argument("--log", default=None, help="sobrescreve learned_ranker.log_path")
+    parser.add_argument("--model", default=None, help="sobrescreve learned_ranker.model_path")
+    parser.add_argument("--holdout", type=float, default=0.0, help="fração de exemplos para validação")
+    parser.add_argument("--epochs", type=int, default=None)
+    args = parser.parse_args()
+
+    engine = EvolutionAPIConstructor(os.path.abspath(args.config) if args.config else None)
+    config = engine.config.get('learned_ranker', {})
+    training = config.get('training', {})
+
+    log_path = args.log or engine.decision_log_path
+    model_path = args.model or engine.learned_ranker_model_path
+
+    ranker = LearnedRanker()
+    ranker.prepare(engine.consolidated_index.get('endpoints', []) + engine.consolidated_index.get('webhooks', []))
+    # Rótulos de outra versão do índice (ou sem versão) não treinam o modelo carimbado com a atual
+    decisions = DecisionLog(log_path).read()
+    current = [decision for decision in decisions if decision.get("index_version") == engine.index_version]
+    if len(current) < len(decisions):
+        print(f"⚠️ {len(decisions) - len(current)} decisões de outra versão do índice (ou sem versão) "
+              f"ignoradas (atual: {engine.index_version})")
+    examples = ranker.build_examples(current)
+    print(f"🎓 {len(examples)} exemplos únicos em {log_path}")
+
+    if not examples:
+        print("❌ Nenhuma decisão da IA registrada ainda")
+        return
+
+    random.Random(training.get('seed', 42)).shuffle(examples)
+    holdout_size = int(len(examples) * args.holdout)
+    holdout, train_set = examples[:holdout_size], examples[holdout_size:]
+
+    stats = ranker.train(train_set,
+                         epochs=args.epochs or training.get('epochs', 30),
+                         learning_rate=training.get('learning_rate', 0.5),
+                         l2=training.get('l2', 0.0001),
+                         seed=training.get('seed', 42))
+    ranker.metadata["index_version"] = engine.index_version
+    print(f"📈 Treino: acurácia {stats['accuracy']:.1%}, log-loss {stats['log_loss']:.3f}")
+
+    if holdout:
+        held = ranker.evaluate(holdout)
+        ranker.metadata["holdout_accuracy"] = held["accuracy"]
+        print(f"🧪 Holdout ({held['examples']}): acurácia {held['accuracy']:.1%}, log-loss {held['log_loss']:.3f}")
+
+    ranker.save(model_path)
+    print(f"💾 Modelo salvo em {model_path} ({len(ranker.weights)} features)")
+
+    if ranker.examples < config.get('min_examples', 30):
+        print(f"⚠️ Abaixo de min_examples ({config.get('min_examples', 30)}): o engine ainda não usará o modelo")
+
+
+if __name__ == "__main__":
+    main()
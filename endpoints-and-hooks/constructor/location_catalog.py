@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+🗺️ Catálogo Compilado de Localizações
+Os intervalos location.startLine/endLine do map.json são mantidos à mão e
+ficam defasados quando o description.md cresce (ex.: "Enviar Áudio" começa
+no meio do JSON do endpoint anterior). Este compilador, executado offline:
+
+1. Lê o description.md de cada origem: títulos de endpoint ("### POST /x - Nome",
+   "#### `GET /x`") e de payload ("### 📡 Webhook Principal (...)", nome de um
+   item de "payloads" do map.json) fora de blocos de código e os blocos ```.
+2. Associa cada endpoint do map.json à sua seção: nome no título, termos
+   canônicos do nome/resumo contra o título e a "Finalidade", proximidade
+   da linha mapeada como desempate (associação 1 para 1).
+3. Valida o intervalo do map.json (limites, início <= fim, dentro da seção,
+   sem cortar bloco de código) e detecta sobreposições, seções órfãs (sem
+   endpoint no map) e endpoints órfãos (sem seção).
+4. Confere o índice de runtime (consolidated-map.json): entrada sem
+   localização compilada é erro (a consulta que a seleciona ficaria sem
+   documentação).
+5. Grava em catalog.path as linhas e os offsets em bytes da seção de cada
+   endpoint, com o hash de cada description.md e map.json.
+
+Em tempo de consulta o engine só fatia os bytes já carregados: nenhuma
+localização é recalculada. Se o description.md ou o map.json mudar (hash
+diferente), a origem volta ao map.json até a próxima compilação.
+
+Roda sem SDK de IA nem chave de API (engine offline, nenhuma chamada IA).
+
+Uso:
+    python location_catalog.py            # valida e grava o catálogo
+    python location_catalog.py --check    # só valida; sai com 1 se houver erro
+    python location_catalog.py --strict   # avisos também contam como erro
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from logger import get_logger
+from text_index import TextIndex, tokenize
+
+logger = get_logger(__name__)
+
+CATALOG_VERSION = 1
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*$')
+_ENDPOINT = re.compile(r'\b(GET|POST|PUT|PATCH|DELETE)\s+(/[^\s`]*)')
+_CAMEL = re.compile(r'([a-z])([A-Z])')
+
+# Linhas iniciais da seção usadas na associação (título + "Finalidade")
+INTRO_LINES = 4
+
+
+@dataclass
+class Section:
+    """Seção de endpoint no description.md (linhas 1-based, inclusivas)"""
+    title: str
+    level: int
+    start_line: int
+    end_line: int
+    endpoints: Tuple[Tuple[str, str], ...]
+    intro: str = ""
+
+
+def file_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def parse_markdown(content: str,
+                   payload_names: Tuple[str, ...] = ()) -> Tuple[List[Section], List[Tuple[int, int]]]:
+    """
+    Seções de endpoint (e de payload: título com um de payload_names) e blocos
+    de código (linha de abertura, linha de fechamento)
+    """
+    lines = content.splitlines()
+    headings: List[Tuple[int, int, str]] = []
+    fences: List[Tuple[int, int]] = []
+    fence_start = None
+    for number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            if fence_start is None:
+                fence_start = number
+            else:
+                fences.append((fence_start, number))
+                fence_start = None
+            continue
+        match = None if fence_start is not None else _HEADING.match(stripped)
+        if match:
+            headings.append((number, len(match.group(1)), match.group(2)))
+    if fence_start is not None:
+        # Bloco sem fechamento vai até o fim do arquivo
+        fences.append((fence_start, len(lines)))
+
+    sections = []
+    for index, (number, level, title) in enumerate(headings):
+        endpoints = tuple(_ENDPOINT.findall(title))
+        if not endpoints and not any(name in title for name in payload_names):
+            continue
+        # Vai até o próximo título de nível igual ou superior; sem linhas em branco/--- no fim
+        end = next((other for other, other_level, _ in headings[index + 1:] if other_level <= level),
+                   len(lines) + 1) - 1
+        while end > number and lines[end - 1].strip() in ("", "---"):
+            end -= 1
+        intro = [line.strip() for line in lines[number:end] if line.strip() and not line.strip().startswith("```")]
+        sections.append(Section(title, level, number, end, endpoints, " ".join(intro[:INTRO_LINES])))
+    return sections, fences
+
+
+def line_offsets(content: bytes) -> List[int]:
+    """Offset em bytes do início de cada linha (índice 0 = linha 1) e o tamanho total no fim"""
+    offsets = [0]
+    for line in content.splitlines(keepends=True):
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def validate_range(start: int, end: int, line_count: int, fences: List[Tuple[int, int]],
+                   section: Optional[Section] = None) -> List[str]:
+    """Problemas de um intervalo do map.json (lista vazia = válido)"""
+    issues = []
+    if start < 1 or end > line_count:
+        issues.append(f"fora dos limites do arquivo (1-{line_count})")
+    if start > end:
+        issues.append("início depois do fim")
+    for fence_start, fence_end in fences:
+        if fence_start < start <= fence_end:
+            issues.append(f"início {start} dentro do bloco de código {fence_start}-{fence_end}")
+        if fence_start <= end < fence_end:
+            issues.append(f"fim {end} dentro do bloco de código {fence_start}-{fence_end}")
+    if section and not (section.start_line <= start and end <= section.end_line):
+        issues.append(f"fora da seção '{section.title}' ({section.start_line}-{section.end_line})")
+    return issues
+
+
+def _map_entries(map_data: Dict) -> List[Dict]:
+    """Endpoints e payloads do map.json com a categoria (chaves sem 'endpoints'/'payloads' são ignoradas)"""
+    entries = []
+    for category, data in map_data.items():
+        if not isinstance(data, dict):
+            continue
+        for key in ('endpoints', 'payloads'):
+            for endpoint in data.get(key, []):
+                entries.append(dict(endpoint, category=category, kind=key))
+    return entries
+
+
+def _mapped_span(location: Dict) -> Optional[Tuple[int, int]]:
+    """Início da request até o fim da response (ou da request), como o engine lia; payload: intervalo direto"""
+    request = location.get('request')
+    if not request:
+        if 'startLine' in location and 'endLine' in location:
+            return location['startLine'], location['endLine']
+        return None
+    end = location.get('response', request)['endLine']
+    return request['startLine'], end
+
+
+def _terms(text_index: TextIndex, text: str) -> set:
+    return {text_index.canonical(token) for token in tokenize(_CAMEL.sub(r'\1 \2', text))}
+
+
+def match_sections(entries: List[Dict], sections: List[Section], text_index: TextIndex,
+                   line_count: int) -> Dict[int, int]:
+    """
+    Índice da entrada → índice da seção. Pontua todos os pares (nome exato no
+    título > termos em comum > proximidade da linha mapeada) e associa de
+    forma gulosa, cada seção a no máximo uma entrada
+    """
+    section_terms = [_terms(text_index, f"{section.title} {section.intro}") for section in sections]
+    scored = []
+    for entry_index, entry in enumerate(entries):
+        entry_terms = _terms(text_index, f"{entry.get('name', '')} {entry.get('summary', '')}")
+        name_terms = _terms(text_index, entry.get('name', ''))
+        span = _mapped_span(entry.get('location', {}))
+        for section_index, section in enumerate(sections):
+            exact = section.title.rsplit(" - ", 1)[-1].strip() == entry.get('name')
+            overlap = len(entry_terms & section_terms[section_index]) / (len(entry_terms) or 1)
+            name_overlap = len(name_terms & section_terms[section_index]) / (len(name_terms) or 1)
+            if not exact and name_overlap < 0.5:
+                continue
+            distance = abs(section.start_line - span[0]) / line_count if span else 1.0
+            scored.append((exact, round(name_overlap + overlap, 6), -distance, entry_index, section_index))
+
+    scored.sort(reverse=True)
+    matches: Dict[int, int] = {}
+    used = set()
+    for _, _, _, entry_index, section_index in scored:
+        if entry_index in matches or section_index in used:
+            continue
+        matches[entry_index] = section_index
+        used.add(section_index)
+    return matches
+
+
+def compile_source(source: str, description_path: str, map_path: str,
+                   text_index: TextIndex) -> Tuple[Dict, List[Dict], Dict[str, List[str]]]:
+    """Metadados da origem, entradas compiladas e relatório (errors/warnings)"""
+    with open(description_path, 'rb') as f:
+        raw = f.read()
+    with open(map_path, 'rb') as f:
+        map_raw = f.read()
+    content = raw.decode('utf-8')
+    line_count = len(content.splitlines())
+    offsets = line_offsets(raw)
+    entries = _map_entries(json.loads(map_raw.decode('utf-8')))
+    sections, fences = parse_markdown(
+        content, tuple(entry.get('name', '') for entry in entries if entry['kind'] == 'payloads'))
+    report: Dict[str, List[str]] = {"errors": [], "warnings": []}
+
+    for name, count in Counter((entry['category'], entry.get('name')) for entry in entries).items():
+        if count > 1:
+            report["errors"].append(f"{source}: endpoint duplicado {name[1]} em {name[0]}")
+
+    matches = match_sections(entries, sections, text_index, line_count)
+    compiled = []
+    mapped_spans = []
+    for entry_index, entry in enumerate(entries):
+        name = entry.get('name', '')
+        span = _mapped_span(entry.get('location', {}))
+        section = sections[matches[entry_index]] if entry_index in matches else None
+
+        issues = ["sem location"] if span is None else validate_range(span[0], span[1], line_count,
+                                                                               fences, section)
+        if span is not None:
+            mapped_spans.append((span, name))
+        if section is None:
+            report["errors"].append(f"{source}: '{name}' sem seção correspondente no description.md")
+            continue
+        if issues:
+            report["warnings"].append(f"{source}: '{name}' {span[0] if span else '?'}-{span[1] if span else '?'}: "
+                                      f"{'; '.join(issues)} → {section.start_line}-{section.end_line}")
+
+        compiled.append({
+            "name": name,
+            "category": entry['category'],
+            "heading": section.title,
+            "start_line": section.start_line,
+            "end_line": section.end_line,
+            "start_byte": offsets[section.start_line - 1],
+            "end_byte": offsets[section.end_line],
+            "map_status": "reparado" if issues else "ok",
+            "map_issues": issues
+        })
+
+    # Sobreposições: no map.json (aviso) e no catálogo compilado (erro)
+    for label, spans, bucket in (
+            ("map.json", mapped_spans, "warnings"),
+            ("catálogo", [((entry['start_line'], entry['end_line']), entry['name']) for entry in compiled], "errors")):
+        ordered = sorted(spans)
+        for (previous_span, previous_name), (span, name) in zip(ordered, ordered[1:]):
+            if span[0] <= previous_span[1]:
+                report[bucket].append(f"{source}: sobreposição no {label}: '{previous_name}' "
+                                      f"{previous_span[0]}-{previous_span[1]} × '{name}' {span[0]}-{span[1]}")
+
+    for section_index, section in enumerate(sections):
+        if section_index not in matches.values():
+            report["warnings"].append(f"{source}: seção órfã (sem endpoint no map.json) "
+                                      f"{section.start_line}: {section.title}")
+
+    metadata = {
+        "description_sha256": file_hash(raw),
+        "map_sha256": file_hash(map_raw),
+        "lines": line_count,
+        "bytes": len(raw),
+        "sections": len(sections),
+        "endpoints": len(entries)
+    }
+    return metadata, compiled, report
+
+
+def check_index(catalog: "LocationCatalog", index_entries: List[Dict]) -> List[str]:
+    """Entradas do consolidated-map.json sem localização compilada (a consulta ficaria sem documentação)"""
+    return [f"índice: '{entry.get('name')}' ({entry.get('source')}/{entry.get('category')}) "
+            f"sem localização compilada"
+            for entry in index_entries
+            if catalog.lookup(entry.get('source'), entry.get('name'), entry.get('category')) is None]
+
+
+class LocationCatalog:
+    """🗺️ Localizações compiladas por origem; fatia o description.md já carregado em memória"""
+
+    def __init__(self, path: str, entries: Optional[Dict[str, List[Dict]]] = None,
+                 metadata: Optional[Dict] = None):
+        self.path = path
+        self.metadata = metadata or {"version": CATALOG_VERSION, "sources": {}}
+        self.entries = entries or {}
+        self.contents: Dict[str, bytes] = {}
+        self._by_name: Dict[Tuple[str, str, Optional[str]], Dict] = {}
+        for source, source_entries in self.entries.items():
+            for entry in source_entries:
+                self._by_name.setdefault((source, entry['name'], entry['category']), entry)
+                self._by_name.setdefault((source, entry['name'], None), entry)
+
+    @classmethod
+    def load(cls, path: str, description_paths: Dict[str, str],
+             map_paths: Optional[Dict[str, str]] = None) -> "LocationCatalog":
+        """
+        Catálogo salvo + bytes de cada description.md; origens cujo description.md
+        ou map.json mudou desde a compilação (hash diferente) ficam de fora
+        """
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("metadata", {}).get("version") != CATALOG_VERSION:
+                logger.warning("⚠️ Catálogo em versão incompatível: %s", path)
+                return cls(path)
+            entries = data["endpoints"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("⚠️ Catálogo inválido (%s): %s", path, e)
+            return cls(path)
+
+        contents = {}
+        for source, source_metadata in data["metadata"].get("sources", {}).items():
+            try:
+                with open(description_paths.get(source, ''), 'rb') as f:
+                    raw = f.read()
+            except OSError as e:
+                logger.warning("⚠️ description.md de %s não lido: %s", source, e)
+                entries.pop(source, None)
+                continue
+            if file_hash(raw) != source_metadata.get("description_sha256"):
+                logger.warning("⚠️ Catálogo desatualizado para %s (description.md mudou): usando map.json", source)
+                entries.pop(source, None)
+                continue
+            if map_paths is not None and source in map_paths:
+                try:
+                    with open(map_paths[source], 'rb') as f:
+                        map_changed = file_hash(f.read()) != source_metadata.get("map_sha256")
+                except OSError:
+                    map_changed = True
+                if map_changed:
+                    logger.warning("⚠️ Catálogo desatualizado para %s (map.json mudou): usando map.json", source)
+                    entries.pop(source, None)
+                    continue
+            contents[source] = raw
+
+        catalog = cls(path, {source: items for source, items in entries.items() if source in contents},
+                      data["metadata"])
+        catalog.contents = contents
+        return catalog
+
+    def lookup(self, source: str, name: str, category: Optional[str] = None) -> Optional[Dict]:
+        """Entrada compilada (nome + categoria; só nome como alternativa)"""
+        return self._by_name.get((source, name, category)) or self._by_name.get((source, name, None))
+
+    def read(self, source: str, entry: Dict) -> str:
+        return self.contents[source][entry['start_byte']:entry['end_byte']].decode('utf-8')
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"metadata": self.metadata, "endpoints": self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict:
+        return {source: len(items) for source, items in self.entries.items()}
+
+
+def main():
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from constructor import EvolutionAPIConstructor
+
+    parser = argparse.ArgumentParser(description="Valida os intervalos do map.json e compila o catálogo")
+    parser.add_argument("--config", default=None, help="ai_config.json (padrão: endpoints-and-hooks/config)")
+    parser.add_argument("--output", default=None, help="sobrescreve catalog.path")
+    parser.add_argument("--check", action="store_true", help="apenas valida (não grava)")
+    parser.add_argument("--strict", action="store_true", help="avisos também falham a validação")
+    args = parser.parse_args()
+
+    # Offline: caminhos e índice textual do engine, sem cliente/SDK de IA
+    engine = EvolutionAPIConstructor(os.path.abspath(args.config) if args.config else None, offline=True)
+    text_index = engine.text_index or TextIndex()
+    catalog = LocationCatalog(os.path.abspath(args.output) if args.output else engine.catalog_path)
+
+    errors, warnings = [], []
+    for source in engine.catalog_sources():
+        metadata, entries, report = compile_source(
+            source,
+            engine._resource_path("endpoints-and-hooks", source, "description.md"),
+            engine._resource_path("endpoints-and-hooks", source, "map.json"),
+            text_index)
+        catalog.metadata["sources"][source] = metadata
+        catalog.entries[source] = entries
+        errors.extend(report["errors"])
+        warnings.extend(report["warnings"])
+        repaired = sum(1 for entry in entries if entry["map_status"] == "reparado")
+        print(f"🗺️ {source}: {len(entries)}/{metadata['endpoints']} endpoints compilados, "
+              f"{repaired} intervalos do map.json reparados")
+
+    # Reindexa por nome as entradas compiladas e confere o índice de runtime
+    catalog = LocationCatalog(catalog.path, catalog.entries, catalog.metadata)
+    errors.extend(check_index(catalog, engine.consolidated_index.get('endpoints', []) +
+                              engine.consolidated_index.get('webhooks', [])))
+
+    for warning in warnings:
+        print(f"  ⚠️ {warning}")
+    for error in errors:
+        print(f"  ❌ {error}")
+
+    failed = bool(errors) or (args.strict and bool(warnings))
+    if not args.check and not errors:
+        catalog.metadata.update({"version": CATALOG_VERSION, "compiled_at": datetime.now().isoformat(),
+                                 "index_version": engine.index_version})
+        catalog.save()
+        print(f"\n✅ Catálogo gravado → {catalog.path}")
+    print(f"\n🗺️ {len(errors)} erros, {len(warnings)} avisos")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+📝 Logging estruturado do Constructor
+Logger com níveis e formatação preguiçosa (logger.info("... %s", valor)),
+escrita fora da thread da consulta (QueueHandler → QueueListener) e saída
+em texto ou JSON.
+
+Uso:
+    from logger import get_logger, setup_logging
+    setup_logging(config.get('logging', {}))
+    logger = get_logger(__name__)
+    logger.info("🔍 Buscando: '%s'", user_query)
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+ROOT_LOGGER_NAME = "constructor"
+
+# Atributos padrão do LogRecord (o restante vem de extra= e vai para o JSON)
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro: ts, level, logger, message + campos de extra="""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que não formata na thread da consulta
+
+    O QueueHandler padrão chama format() em prepare(); aqui só a mensagem é
+    resolvida (msg % args) para congelar args mutáveis (dicts/listas da
+    consulta alterados antes do listener escrever). Timestamp, JSON e
+    traceback continuam sendo montados pelo listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _build_formatter(log_format: str) -> logging.Formatter:
+    if log_format == 'json':
+        return JsonFormatter()
+    return logging.Formatter("%(message)s")
+
+
+def setup_logging(config: Optional[Dict] = None, force: bool = False) -> logging.Logger:
+    """
+    Configura o logger raiz do constructor (idempotente)
+
+    config (seção "logging" do ai_config.json):
+    - level: DEBUG | INFO | WARNING | ERROR
+    - format: text | json
+    - stream: stdout | stderr | none
+    - file_path: arquivo adicional (opcional)
+    """
+    global _listener
+    config = config or {}
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+
+    with _setup_lock:
+        if _listener is not None and not force:
+            return root
+
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        formatter = _build_formatter(config.get('format', 'text'))
+        handlers = []
+
+        stream = config.get('stream', 'stdout')
+        if stream in ('stdout', 'stderr'):
+            stream_handler = logging.StreamHandler(sys.stdout if stream == 'stdout' else sys.stderr)
+            stream_handler.setFormatter(formatter)
+            handlers.append(stream_handler)
+
+        if config.get('file_path'):
+            file_handler = logging.FileHandler(config['file_path'], encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        root.addHandler(DeferredQueueHandler(log_queue))
+        root.setLevel(getattr(logging, str(config.get('level', 'INFO')).upper(), logging.INFO))
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+    return root
+
+
+def get_logger(name: str = ROOT_LOGGER_NAME) -> logging.Logger:
+    """Logger filho de "constructor" (ex.: constructor.error_handler)"""
+    if name == ROOT_LOGGER_NAME or name.startswith(ROOT_LOGGER_NAME + "."):
+        return logging.getLogger(name)
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def shutdown_logging():
+    """Esvazia a fila e para o listener (chamado automaticamente na saída)"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+📝 Observações Pré-geradas por Endpoint
+As observações da Fase 3 dependem só do endpoint (seção literal + outras
+seções de filters.md / dual-webhook-system.md), não da consulta. Este job
+gera uma observação por endpoint enriquecido e grava no artefato compilado
+(observations.path); em tempo de consulta o engine serve a observação
+salva, sem chamada IA.
+
+Cada entrada guarda a versão da documentação (hash dos complementos do
+endpoint): se filters.md ou dual-webhook-system.md mudarem, a entrada fica
+desatualizada e só ela é regenerada na próxima execução.
+
+Uso:
+    python observations.py               # gera entradas ausentes/desatualizadas
+    python observations.py --force       # regenera todas
+    python observations.py --dry-run     # lista o que seria gerado
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+STORE_VERSION = 1
+
+
+def docs_version(complement_content: Dict, other_sections_content: Dict) -> str:
+    """Versão da documentação de um endpoint (hash das entradas da observação)"""
+    payload = json.dumps([complement_content, other_sections_content], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class ObservationStore:
+    """📝 Observações por endpoint (nome → versão da documentação + texto)"""
+
+    def __init__(self, path: str, entries: Optional[Dict[str, Dict]] = None, metadata: Optional[Dict] = None):
+        self.path = path
+        self.entries = entries or {}
+        self.metadata = metadata or {"version": STORE_VERSION}
+
+    @classmethod
+    def load(cls, path: str) -> "ObservationStore":
+        """Artefato salvo (vazio se inexistente/inválido)"""
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("metadata", {}).get("version") != STORE_VERSION:
+                logger.warning("⚠️ Observações em versão incompatível: %s", path)
+                return cls(path)
+            return cls(path, data["observations"], data["metadata"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("⚠️ Observações inválidas (%s): %s", path, e)
+            return cls(path)
+
+    def get(self, endpoint_name: str, version: str) -> Optional[str]:
+        """Observação do endpoint se gerada para esta versão da documentação"""
+        entry = self.entries.get(endpoint_name)
+        if entry and entry.get("docs_version") == version:
+            return entry["observacao"]
+        return None
+
+    def put(self, endpoint_name: str, version: str, observation: str):
+        self.entries[endpoint_name] = {
+            "docs_version": version,
+            "observacao": observation,
+            "generated_at": datetime.now().isoformat()
+        }
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"metadata": self.metadata, "observations": self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def main():
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from constructor import EvolutionAPIConstructor
+
+    parser = argparse.ArgumentParser(description="Pré-gera as observações contextuais por endpoint")
+    parser.add_argument("--config", default=None, help="ai_config.json (padrão: endpoints-and-hooks/config)")
+    parser.add_argument("--output", default=None, help="sobrescreve observations.path")
+    parser.add_argument("--force", action="store_true", help="regenera também as entradas atualizadas")
+    parser.add_argument("--dry-run", action="store_true", help="apenas lista as entradas a gerar")
+    args = parser.parse_args()
+
+    engine = EvolutionAPIConstructor(os.path.abspath(args.config) if args.config else None)
+    store = ObservationStore.load(os.path.abspath(args.output) if args.output else engine.observations_path)
+
+    names = []
+    for endpoint in engine.consolidated_index.get('endpoints', []) + engine.consolidated_index.get('webhooks', []):
+        if endpoint['name'] not in names and engine._get_complement_files(endpoint['name']):
+            names.append(endpoint['name'])
+
+    generated, current, failed = 0, 0, 0
+    for name in names:
+        complement_content, other_sections_content = engine._collect_complements(name)
+        if not complement_content and not other_sections_content:
+            continue
+        version = docs_version(complement_content, other_sections_content)
+        if not args.force and store.get(name, version) is not None:
+            current += 1
+            continue
+        if args.dry_run:
+            print(f"  📝 {name} ({version})")
+            generated += 1
+            continue
+
+        observation = engine._generate_contextual_observations(None, name, complement_content,
+                                                               other_sections_content)
+        if not observation:
+            print(f"  ❌ {name}: falha na geração")
+            failed += 1
+            continue
+        store.put(name, version, observation)
+        generated += 1
+        print(f"  ✅ {name} ({version})")
+
+    if not args.dry_run and generated:
+        store.metadata.update({
+            "version": STORE_VERSION,
+            "provider": engine.provider,
+            "model": engine.config.get(engine.provider, {}).get('model'),
+            "index_version": engine.index_version,
+            "generated_at": datetime.now().isoformat()
+        })
+        store.save()
+
+    action = "a gerar" if args.dry_run else "geradas"
+    print(f"\n📝 {generated} {action}, {current} atualizadas, {failed} falhas → {store.path}")
+    usage = engine.get_token_usage()
+    if not args.dry_run and usage.get("calls"):
+        print(f"💸 {usage['calls']} chamadas IA, custo estimado ${usage.get('cost_usd', 0):.4f}")
+
+
+if __name__ == "__main__":
+    main()
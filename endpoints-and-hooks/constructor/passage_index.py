@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+📚 Índice de Passagens (recuperação por seção)
+Divide os arquivos markdown de documentação em passagens — limites em
+marcadores <!-- SECTION/SUBSECTION/SCENARIO/ENDPOINT:... --> e títulos
+(fora de blocos de código) — e pontua com BM25 sobre os termos canônicos do
+TextIndex (stem + sinônimos). Em vez do arquivo inteiro, só as poucas
+passagens mais relevantes vão para o prompt.
+
+Com vector_weight > 0 o score é híbrido: BM25 normalizado + similaridade de
+cosseno entre vetores TF-IDF esparsos de n-gramas de caracteres (tolera
+flexões, erros de digitação e campos camelCase: "duracao maxima" ×
+"maxDurationSeconds"). Cada passagem guarda as linhas de origem (1-based,
+inclusivas).
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from text_index import TextIndex, normalize, tokenize
+
+_MARKER = re.compile(r'<!--\s*([A-Z_]+):([^>]*?)\s*-->')
+_CAMEL = re.compile(r'([a-z])([A-Z])')
+
+
+def _split_camel(text: str) -> str:
+    """Campos camelCase viram palavras ("minDurationSeconds" → "min Duration Seconds")"""
+    return _CAMEL.sub(r'\1 \2', text)
+
+
+@dataclass
+class Passage:
+    source: str
+    section: str
+    title: str
+    text: str
+    start_line: int = 0
+    end_line: int = 0
+    terms: Counter = field(repr=False, default_factory=Counter)
+    vector: Dict[str, float] = field(repr=False, default_factory=dict)
+
+    @property
+    def length(self) -> int:
+        return sum(self.terms.values())
+
+
+class PassageIndex:
+    """📚 Passagens de markdown pontuadas por BM25 (k1, b) sobre termos canônicos"""
+
+    def __init__(self, text_index: Optional[TextIndex] = None, k1: float = 1.2, b: float = 0.75,
+                 vector_weight: float = 0.0, ngram: int = 3):
+        self.text_index = text_index or TextIndex()
+        self.k1 = k1
+        self.b = b
+        self.vector_weight = vector_weight
+        self.ngram = ngram
+        self.passages: List[Passage] = []
+        self.doc_freq: Counter = Counter()
+        self.ngram_idf: Dict[str, float] = {}
+
+    def _terms(self, text: str) -> Counter:
+        return Counter(self.text_index.canonical(token) for token in tokenize(_split_camel(text)))
+
+    def add_markdown(self, source: str, content: str, skip_sections: Iterable[str] = ("HEADER", "API_ENDPOINTS"),
+                     max_chars: int = 1200) -> int:
+        """Indexa um arquivo; seções em skip_sections ficam de fora. Retorna o nº de passagens"""
+        skip_sections = set(skip_sections)
+        section, title = "", ""
+        lines: List[Tuple[int, str]] = []
+        added = 0
+        in_code = False
+
+        def flush():
+            nonlocal added
+            if section not in skip_sections:
+                for chunk in self._chunks(lines, max_chars):
+                    self._add(Passage(source, section, title, "\n".join(line for _, line in chunk).strip(),
+                                      start_line=chunk[0][0], end_line=chunk[-1][0]))
+                    added += 1
+            lines.clear()
+
+        for number, line in enumerate(content.splitlines(), 1):
+            stripped = line.strip()
+            if stripped.startswith("```"):
+                in_code = not in_code
+            marker = None if in_code else _MARKER.match(stripped)
+            if marker:
+                flush()
+                if marker.group(1) == "SECTION":
+                    section, title = marker.group(2), ""
+                continue
+            if not in_code and stripped.startswith("#"):
+                flush()
+                title = stripped.lstrip("#").strip()
+            lines.append((number, line))
+        flush()
+        return added
+
+    @staticmethod
+    def _chunks(lines: List[Tuple[int, str]], max_chars: int) -> List[List[Tuple[int, str]]]:
+        """Linhas da passagem; acima de max_chars divide em linhas em branco fora de código"""
+        def meaningful(line: str) -> bool:
+            return bool(line.strip()) and line.strip() != "---"
+
+        def trim(chunk: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+            meaningful_numbers = [index for index, (_, line) in enumerate(chunk) if meaningful(line)]
+            if not meaningful_numbers:
+                return []
+            return chunk[meaningful_numbers[0]:meaningful_numbers[-1] + 1]
+
+        content = [line for _, line in lines if meaningful(line)]
+        if not content or (len(content) == 1 and content[0].lstrip().startswith("#")):
+            # Vazia ou só o título (o título segue como contexto da próxima passagem)
+            return []
+        if sum(len(line) + 1 for _, line in lines) <= max_chars:
+            return [trim(lines)]
+
+        # Corta em linha em branco fora de código; bloco de código muito longo (> 2× max_chars) corta em qualquer linha
+        chunks, current, in_code = [], [], False
+        for number, line in lines:
+            if line.strip().startswith("```"):
+                in_code = not in_code
+            current.append((number, line))
+            size = sum(len(item) + 1 for _, item in current)
+            if (not in_code and not line.strip() and size >= max_chars) or size >= 2 * max_chars:
+                chunks.append(trim(current))
+                current = []
+        if current:
+            chunks.append(trim(current))
+        return [chunk for chunk in chunks if chunk]
+
+    def _add(self, passage: Passage):
+        passage.terms = self._terms(f"{passage.title} {passage.text}")
+        self.passages.append(passage)
+        self.doc_freq.update(passage.terms.keys())
+        self.ngram_idf = {}
+
+    def _ngrams(self, text: str) -> Counter:
+        """N-gramas de caracteres por palavra normalizada, com bordas ("_aud", "udio_")"""
+        grams: Counter = Counter()
+        for word in re.findall(r'[a-z0-9]+', normalize(_split_camel(text))):
+            padded = f"_{word}_"
+            for start in range(max(1, len(padded) - self.ngram + 1)):
+                grams[padded[start:start + self.ngram]] += 1
+        return grams
+
+    def _vectorize(self, grams: Counter) -> Dict[str, float]:
+        """TF-IDF (tf sublinear) normalizado (L2)"""
+        vector = {gram: (1 + math.log(count)) * self.ngram_idf[gram]
+                  for gram, count in grams.items() if gram in self.ngram_idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {gram: weight / norm for gram, weight in vector.items()} if norm else {}
+
+    def build_vectors(self):
+        """Vetores das passagens (após indexar todos os arquivos; refeito se passagens forem adicionadas)"""
+        passage_grams = [self._ngrams(f"{passage.title} {passage.text}") for passage in self.passages]
+        frequency: Counter = Counter()
+        for grams in passage_grams:
+            frequency.update(grams.keys())
+        total = len(self.passages)
+        self.ngram_idf = {gram: math.log((1 + total) / (1 + count)) + 1 for gram, count in frequency.items()}
+        for passage, grams in zip(self.passages, passage_grams):
+            passage.vector = self._vectorize(grams)
+
+    def search(self, query: str, top_k: int = 4, sources: Optional[Iterable[str]] = None,
+               max_chars: Optional[int] = None) -> List[Tuple[float, Passage]]:
+        """TOP K passagens (score > 0), opcionalmente limitadas a fontes e a um orçamento de caracteres"""
+        query_terms = self._terms(query)
+        if not (query_terms or self.vector_weight > 0) or not self.passages:
+            return []
+        sources = set(sources) if sources is not None else None
+
+        total = len(self.passages)
+        average_length = sum(passage.length for passage in self.passages) / total
+        idf = {term: math.log(1 + (total - self.doc_freq[term] + 0.5) / (self.doc_freq[term] + 0.5))
+               for term in query_terms if self.doc_freq[term]}
+
+        query_vector = {}
+        if self.vector_weight > 0:
+            if not self.ngram_idf:
+                self.build_vectors()
+            query_vector = self._vectorize(self._ngrams(query))
+
+        scored = []
+        for passage in self.passages:
+            if sources is not None and passage.source not in sources:
+                continue
+            norm = self.k1 * (1 - self.b + self.b * passage.length / average_length)
+            lexical = 0.0
+            for term, weight in idf.items():
+                frequency = passage.terms.get(term, 0)
+                if frequency:
+                    lexical += weight * frequency * (self.k1 + 1) / (frequency + norm)
+            similarity = sum(weight * passage.vector.get(gram, 0.0) for gram, weight in query_vector.items())
+            if lexical > 0 or similarity > 0:
+                scored.append((lexical, similarity, passage))
+
+        # Híbrido: cada sinal normalizado pelo máximo entre as candidatas
+        max_lexical = max((lexical for lexical, _, _ in scored), default=0.0) or 1.0
+        max_similarity = max((similarity for _, similarity, _ in scored), default=0.0) or 1.0
+        if self.vector_weight > 0:
+            scored = [((1 - self.vector_weight) * lexical / max_lexical + self.vector_weight * similarity / max_similarity,
+                       passage) for lexical, similarity, passage in scored]
+        else:
+            scored = [(lexical, passage) for lexical, _, passage in scored if lexical > 0]
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        selected, used = [], 0
+        for score, passage in scored:
+            if len(selected) >= top_k:
+                break
+            if max_chars is not None and selected and used + len(passage.text) > max_chars:
+                continue
+            selected.append((score, passage))
+            used += len(passage.text)
+        return selected
+
+    @staticmethod
+    def format(results: List[Tuple[float, Passage]]) -> str:
+        """Passagens no formato usado nos prompts (=== SEÇÃO / título ===)"""
+        blocks = []
+        for _, passage in results:
+            header = f"{passage.section} / {passage.title}" if passage.title else passage.section
+            blocks.append(f"=== {header} ===\n{passage.text}")
+        return "\n\n".join(blocks)
+
+    def stats(self) -> Dict:
+        return {"passages": len(self.passages),
+                "sources": dict(Counter(passage.source for passage in self.passages))}
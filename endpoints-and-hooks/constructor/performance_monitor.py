@@ -0,0 +1,683 @@
+#!/usr/bin/env python3
+"""
+📊 Performance Monitoring do Constructor
+- Spans de tracing por fase da busca, exportáveis no formato OTLP/JSON do
+  OpenTelemetry (arquivo local ou collector via HTTP)
+- Registro de métricas (counters, gauges, histogramas) no formato texto do Prometheus
+- Profiling por consulta (cProfile ou amostragem de pilha), por flag ou amostragem
+- Concordância textual × IA por faixa de score (drift do threshold híbrido)
+"""
+
+import cProfile
+import json
+import os
+import queue
+import random
+import secrets
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Códigos de status e kind do OTLP
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+
+
+class Span:
+    """Span de tracing (compatível com o modelo de dados do OpenTelemetry)"""
+
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "kind",
+                 "start_ns", "end_ns", "attributes", "status_code", "status_message")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str] = None,
+                 kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict] = None):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException):
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        """Representação compacta anexada à resposta"""
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "attributes": self.attributes,
+            "status": {STATUS_UNSET: "unset", STATUS_OK: "ok", STATUS_ERROR: "error"}[self.status_code]
+        }
+
+    def to_otlp(self) -> Dict:
+        """Span no formato OTLP/JSON (ids em hex, tempos em nanos como string)"""
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status_code}
+        }
+        if self.parent_span_id:
+            otlp["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            otlp["status"]["message"] = self.status_message
+        return otlp
+
+
+def otlp_attribute(key: str, value: Any) -> Dict:
+    """Converte atributo Python em KeyValue do OTLP"""
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class SpanExporter:
+    """
+    📤 Exportador assíncrono de traces
+
+    - file: uma linha OTLP/JSON (ExportTraceServiceRequest) por trace
+    - otlp_http: POST em um collector OpenTelemetry (/v1/traces, JSON)
+
+    Exporta em thread de fundo para não somar latência à consulta.
+    """
+
+    def __init__(self, config: Dict, base_dir: str = ""):
+        self.exporter = config.get('exporter', 'none')
+        self.file_path = os.path.join(base_dir, config.get('file_path', 'endpoints-and-hooks/constructor/traces/traces.jsonl'))
+        self.otlp_endpoint = config.get('otlp_endpoint', 'http://localhost:4318/v1/traces')
+        self.timeout = config.get('export_timeout_seconds', 5)
+        self.service_name = config.get('service_name', 'evolution-api-constructor')
+        self.stats = {"exported": 0, "dropped": 0, "errors": 0}
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=config.get('max_queue_size', 1000))
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter in ('file', 'otlp_http')
+
+    def export(self, spans: List[Span]):
+        if not self.enabled or not spans:
+            return
+
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._worker.start()
+
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def flush(self, timeout: float = 5.0):
+        """Aguarda a fila de exportação esvaziar"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def build_payload(self, spans: List[Span]) -> Dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "evolution-api-constructor"},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                payload = self.build_payload(spans)
+                if self.exporter == 'file':
+                    self._write_file(payload)
+                else:
+                    self._post(payload)
+                self.stats["exported"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning("⚠️ Erro ao exportar trace: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def _write_file(self, payload: Dict):
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.file_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+    def _post(self, payload: Dict):
+        request = urllib.request.Request(
+            self.otlp_endpoint,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class Tracer:
+    """
+    🔭 Tracer leve com propagação de contexto por thread
+
+    - start_trace(): abre o span raiz de uma consulta
+    - span(): abre um span filho do span corrente da thread (ou de parent,
+      para chamadas executadas em outras threads, ex.: pool de chamadas IA)
+    - Fora de um trace ativo, span() não cria nada (custo ~zero)
+    """
+
+    def __init__(self, config: Dict, base_dir: str = ""):
+        self.config = config
+        self.enabled = config.get('enabled', False)
+        self.exporter = SpanExporter(config, base_dir)
+        self._local = threading.local()
+        self._finished: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current_span(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes):
+        """Span raiz: um trace por consulta"""
+        root = Span(name, secrets.token_hex(16), attributes=attributes)
+        with self._lock:
+            self._finished[root.trace_id] = []
+        with self._activate(root):
+            yield root
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, kind: int = SPAN_KIND_INTERNAL, **attributes):
+        parent = parent or self.current_span()
+        if parent is None:
+            yield None
+            return
+
+        span = Span(name, parent.trace_id, parent.span_id, kind, attributes)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def _activate(self, span: Span):
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            if span.status_code == STATUS_UNSET:
+                span.status_code = STATUS_OK
+            stack.pop()
+            with self._lock:
+                finished = self._finished.get(span.trace_id)
+                if finished is not None:
+                    finished.append(span)
+
+    def end_trace(self, root: Span) -> List[Span]:
+        """Encerra o trace: retorna spans ordenados por início e os envia ao exportador"""
+        with self._lock:
+            spans = self._finished.pop(root.trace_id, [])
+        spans.sort(key=lambda span: span.start_ns)
+        self.exporter.export(spans)
+        return spans
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.exporter.stats)
+        stats["exporter"] = self.exporter.exporter
+        stats["active_traces"] = len(self._finished)
+        return stats
+
+
+# Buckets padrão de latência (segundos): de 5ms (textual) a 60s (chamadas IA lentas)
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...],
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base das métricas: nome, ajuda, labels e séries por combinação de labels"""
+
+    TYPE = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Labels inválidos para {self.name}: {sorted(labels)} (esperado {self.label_names})")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        with self._lock:
+            series = dict(self._series)
+        for key, value in sorted(series.items()):
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: Tuple[str, ...], value: Any) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels):
+        """Define o valor diretamente (collectors que espelham contadores externos)"""
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {",".join(key) or "total": value for key, value in self._series.items()}
+
+
+class Gauge(Counter):
+    TYPE = "gauge"
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def _render_series(self, key: Tuple[str, ...], series: Dict) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, series["counts"]):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+        lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+    def snapshot(self) -> Dict:
+        """count, soma e percentis aproximados (limite superior do bucket) por série"""
+        with self._lock:
+            series = {key: {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}
+                      for key, s in self._series.items()}
+
+        result = {}
+        for key, s in series.items():
+            summary = {"count": s["count"], "sum": s["sum"],
+                       "mean": s["sum"] / s["count"] if s["count"] else 0.0}
+            for pct in (50, 95, 99):
+                target = pct / 100.0 * s["count"]
+                cumulative = 0
+                for bound, count in zip(self.buckets, s["counts"]):
+                    cumulative += count
+                    if cumulative >= target:
+                        summary[f"p{pct}"] = bound
+                        break
+            result[",".join(key) or "total"] = summary
+        return result
+
+
+class MetricsRegistry:
+    """
+    📈 Registro de métricas no formato texto do Prometheus
+
+    Métricas são criadas uma vez (counter/gauge/histogram) e atualizadas no
+    caminho da consulta; collectors são chamados no scrape para métricas
+    derivadas de estado (ex.: estado dos circuit breakers).
+    """
+
+    def __init__(self, namespace: str = "constructor"):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(f"{self.namespace}_{name}", documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", documentation, labels, buckets))
+
+    def register_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def _collect(self):
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning("⚠️ Erro no collector de métricas: %s", e)
+
+    def render(self) -> str:
+        """Exposição no formato texto do Prometheus (text/plain; version=0.0.4)"""
+        self._collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict:
+        """Métricas como dict (para get_metrics())"""
+        self._collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def start_http_server(self, host: str = "127.0.0.1", port: int = 9464):
+        """Endpoint de scrape (/metrics) em thread de fundo"""
+        if self._server is not None:
+            return self._server
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        thread.start()
+        logger.info("📈 Métricas disponíveis em http://%s:%s/metrics", host, self._server.server_port)
+        return self._server
+
+    def stop_http_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class AgreementTracker:
+    """
+    🤝 Concordância entre o TOP 1 textual e o TOP 1 da IA
+
+    Registrada a cada escalonamento para IA, por faixa de score textual e em
+    janela recente: queda na janela indica drift do threshold calibrado.
+    """
+
+    def __init__(self, bucket_width: float = 0.1, window: int = 200):
+        self.bucket_width = bucket_width
+        self.compared = 0
+        self.agreed = 0
+        self.buckets: Dict[str, List[int]] = {}
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _bucket(self, score: float) -> str:
+        index = min(int(score / self.bucket_width), int(round(1 / self.bucket_width)) - 1)
+        return f"{index * self.bucket_width:.2f}-{(index + 1) * self.bucket_width:.2f}"
+
+    def record(self, textual_score: float, agreed: bool):
+        with self._lock:
+            self.compared += 1
+            self.agreed += agreed
+            bucket = self.buckets.setdefault(self._bucket(max(textual_score, 0.0)), [0, 0])
+            bucket[0] += 1
+            bucket[1] += agreed
+            self._recent.append(agreed)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            recent = list(self._recent)
+            return {
+                "compared": self.compared,
+                "agreed": self.agreed,
+                "agreement_rate": self.agreed / self.compared if self.compared else None,
+                "recent_agreement_rate": sum(recent) / len(recent) if recent else None,
+                "window": len(recent),
+                "buckets": {name: {"compared": compared, "agreed": agreed,
+                                   "agreement_rate": agreed / compared}
+                            for name, (compared, agreed) in sorted(self.buckets.items())}
+            }
+
+
+class _StackSampler:
+    """Amostrador de pilha de uma thread (formato collapsed: 'a;b;c N')"""
+
+    def __init__(self, thread_id: int, interval_seconds: float):
+        self.thread_id = thread_id
+        self.interval = interval_seconds
+        self.samples: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                collapsed = ";".join(reversed(stack))
+                self.samples[collapsed] = self.samples.get(collapsed, 0) + 1
+
+    def dump(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.samples.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """
+    🔬 Profiling por consulta, opt-in
+
+    Ativado por flag na chamada (search_api(..., profile=True)) ou por
+    amostragem (profiling.enabled + sample_rate). Modos:
+    - cprofile: arquivo {query_id}.pstats (pstats / snakeviz)
+    - sampling: arquivo {query_id}.collapsed (flamegraph.pl / speedscope)
+
+    A configuração é lida a cada consulta: alterar config['profiling'] em
+    runtime muda a taxa de amostragem sem reiniciar o processo.
+    """
+
+    def __init__(self, config: Dict, base_dir: str = ""):
+        self.config = config
+        self.base_dir = base_dir
+        self.stats = {"profiled": 0, "skipped_busy": 0}
+        # cProfile: um profiler ativo por vez no processo
+        self._cprofile_lock = threading.Lock()
+        self._rng = random.Random()
+
+    def should_profile(self, requested: Optional[bool] = None) -> bool:
+        if requested is not None:
+            return requested
+        if not self.config.get('enabled', False):
+            return False
+        return self._rng.random() < self.config.get('sample_rate', 0.0)
+
+    @contextmanager
+    def profile(self, query_id: str):
+        """Perfila o bloco; produz dict com o caminho do arquivo gerado (ou None se pulado)"""
+        mode = self.config.get('mode', 'cprofile')
+        output_dir = os.path.join(self.base_dir, self.config.get('output_dir', 'endpoints-and-hooks/constructor/profiles'))
+        info: Dict[str, Any] = {"query_id": query_id, "mode": mode, "path": None}
+
+        if mode == 'sampling':
+            sampler = _StackSampler(threading.get_ident(),
+                                    self.config.get('sampling_interval_ms', 5) / 1000.0)
+            sampler.start()
+            try:
+                yield info
+            finally:
+                sampler.stop()
+                info["path"] = self._output_path(output_dir, query_id, "collapsed")
+                sampler.dump(info["path"])
+                info["samples"] = sum(sampler.samples.values())
+                self._finish(output_dir)
+            return
+
+        if not self._cprofile_lock.acquire(blocking=False):
+            self.stats["skipped_busy"] += 1
+            yield info
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                yield info
+            finally:
+                profiler.disable()
+                info["path"] = self._output_path(output_dir, query_id, "pstats")
+                profiler.dump_stats(info["path"])
+                self._finish(output_dir)
+        finally:
+            self._cprofile_lock.release()
+
+    @staticmethod
+    def _output_path(output_dir: str, query_id: str, extension: str) -> str:
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, f"{query_id}.{extension}")
+
+    def _finish(self, output_dir: str):
+        self.stats["profiled"] += 1
+        self._prune(output_dir)
+
+    def _prune(self, output_dir: str):
+        """Mantém no máximo max_files perfis (remove os mais antigos)"""
+        max_files = self.config.get('max_files', 500)
+        try:
+            files = [os.path.join(output_dir, name) for name in os.listdir(output_dir)
+                     if name.endswith(('.pstats', '.collapsed'))]
+            if len(files) <= max_files:
+                return
+            files.sort(key=os.path.getmtime)
+            for path in files[:len(files) - max_files]:
+                os.remove(path)
+        except OSError as e:
+            logger.warning("⚠️ Erro ao limpar perfis antigos: %s", e)
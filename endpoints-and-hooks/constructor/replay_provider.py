@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+📼 Provider Record/Replay do Constructor
+Grava pares requisição/resposta reais (com latência) em cassete e os reproduz
+de forma determinística, sem rede, para benchmarks e CI offline.
+
+Emula a superfície dos SDKs usada pelo constructor:
+- Anthropic: client.messages.create(...) e client.messages.stream(...)
+- OpenAI: client.chat.completions.create(...) (com ou sem stream=True)
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+# Parâmetros que não alteram o conteúdo da resposta (fora da chave do cassete)
+VOLATILE_REQUEST_KEYS = {"timeout", "stream", "stream_options"}
+
+
+class CassetteMissError(LookupError):
+    """Requisição não encontrada no cassete em modo replay"""
+
+
+def to_serializable(obj: Any) -> Any:
+    """Converte respostas dos SDKs (pydantic ou namespaces) em estruturas JSON"""
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump(mode='json')
+    if isinstance(obj, SimpleNamespace):
+        return {key: to_serializable(value) for key, value in vars(obj).items()}
+    if isinstance(obj, dict):
+        return {key: to_serializable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_serializable(value) for value in obj]
+    return obj
+
+
+# Campos que os SDKs expõem como dict puro (ex.: input de um bloco tool_use)
+RAW_DICT_FIELDS = {"input"}
+
+
+def to_namespace(data: Any) -> Any:
+    """Reconstrói acesso por atributo (response.content[0].text) a partir do JSON gravado"""
+    if isinstance(data, dict):
+        return SimpleNamespace(**{
+            key: value if key in RAW_DICT_FIELDS else to_namespace(value)
+            for key, value in data.items()
+        })
+    if isinstance(data, list):
+        return [to_namespace(value) for value in data]
+    return data
+
+
+class Cassette:
+    """
+    Arquivo JSON de interações gravadas, indexadas por hash da requisição
+
+    Cada interação guarda: api, método, resumo da requisição, resposta
+    (ou eventos do stream com offsets) e latência observada.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.interactions: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for interaction in data.get('interactions', []):
+            self.interactions[interaction['key']] = interaction
+
+    @staticmethod
+    def request_key(api: str, method: str, request: Dict) -> str:
+        stable = {key: value for key, value in request.items() if key not in VOLATILE_REQUEST_KEYS}
+        payload = json.dumps({"api": api, "method": method, "request": stable},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def summarize_request(request: Dict) -> Dict:
+        """Resumo legível (modelo + última mensagem) sem o prefixo estático gigante"""
+        messages = request.get('messages', [])
+        last_message = messages[-1].get('content') if messages else None
+        return {"model": request.get('model'), "last_message": last_message}
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            interaction = self.interactions.get(key)
+            self.stats["hits" if interaction else "misses"] += 1
+            return interaction
+
+    def add(self, interaction: Dict):
+        with self._lock:
+            self.interactions[interaction['key']] = interaction
+            self.stats["recorded"] += 1
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.VERSION, "interactions": list(self.interactions.values())},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class LatencyModel:
+    """
+    Latência sintética determinística
+
+    - recorded: latência gravada × scale
+    - fixed: fixed_ms (± jitter_ms)
+    - none: sem espera
+    """
+
+    def __init__(self, config: Dict):
+        self.mode = config.get('mode', 'recorded')
+        self.scale = config.get('scale', 1.0)
+        self.fixed_ms = config.get('fixed_ms', 500)
+        self.jitter_ms = config.get('jitter_ms', 0)
+        self.seed = config.get('seed', 42)
+
+    def total_seconds(self, interaction: Dict) -> float:
+        if self.mode == 'none':
+            return 0.0
+
+        if self.mode == 'fixed':
+            jitter = 0.0
+            if self.jitter_ms:
+                rng = random.Random(f"{self.seed}:{interaction['key']}")
+                jitter = rng.uniform(-self.jitter_ms, self.jitter_ms)
+            return max(0.0, (self.fixed_ms + jitter) / 1000.0)
+
+        return interaction.get('latency_seconds', 0.0) * self.scale
+
+    def event_offsets(self, interaction: Dict) -> List[float]:
+        """Offsets (segundos desde o início) de cada evento de stream"""
+        events = interaction.get('events', [])
+        recorded = [event.get('offset_seconds', 0.0) for event in events]
+
+        if self.mode == 'none':
+            return [0.0] * len(events)
+
+        if self.mode == 'recorded':
+            return [offset * self.scale for offset in recorded]
+
+        # fixed: preserva a forma temporal gravada, reescalada para a latência sintética
+        total = self.total_seconds(interaction)
+        recorded_total = interaction.get('latency_seconds') or 0.0
+        if recorded_total:
+            return [total * offset / recorded_total for offset in recorded]
+        return [total * (i + 1) / len(events) for i in range(len(events))]
+
+
+class _ReplayStream:
+    """Stream reproduzido: iterável de eventos com latência sintética, fechável"""
+
+    def __init__(self, events: List[Any], offsets: List[float]):
+        self._events = events
+        self._offsets = offsets
+        self._closed = False
+
+    def __iter__(self) -> Iterator[Any]:
+        start = time.monotonic()
+        for event, offset in zip(self._events, self._offsets):
+            if self._closed:
+                return
+            remaining = offset - (time.monotonic() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+            yield event
+
+    def close(self):
+        self._closed = True
+
+    # Interface de context manager (client.messages.stream)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class _RecordingStream:
+    """Envolve um stream real registrando cada evento e seu offset"""
+
+    def __init__(self, cassette: Cassette, base_interaction: Dict, stream: Any, context_manager: bool):
+        self._cassette = cassette
+        self._interaction = base_interaction
+        self._stream = stream
+        self._context_manager = context_manager
+        self._entered = None
+        self._events: List[Dict] = []
+        self._start = time.monotonic()
+        self._saved = False
+
+    def __enter__(self):
+        self._entered = self._stream.__enter__() if self._context_manager else self._stream
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._save()
+        if self._context_manager:
+            return self._stream.__exit__(*exc_info)
+        return False
+
+    def __iter__(self) -> Iterator[Any]:
+        source = self._entered if self._entered is not None else self._stream
+        for event in source:
+            self._events.append({
+                "offset_seconds": time.monotonic() - self._start,
+                "data": to_serializable(event)
+            })
+            yield event
+        self._save()
+
+    def close(self):
+        self._save()
+        close = getattr(self._stream, 'close', None)
+        if close:
+            close()
+
+    def _save(self):
+        if self._saved or not self._events:
+            return
+        self._saved = True
+        interaction = dict(self._interaction)
+        interaction["events"] = self._events
+        interaction["latency_seconds"] = self._events[-1]["offset_seconds"]
+        self._cassette.add(interaction)
+
+
+class _Endpoint:
+    """Implementa create/stream para uma API (anthropic ou openai) em modo replay/record"""
+
+    def __init__(self, provider: 'ReplayProvider', api: str, upstream: Any):
+        self._provider = provider
+        self._api = api
+        self._upstream = upstream
+
+    def create(self, **request):
+        streaming = bool(request.get('stream'))
+        return self._provider.handle(self._api, "stream" if streaming else "create", request,
+                                     lambda: self._upstream.create(**request) if self._upstream else None)
+
+    def stream(self, **request):
+        return self._provider.handle(self._api, "stream", request,
+                                     lambda: self._upstream.stream(**request) if self._upstream else None,
+                                     context_manager=True)
+
+
+class ReplayProvider:
+    """
+    📼 Cliente IA pluggable com gravação/reprodução em cassete
+
+    Modos:
+    - replay: responde apenas do cassete (CassetteMissError em caso de falta)
+    - record: sempre chama o provider real e grava a interação
+    - auto: reproduz se existir no cassete, senão chama o real e grava
+    """
+
+    def __init__(self, api: str, config: Dict, upstream_client: Any = None):
+        self.api = api
+        self.mode = config.get('mode', 'replay')
+        self.cassette = Cassette(config['cassette_path'])
+        self.latency = LatencyModel(config.get('latency', {}))
+
+        if self.mode in ('record', 'auto') and upstream_client is None:
+            raise ValueError(f"❌ Modo '{self.mode}' do replay exige cliente real para {api}")
+
+        if api == 'anthropic':
+            self.messages = _Endpoint(self, api, getattr(upstream_client, 'messages', None))
+        elif api == 'openai':
+            completions = getattr(getattr(upstream_client, 'chat', None), 'completions', None)
+            self.chat = SimpleNamespace(completions=_Endpoint(self, api, completions))
+        else:
+            raise ValueError(f"❌ API não suportada pelo replay: {api}")
+
+    def handle(self, api: str, method: str, request: Dict, upstream_call, context_manager: bool = False):
+        key = Cassette.request_key(api, method, request)
+
+        if self.mode in ('replay', 'auto'):
+            interaction = self.cassette.get(key)
+            if interaction:
+                return self._replay(interaction)
+            if self.mode == 'replay':
+                raise CassetteMissError(f"Requisição não encontrada no cassete ({key[:12]})")
+
+        return self._record(key, api, method, request, upstream_call, context_manager)
+
+    def _replay(self, interaction: Dict):
+        if interaction.get('method') == 'stream':
+            events = [to_namespace(event['data']) for event in interaction.get('events', [])]
+            return _ReplayStream(events, self.latency.event_offsets(interaction))
+
+        delay = self.latency.total_seconds(interaction)
+        if delay > 0:
+            time.sleep(delay)
+        return to_namespace(interaction['response'])
+
+    def _record(self, key: str, api: str, method: str, request: Dict, upstream_call, context_manager: bool):
+        base_interaction = {
+            "key": key,
+            "api": api,
+            "method": method,
+            "request": Cassette.summarize_request(request),
+            "recorded_at": time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+
+        start = time.monotonic()
+        response = upstream_call()
+
+        if method == 'stream':
+            return _RecordingStream(self.cassette, base_interaction, response, context_manager)
+
+        interaction = dict(base_interaction)
+        interaction["latency_seconds"] = time.monotonic() - start
+        interaction["response"] = to_serializable(response)
+        self.cassette.add(interaction)
+        return response
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.cassette.stats)
+        stats["mode"] = self.mode
+        stats["interactions"] = len(self.cassette.interactions)
+        return stats
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+🔡 Correção Ortográfica por Deleções (estilo SymSpell)
+Vocabulário = palavras normalizadas (sem acentos) de nome, resumo e keywords
+do catálogo. Na carga, cada palavra gera todas as variantes com até
+max_distance letras removidas (prefixo de prefix_length letras), indexadas
+em deleção → palavras. Na consulta, só as deleções do próprio termo são
+geradas e os candidatos confirmados por distância Damerau-Levenshtein (OSA):
+poucas consultas a dicionário em vez de comparar com o vocabulário inteiro.
+
+Só termos que não são palavras válidas são corrigidos: palavras da
+documentação (description.md, filters.md...) e de uma lista de palavras
+opcional (valid_words) ficam como estão ("audit" não vira "áudio").
+Candidatos descartados: primeira letra diferente do termo ("inexistente" ×
+"existente"), só o início do termo, ou sem o sufixo derivacional dele
+("conversao" × "conversas"). Termo digitado com acento é palavra intencional.
+
+Exemplo: "intancia" → "instância", "webhok" → "webhook", "audo" → "áudio"
+"""
+
+import re
+from collections import Counter
+from itertools import combinations
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from text_index import STOPWORDS, normalize
+
+# Terminações de palavras derivadas (sem acento): termo com uma delas não é erro de um candidato sem ela
+DERIVATIONAL_SUFFIXES = ("cao", "coes", "sao", "soes", "mente", "dade", "dades")
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """Variantes de word com 1..max_distance letras removidas"""
+    variants = set()
+    for distance in range(1, min(max_distance, len(word) - 1) + 1):
+        for positions in combinations(range(len(word)), distance):
+            variants.add(''.join(char for i, char in enumerate(word) if i not in positions))
+    return variants
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (transposições adjacentes); > limit assim que ultrapassar"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SpellIndex:
+    """🔡 Índice de deleções sobre o vocabulário do catálogo"""
+
+    def __init__(self, texts: Iterable[str], max_distance: int = 2, prefix_length: int = 7,
+                 min_length: int = 4, canonical: Optional[Callable[[str], str]] = None,
+                 valid_words: Iterable[str] = ()):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_length = min_length
+
+        # Frequência por palavra normalizada e a grafia original (com acento) mais comum
+        self.frequency: Counter = Counter()
+        surfaces: Dict[str, Counter] = {}
+        for text in texts:
+            for surface in re.findall(r'\w+', (text or '').lower()):
+                word = normalize(surface)
+                if word in STOPWORDS or word.isdigit():
+                    continue
+                self.frequency[word] += 1
+                surfaces.setdefault(word, Counter())[surface] += 1
+        self.surface = {word: counts.most_common(1)[0][0] for word, counts in surfaces.items()}
+
+        # Flexões de palavras conhecidas ("áudios", "personalizada") não são erros
+        self.canonical = canonical
+        self.known_terms = {canonical(word) for word in self.frequency} if canonical else set()
+
+        # Palavras válidas fora do catálogo (documentação, lista de palavras): nunca corrigidas
+        self.valid_words = {normalize(word) for word in valid_words}
+
+        self.deletes: Dict[str, List[str]] = {}
+        for word in self.frequency:
+            prefix = word[:prefix_length]
+            for variant in _deletes(prefix, max_distance) | {prefix}:
+                self.deletes.setdefault(variant, []).append(word)
+
+    def _max_distance_for(self, token: str) -> int:
+        # Até 7 letras só 1 erro ("audo" → "audio"); com 2, palavras válidas viram outras ("melhor" → "menor")
+        return 1 if len(token) < 8 else self.max_distance
+
+    def lookup(self, token: str) -> Optional[str]:
+        """Palavra do vocabulário mais próxima (menor distância, depois mais frequente); None se não houver"""
+        if token in self.frequency or token in self.valid_words or len(token) < self.min_length or token.isdigit():
+            return None
+        if self.canonical and self.canonical(token) in self.known_terms:
+            return None
+
+        limit = self._max_distance_for(token)
+        prefix = token[:self.prefix_length]
+        candidates = set()
+        for variant in _deletes(prefix, limit) | {prefix}:
+            candidates.update(self.deletes.get(variant, ()))
+
+        best: Optional[Tuple[int, int, str]] = None
+        for candidate in candidates:
+            # Primeira letra diferente muda a palavra ("inexistente" × "existente"); termo = candidato +
+            # sufixo é palavra derivada, não erro ("conversão" × "conversa")
+            if candidate[0] != token[0] or token.startswith(candidate):
+                continue
+            # Sufixo derivacional que o candidato não tem: outra palavra ("conversao" × "conversas")
+            if any(token.endswith(suffix) and not candidate.endswith(suffix) for suffix in DERIVATIONAL_SUFFIXES):
+                continue
+            distance = edit_distance(token, candidate, limit)
+            if distance > limit:
+                continue
+            key = (distance, -self.frequency[candidate], candidate)
+            if best is None or key < best:
+                best = key
+        return best[2] if best else None
+
+    def correct(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """Texto com palavras corrigidas (grafia do catálogo) e mapa original → correção"""
+        corrections: Dict[str, str] = {}
+
+        def replace(match):
+            surface = match.group(0)
+            word = normalize(surface)
+            # Acento digitado indica palavra intencional ("conversão"), não erro de digitação
+            if word in STOPWORDS or word != surface.lower():
+                return surface
+            fixed = self.lookup(word)
+            if fixed is None:
+                return surface
+            corrections[surface] = self.surface.get(fixed, fixed)
+            return corrections[surface]
+
+        corrected = re.sub(r'\w+', replace, text or '')
+        return corrected, corrections
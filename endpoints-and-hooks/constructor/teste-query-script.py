@@ -1,74 +1,80 @@
 #!/usr/bin/env python3
 """
 🧪 Script de Teste Automatizado do Constructor
-Executa 120 prompts e preenche o arquivo de respostas incrementalmente
+Executa os prompts de teste-query-prompts.md em paralelo (pool de workers),
+respeitando rate_limiting.requests_per_minute via token bucket.
+
+- Resultados em JSONL (uma linha por prompt), gravados assim que cada prompt termina
+- Execução retomável: prompts já presentes no JSONL são pulados (--fresh recomeça)
+- Ao final gera o relatório markdown teste-queries-response.md a partir do JSONL
+
+Uso:
+    python teste-query-script.py --yes --workers 8
+    python teste-query-script.py --yes --retry-errors    # refaz só os que falharam
 """
 
-import sys
+import argparse
+import json
 import os
-import time
 import re
-import json
-from datetime import datetime, timedelta
-from pathlib import Path
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
 
 # Adiciona o diretório atual ao path para imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-try:
-    from constructor_optimized_fixed import optimized_constructor
-    constructor_function = optimized_constructor
-    print("✅ Usando constructor otimizado (fixed) - VERSÃO PRODUÇÃO")
-except ImportError:
-    try:
-        from constructor import constructor
-        constructor_function = constructor
-        print("✅ Usando constructor básico (fallback)")
-    except ImportError:
-        print("❌ Erro: Não foi possível importar nenhuma função constructor")
-        sys.exit(1)
-
-class RateLimiter:
-    """Controla rate limiting para API"""
-
-    def __init__(self, requests_per_minute=50):
-        self.requests_per_minute = requests_per_minute
-        self.requests = []
-        self.enabled = True
-
-    def wait_if_needed(self):
-        """Espera se necessário para respeitar rate limit"""
-        if not self.enabled:
-            return
+sys.path.append(SCRIPT_DIR)
 
-        now = datetime.now()
-        # Remove requests mais antigos que 1 minuto
-        self.requests = [req_time for req_time in self.requests if now - req_time < timedelta(minutes=1)]
+from constructor import EvolutionAPIConstructor
 
-        if len(self.requests) >= self.requests_per_minute:
-            # Calcula quanto tempo esperar
-            oldest_request = min(self.requests)
-            wait_until = oldest_request + timedelta(minutes=1)
-            wait_seconds = (wait_until - now).total_seconds()
 
-            if wait_seconds > 0:
-                print(f"⏳ Rate limit: aguardando {wait_seconds:.1f}s...")
-                time.sleep(wait_seconds)
+class TokenBucket:
+    """
+    Token bucket para rate limiting entre threads
 
-    def record_request(self):
-        """Registra uma nova request"""
-        if self.enabled:
-            self.requests.append(datetime.now())
+    Repõe requests_per_minute tokens por minuto (capacidade = burst).
+    acquire() reserva um token e dorme apenas o necessário até ele existir,
+    então os workers são liberados em ritmo uniforme em vez de em rajadas.
+    """
 
-class ConstructorTester:
-    """Classe para automatizar testes do constructor"""
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Reserva um token; retorna quanto tempo (s) a chamada esperou"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
 
-    def __init__(self):
-        self.prompts_file = "teste-query-prompts.md"
-        self.response_file = "teste-queries-response.md"
+
+class ConstructorTester:
+    """Runner concorrente e retomável dos prompts de teste"""
+
+    def __init__(self, workers: int = 4, results_file: str = "teste-queries-results.jsonl",
+                 config_path: str = None):
+        self.prompts_file = os.path.join(SCRIPT_DIR, "teste-query-prompts.md")
+        self.response_file = os.path.join(SCRIPT_DIR, "teste-queries-response.md")
+        self.results_file = os.path.join(SCRIPT_DIR, results_file)
+        self.config_path = config_path or os.path.join(REPO_ROOT, "endpoints-and-hooks", "config", "ai_config.json")
+        self.workers = workers
         self.prompts = []
-        self.current_test = 0
-        self.rate_limiter = RateLimiter(50)  # 50 RPM para Anthropic
+        self.rate_limiter = None
+        self._write_lock = threading.Lock()
         self.results_summary = {
             "total": 0,
             "success": 0,
@@ -80,164 +86,133 @@ class ConstructorTester:
         self.load_rate_config()
 
     def load_rate_config(self):
-        """Carrega configuração de rate limiting"""
+        """Carrega configuração de rate limiting (token bucket)"""
         try:
-            config_path = "/root/evolution-api-lite/endpoints-and-hooks/config/ai_config.json"
-            with open(config_path, 'r') as f:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
 
             rate_config = config.get("rate_limiting", {})
             if rate_config.get("enabled", True):
                 rpm = rate_config.get("requests_per_minute", 50)
-                self.rate_limiter = RateLimiter(rpm)
-                print(f"📊 Rate limiting: {rpm} requests/minute")
+                burst = rate_config.get("burst", self.workers)
+                self.rate_limiter = TokenBucket(rpm, burst)
+                print(f"📊 Rate limiting: {rpm} requests/minute (burst {burst}, {self.workers} workers)")
             else:
-                self.rate_limiter.enabled = False
                 print("📊 Rate limiting: desabilitado")
 
         except Exception as e:
             print(f"⚠️ Erro ao carregar config de rate limiting: {e}")
 
     def extract_prompts_from_md(self) -> list:
-        """Extrai prompts do arquivo markdown"""
-        prompts = []
-
+        """Extrai prompts numerados (com ou sem aspas) do markdown, na ordem do arquivo"""
         if not os.path.exists(self.prompts_file):
             print(f"❌ Arquivo {self.prompts_file} não encontrado")
-            return prompts
+            return []
 
         with open(self.prompts_file, 'r', encoding='utf-8') as f:
             content = f.read()
 
-        # Regex para extrair prompts numerados (ex: 1. "como criar uma instância")
-        pattern = r'^\d+\.\s*"([^"]+)"'
-        matches = re.findall(pattern, content, re.MULTILINE)
-
-        # Também busca prompts sem aspas (ex: 91. asdfghjkl)
-        pattern2 = r'^\d+\.\s*([^"\n]+)$'
-        matches2 = re.findall(pattern2, content, re.MULTILINE)
-
-        # Combina e limpa duplicatas
-        all_prompts = matches + [m.strip() for m in matches2 if m.strip() not in matches]
-
-        # Remove prompts vazios ou muito curtos
-        prompts = [p.strip() for p in all_prompts if len(p.strip()) > 0]
+        prompts = []
+        for match in re.finditer(r'^(\d+)\.\s*(.+?)\s*$', content, re.MULTILINE):
+            prompt = match.group(2).strip()
+            if len(prompt) >= 2 and prompt.startswith('"') and prompt.endswith('"'):
+                prompt = prompt[1:-1]
+            if prompt:
+                prompts.append((int(match.group(1)), prompt))
 
         print(f"📋 Extraídos {len(prompts)} prompts do arquivo")
         return prompts
 
-    def reset_response_file(self):
-        """Zera o arquivo de respostas e cria cabeçalho"""
-        header = """# 🧪 Respostas dos Testes do Constructor
-
-## 📋 Objetivo
-
-Este documento acumula as respostas dos testes do Evolution API Constructor, organizadas por prompt com suas respectivas métricas e resultados.
-
-**Início dos Testes:** {timestamp}
-
----
-
-""".format(timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-
-        with open(self.response_file, 'w', encoding='utf-8') as f:
-            f.write(header)
-
-        print(f"✅ Arquivo {self.response_file} resetado")
-
-    def run_single_test(self, prompt: str) -> dict:
-        """Executa um teste individual com rate limiting"""
-        print(f"\n🧪 Testando: '{prompt}'")
-
-        # Rate limiting
-        self.rate_limiter.wait_if_needed()
-
+    def load_completed(self, retry_errors: bool = False) -> dict:
+        """Resultados já gravados no JSONL (por número do prompt) para retomar a execução"""
+        completed = {}
+        if not os.path.exists(self.results_file):
+            return completed
+
+        with open(self.results_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Linha truncada por interrupção: será reexecutada
+                    continue
+                if retry_errors and not record.get("success"):
+                    completed.pop(record["number"], None)
+                    continue
+                completed[record["number"]] = record
+        return completed
+
+    def run_single_test(self, engine: EvolutionAPIConstructor, number: int, prompt: str) -> dict:
+        """Executa um teste individual (token bucket antes da chamada)"""
+        waited = self.rate_limiter.acquire() if self.rate_limiter else 0.0
         start_time = time.time()
 
         try:
-            # Muda para o diretório raiz para execução
-            original_dir = os.getcwd()
-            os.chdir("/root/evolution-api-lite")
-
-            # Registra request para rate limiting
-            self.rate_limiter.record_request()
-
-            # Executa o constructor
-            result = constructor_function(prompt)
-
-            # Volta para o diretório original
-            os.chdir(original_dir)
+            result = engine.search_api(prompt)
             execution_time = time.time() - start_time
 
             # Analisa o resultado
             success = "error" not in result and result.get("final_score", 0) > 0
-            has_enhancement = "enhanced_documentation" in result
-            final_score = result.get("final_score", 0)
-
-            # Extrai a resposta principal
-            response_text = ""
-            if success:
-                if "markdown_documentation" in result:
-                    response_text = result["markdown_documentation"][:500] + "..." if len(result.get("markdown_documentation", "")) > 500 else result.get("markdown_documentation", "")
-                elif "response" in result:
-                    response_text = str(result["response"])[:500] + "..." if len(str(result.get("response", ""))) > 500 else str(result.get("response", ""))
-                else:
-                    response_text = str(result)[:500] + "..."
+            has_enhancement = "observacao" in result or any(key.startswith("complemento-") for key in result)
+            documentation = result.get("documentacao", "")
+            endpoint_name = (result.get("endpoint") or {}).get("name")
+            if result.get("consulta_composta"):
+                # 🧩 Uma entrada por intenção: junta nomes e documentações
+                parts = [part for part in result["intencoes"] if "error" not in part]
+                endpoint_name = " + ".join(part["endpoint"]["name"] for part in parts)
+                documentation = "\n\n".join(part.get("documentacao", "") for part in parts)
+            response_text = documentation[:500] + "..." if len(documentation) > 500 else documentation
 
             return {
+                "number": number,
+                "prompt": prompt,
                 "success": success,
                 "execution_time": execution_time,
+                "rate_limit_wait": waited,
                 "has_enhancement": has_enhancement,
-                "final_score": final_score,
+                "final_score": result.get("final_score", 0),
+                "endpoint": endpoint_name,
+                "degraded": result.get("degraded", False),
                 "response_text": response_text,
-                "full_result": result,
-                "error": None
+                "error": result.get("error"),
+                "timestamp": datetime.now().isoformat()
             }
 
         except Exception as e:
-            execution_time = time.time() - start_time
-            print(f"❌ Erro: {str(e)}")
-
             return {
+                "number": number,
+                "prompt": prompt,
                 "success": False,
-                "execution_time": execution_time,
+                "execution_time": time.time() - start_time,
+                "rate_limit_wait": waited,
                 "has_enhancement": False,
                 "final_score": 0,
+                "endpoint": None,
+                "degraded": False,
                 "response_text": "",
-                "full_result": {},
-                "error": str(e)
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
             }
 
-    def append_result_to_file(self, prompt: str, test_number: int, result: dict):
-        """Adiciona resultado ao arquivo incrementalmente"""
-
-        # Prepara template do resultado
-        template = f"""## {test_number}. Prompt: "{prompt}"
-
-**Métricas:**
-- Tempo de resposta: {result['execution_time']:.2f}s
-- Context enhancement: {'Sim' if result['has_enhancement'] else 'Não'}
-- Final score: {result['final_score']:.2f}
-
-**Resposta:**
-"""
-
-        # Adiciona resposta ou erro
-        if result['success']:
-            template += f"{result['response_text']}\n"
-        else:
-            template += "ERRO"
-            if result['error']:
-                template += f" - {result['error']}"
-            template += "\n"
+    def append_result(self, result: dict, done: int, pending: int):
+        """Grava o resultado no JSONL (thread-safe) e imprime o progresso"""
+        with self._write_lock:
+            with open(self.results_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                f.flush()
 
-        template += "\n---\n\n"
+            self._add_to_summary(result)
 
-        # Append ao arquivo
-        with open(self.response_file, 'a', encoding='utf-8') as f:
-            f.write(template)
+            status = "✅" if result["success"] else "❌"
+            success_rate = (self.results_summary["success"] / self.results_summary["total"]) * 100
+            print(f"{status} #{result['number']} ({result['execution_time']:.2f}s) {result['prompt']}")
+            print(f"📊 Progress: {done}/{pending} | Success: {success_rate:.1f}% | "
+                  f"Avg Time: {self.results_summary['avg_time']:.2f}s")
 
-        # Atualiza estatísticas
+    def _add_to_summary(self, result: dict):
         self.results_summary["total"] += 1
         if result['success']:
             self.results_summary["success"] += 1
@@ -250,105 +225,152 @@ Este documento acumula as respostas dos testes do Evolution API Constructor, org
         if result['has_enhancement']:
             self.results_summary["enhancement_count"] += 1
 
-        # Progress
-        progress = (self.results_summary["total"] / len(self.prompts)) * 100 if self.prompts else 0
-        success_rate = (self.results_summary["success"] / self.results_summary["total"]) * 100
-
-        print(f"✅ Resultado #{test_number} salvo")
-        print(f"📊 Progress: {progress:.1f}% | Success: {success_rate:.1f}% | Avg Time: {self.results_summary['avg_time']:.2f}s")
-
-    def append_final_summary(self):
-        """Adiciona resumo final ao arquivo"""
-
-        enhancement_rate = (self.results_summary["enhancement_count"] / self.results_summary["total"]) * 100 if self.results_summary["total"] > 0 else 0
-        success_rate = (self.results_summary["success"] / self.results_summary["total"]) * 100 if self.results_summary["total"] > 0 else 0
-
-        summary = f"""## 📊 Resumo Final dos Resultados
-
-**Data/Hora de Conclusão:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-**Total de Prompts Testados:** {self.results_summary["total"]}/120
-
-**Distribuição de Resultados:**
-- ✅ Sucessos: {self.results_summary["success"]} ({success_rate:.1f}%)
-- ❌ Erros: {self.results_summary["errors"]} ({100-success_rate:.1f}%)
-
-**Métricas Gerais:**
-- Tempo total de execução: {self.results_summary["total_time"]:.2f}s
-- Tempo médio de resposta: {self.results_summary["avg_time"]:.2f}s
-- Taxa de context enhancement: {enhancement_rate:.1f}%
-
-**Status do Teste:** ✅ Concluído com sucesso
-"""
+    def write_markdown_report(self, results: list, wall_time: float):
+        """Gera teste-queries-response.md a partir de todos os resultados (ordem dos prompts)"""
+        self.results_summary = {key: 0 for key in self.results_summary}
+        for result in results:
+            self._add_to_summary(result)
+
+        lines = [
+            "# 🧪 Respostas dos Testes do Constructor",
+            "",
+            "## 📋 Objetivo",
+            "",
+            "Este documento acumula as respostas dos testes do Evolution API Constructor, "
+            "organizadas por prompt com suas respectivas métricas e resultados.",
+            "",
+            f"**Gerado em:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            "",
+            "---",
+            ""
+        ]
+
+        for result in results:
+            lines += [
+                f"## {result['number']}. Prompt: \"{result['prompt']}\"",
+                "",
+                "**Métricas:**",
+                f"- Tempo de resposta: {result['execution_time']:.2f}s",
+                f"- Context enhancement: {'Sim' if result['has_enhancement'] else 'Não'}",
+                f"- Final score: {result['final_score']:.2f}",
+                f"- Endpoint: {result.get('endpoint') or '-'}",
+                "",
+                "**Resposta:**"
+            ]
+            if result['success']:
+                lines.append(result['response_text'])
+            else:
+                lines.append("ERRO" + (f" - {result['error']}" if result['error'] else ""))
+            lines += ["", "---", ""]
+
+        total = self.results_summary["total"]
+        success_rate = (self.results_summary["success"] / total) * 100 if total else 0
+        enhancement_rate = (self.results_summary["enhancement_count"] / total) * 100 if total else 0
+
+        lines += [
+            "## 📊 Resumo Final dos Resultados",
+            "",
+            f"**Data/Hora de Conclusão:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            "",
+            f"**Total de Prompts Testados:** {total}/{len(self.prompts)}",
+            "",
+            "**Distribuição de Resultados:**",
+            f"- ✅ Sucessos: {self.results_summary['success']} ({success_rate:.1f}%)",
+            f"- ❌ Erros: {self.results_summary['errors']} ({100 - success_rate:.1f}%)",
+            "",
+            "**Métricas Gerais:**",
+            f"- Tempo de parede desta execução: {wall_time:.2f}s ({self.workers} workers)",
+            f"- Soma dos tempos de resposta: {self.results_summary['total_time']:.2f}s",
+            f"- Tempo médio de resposta: {self.results_summary['avg_time']:.2f}s",
+            f"- Taxa de context enhancement: {enhancement_rate:.1f}%",
+            ""
+        ]
 
-        with open(self.response_file, 'a', encoding='utf-8') as f:
-            f.write(summary)
+        with open(self.response_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
 
-        print(f"\n🎉 Resumo final adicionado ao arquivo {self.response_file}")
+        print(f"\n🎉 Relatório gerado em {self.response_file}")
 
-    def run_all_tests(self):
-        """Executa todos os testes"""
+    def run_all_tests(self, fresh: bool = False, retry_errors: bool = False, limit: int = None):
+        """Executa os prompts pendentes no pool de workers"""
         print("🚀 Iniciando execução dos testes automatizados")
         print("=" * 60)
 
-        # Carrega prompts
         self.prompts = self.extract_prompts_from_md()
+        if limit:
+            self.prompts = self.prompts[:limit]
         if not self.prompts:
             print("❌ Nenhum prompt encontrado. Verifique o arquivo teste-query-prompts.md")
             return
 
-        # Reset do arquivo
-        self.reset_response_file()
+        if fresh and os.path.exists(self.results_file):
+            os.remove(self.results_file)
+            print(f"✅ Arquivo {self.results_file} resetado")
 
-        # Executa testes
-        for i, prompt in enumerate(self.prompts, 1):
-            try:
-                result = self.run_single_test(prompt)
-                self.append_result_to_file(prompt, i, result)
+        completed = self.load_completed(retry_errors)
+        pending = [(number, prompt) for number, prompt in self.prompts if number not in completed]
+        print(f"▶️ {len(completed)} prompts já concluídos, {len(pending)} pendentes")
 
-                # Pausa pequena entre testes para evitar sobrecarga
-                time.sleep(0.5)
+        # Um engine compartilhado pelos workers; recursos resolvidos a partir de REPO_ROOT
+        engine = EvolutionAPIConstructor(self.config_path, resource_root=REPO_ROOT)
 
-            except KeyboardInterrupt:
-                print(f"\n⏸️ Testes interrompidos pelo usuário no prompt #{i}")
-                print(f"📊 Progresso: {i-1} de {len(self.prompts)} testes concluídos")
-                break
-            except Exception as e:
-                print(f"❌ Erro inesperado no prompt #{i}: {e}")
-                continue
-
-        # Adiciona resumo final
-        self.append_final_summary()
+        start = time.time()
+        done = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="teste") as pool:
+                futures = [pool.submit(self.run_single_test, engine, number, prompt)
+                           for number, prompt in pending]
+                for future in as_completed(futures):
+                    result = future.result()
+                    done += 1
+                    completed[result["number"]] = result
+                    self.append_result(result, done, len(pending))
+        except KeyboardInterrupt:
+            print(f"\n⏸️ Testes interrompidos pelo usuário: {done} de {len(pending)} concluídos")
+            print("▶️ Execute novamente para retomar de onde parou")
+            os._exit(130)
+
+        wall_time = time.time() - start
+        ordered = [completed[number] for number, _ in self.prompts if number in completed]
+        self.write_markdown_report(ordered, wall_time)
 
         print("\n" + "=" * 60)
         print("✅ Execução dos testes concluída!")
-        print(f"📄 Resultados salvos em: {self.response_file}")
-        print(f"📊 Taxa de sucesso: {(self.results_summary['success']/self.results_summary['total'])*100:.1f}%")
+        print(f"📄 Resultados JSONL: {self.results_file}")
+        print(f"⏱️ Tempo de parede: {wall_time:.2f}s")
+        if self.results_summary['total']:
+            print(f"📊 Taxa de sucesso: {(self.results_summary['success']/self.results_summary['total'])*100:.1f}%")
+
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Testes de regressão do Evolution API Constructor")
+    parser.add_argument("--workers", type=int, default=4, help="chamadas simultâneas (padrão: 4)")
+    parser.add_argument("--results", default="teste-queries-results.jsonl", help="arquivo JSONL de resultados")
+    parser.add_argument("--config", default=None, help="ai_config.json (padrão: endpoints-and-hooks/config)")
+    parser.add_argument("--fresh", action="store_true", help="descarta resultados anteriores e recomeça")
+    parser.add_argument("--retry-errors", action="store_true", help="reexecuta prompts que falharam")
+    parser.add_argument("--limit", type=int, default=None, help="apenas os N primeiros prompts")
+    parser.add_argument("--yes", action="store_true", help="não pede confirmação")
+    args = parser.parse_args()
+
     print("🧪 Evolution API Constructor - Script de Teste Automatizado")
     print("=" * 60)
 
-    # Muda para o diretório correto se necessário
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    os.chdir(script_dir)
-
-    # Verifica se estamos no diretório correto
-    if not os.path.exists("teste-query-prompts.md"):
+    if not os.path.exists(os.path.join(SCRIPT_DIR, "teste-query-prompts.md")):
         print("❌ Arquivo teste-query-prompts.md não encontrado")
-        print("Certifique-se de executar o script no diretório endpoints-and-hooks/constructor/")
         return
 
-    # Pergunta confirmação
-    response = input("🤔 Deseja executar todos os 120 testes? (s/N): ").lower().strip()
-    if response not in ['s', 'sim', 'y', 'yes']:
-        print("❌ Execução cancelada pelo usuário")
-        return
+    if not args.yes:
+        response = input("🤔 Deseja executar os testes pendentes? (s/N): ").lower().strip()
+        if response not in ['s', 'sim', 'y', 'yes']:
+            print("❌ Execução cancelada pelo usuário")
+            return
+
+    tester = ConstructorTester(workers=args.workers, results_file=args.results,
+                               config_path=os.path.abspath(args.config) if args.config else None)
+    tester.run_all_tests(fresh=args.fresh, retry_errors=args.retry_errors, limit=args.limit)
 
-    # Executa testes
-    tester = ConstructorTester()
-    tester.run_all_tests()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+🔤 Expansão Textual Pré-compilada (stemmer pt-BR + sinônimos)
+Reduz cada palavra a um termo canônico: normalização (minúsculas, sem
+acentos) → stemmer leve de português → grupo de sinônimos. Os termos dos
+campos de cada endpoint são compilados uma única vez na carga do índice;
+por consulta só os tokens da própria consulta são canonizados.
+
+Palavras dos grupos (singular/plural) casam exatamente antes do radical;
+radicais compartilhados por grupos diferentes são ambíguos e ficam de fora
+(logados como colisão na carga).
+
+Exemplo: "mandar áudio" → {"envi", "audi"} casa com "Enviar Áudio"
+"""
+
+import json
+import re
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+STOPWORDS = {
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "no", "na", "nos", "nas",
+    "um", "uma", "uns", "umas", "para", "pra", "por", "com", "que", "se", "como", "ao", "aos",
+    "ou", "meu", "minha", "seu", "sua", "esse", "essa", "este", "esta", "qual", "quero", "fazer"
+}
+
+FIELDS = ("name", "summary", "keywords")
+
+# Radicais de sinônimos abaixo disso só expandem a palavra exata (singular/plural)
+MIN_SYNONYM_STEM = 4
+
+# Sufixos removidos em ordem (o primeiro que casar); (sufixo, substituto, tamanho mínimo do radical)
+_PLURAL_RULES = (("oes", "ao", 2), ("aes", "ao", 2), ("ais", "al", 2), ("eis", "el", 2),
+                 ("ns", "m", 2), ("res", "r", 2), ("zes", "z", 2), ("ses", "s", 2), ("s", "", 3))
+_SUFFIX_RULES = (("amente", "", 3), ("mente", "", 3), ("coes", "", 3), ("cao", "", 3),
+                 ("ando", "", 3), ("endo", "", 3), ("indo", "", 3),
+                 ("ado", "", 3), ("ada", "", 3), ("ido", "", 3), ("ida", "", 3),
+                 ("ar", "", 3), ("er", "", 3), ("ir", "", 3))
+
+
+def normalize(text: str) -> str:
+    """Minúsculas e sem acentos"""
+    decomposed = unicodedata.normalize('NFD', (text or '').lower())
+    return ''.join(char for char in decomposed if unicodedata.category(char) != 'Mn')
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in re.findall(r'[a-z0-9]+', normalize(text)) if token not in STOPWORDS]
+
+
+def _apply(word: str, rules) -> str:
+    for suffix, replacement, min_stem in rules:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_stem:
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def stem(word: str) -> str:
+    """
+    Stemmer leve (inspirado no RSLP): plural → sufixos nominais/verbais →
+    vogal temática. Ex.: instâncias → instanci, criação/criar/cria → cri
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    word = _apply(word, _PLURAL_RULES)
+    word = _apply(word, _SUFFIX_RULES)
+    if len(word) > 3 and word[-1] in "aeo":
+        word = word[:-1]
+    return word
+
+
+def singular(word: str) -> str:
+    """Só a regra de plural ("registros" → "registro", "ligacoes" → "ligacao")"""
+    return _apply(word, _PLURAL_RULES) if len(word) > 3 else word
+
+
+class TextIndex:
+    """🔤 Canonização de termos (stem + sinônimos) e termos compilados por endpoint"""
+
+    def __init__(self, synonym_groups: Iterable[List[str]] = ()):
+        self.synonyms: Dict[str, str] = {}
+        self.words: Dict[str, str] = {}
+        self.vocabulary: List[str] = []
+        self.collisions: List[str] = []
+        stem_groups: Dict[str, set] = {}
+        for group in synonym_groups:
+            self.vocabulary.extend(group)
+            tokens = [token for word in group for token in tokenize(word)]
+            if not tokens:
+                continue
+            canonical = stem(tokens[0])
+            for token in tokens:
+                previous = self.words.setdefault(singular(token), canonical)
+                if previous != canonical:
+                    self.collisions.append(f"'{token}' em '{previous}' e '{canonical}'")
+                word_stem = stem(token)
+                # Radical curto só vale pela palavra exata: "ligacao" → "lig" também pegaria "ligar"
+                if word_stem != canonical and len(word_stem) < MIN_SYNONYM_STEM:
+                    continue
+                stem_groups.setdefault(word_stem, set()).add(canonical)
+
+        # Radical de grupos diferentes ("registrar" × "registro" → "registr") é ambíguo: só a palavra exata expande
+        for word_stem, canonicals in stem_groups.items():
+            if len(canonicals) > 1:
+                self.collisions.append(f"radical '{word_stem}' em {sorted(canonicals)}")
+            else:
+                self.synonyms[word_stem] = next(iter(canonicals))
+        for collision in self.collisions:
+            logger.warning("⚠️ Colisão de sinônimos: %s", collision)
+        self._cache: Dict[str, str] = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> "TextIndex":
+        """Carrega os grupos de sinônimos; arquivo ausente = apenas stemmer"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                groups = json.load(f).get('groups', [])
+        except FileNotFoundError:
+            logger.warning("⚠️ Sinônimos não encontrados em %s: usando apenas stemmer", path)
+            groups = []
+        return cls(groups)
+
+    def canonical(self, token: str) -> str:
+        term = self._cache.get(token)
+        if term is None:
+            term = self.words.get(singular(token))
+            if term is None:
+                word_stem = stem(token)
+                term = self.synonyms.get(word_stem, word_stem)
+            self._cache[token] = term
+        return term
+
+    def terms(self, text: str) -> FrozenSet[str]:
+        return frozenset(self.canonical(token) for token in tokenize(text))
+
+    def compile_endpoint(self, endpoint: Dict) -> Dict[str, FrozenSet[str]]:
+        """Termos canônicos por campo (nome, resumo, keywords)"""
+        return {
+            "name": self.terms(endpoint.get('name', '')),
+            "summary": self.terms(endpoint.get('summary', '')),
+            "keywords": self.terms(' '.join(endpoint.get('keywords', [])))
+        }
+
+    @staticmethod
+    def coverage(query_terms: FrozenSet[str], field_terms: FrozenSet[str]) -> float:
+        """Fração dos termos da consulta presentes no campo"""
+        if not query_terms:
+            return 0.0
+        return len(query_terms & field_terms) / len(query_terms)